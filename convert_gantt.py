@@ -1,35 +1,66 @@
 #!/usr/bin/env python3
 """
 Convert Mermaid Gantt charts to PNG images
+
+Conversion is incremental: a manifest in the output directory records the
+content hash each PNG was rendered from, so unchanged charts are skipped.
+The remaining charts are converted on a bounded thread pool sharing one
+HTTP session.
 """
 import os
+import sys
 import glob
+import json
+import time
+import hashlib
+import threading
 import requests
 import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+MANIFEST_NAME = ".gantt_manifest.json"
+DEFAULT_WORKERS = 4
+REQUEST_TIMEOUT = 30
+
+_print_lock = threading.Lock()
+
+def _log(message):
+    with _print_lock:
+        print(message)
+
+def create_session(workers=DEFAULT_WORKERS):
+    """Create an HTTP session whose connection pool fits the worker count"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=2)
+    session.mount("https://", adapter)
+    return session
 
-def convert_mermaid_to_png(mermaid_content, output_path):
+def convert_mermaid_to_png(mermaid_content, output_path, session=None):
     """Convert Mermaid content to PNG using mermaid.ink API"""
     try:
         # Encode the mermaid content
         encoded = base64.b64encode(mermaid_content.encode()).decode()
-        
+
         # Use mermaid.ink API
         url = f"https://mermaid.ink/img/{encoded}?type=png"
-        
+
         # Download the image
-        response = requests.get(url)
+        response = (session or requests).get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        
-        # Save the image
-        with open(output_path, 'wb') as f:
+
+        # Save the image atomically so an interrupted run never leaves a partial PNG
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'wb') as f:
             f.write(response.content)
-        
-        print(f"✅ Converted to PNG: {output_path}")
+        os.replace(tmp_path, output_path)
+
+        _log(f"✅ Converted to PNG: {output_path}")
         return True
-        
+
     except Exception as e:
-        print(f"❌ Error converting to PNG: {e}")
+        _log(f"❌ Error converting to PNG: {e}")
         return False
 
 def extract_mermaid_from_file(file_path):
@@ -37,49 +68,122 @@ def extract_mermaid_from_file(file_path):
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-        
+
         # Find mermaid block
         start = content.find('```mermaid')
         if start == -1:
             return None
-        
+
         start = content.find('\n', start) + 1
         end = content.find('```', start)
-        
+
         if end == -1:
             return None
-        
+
         return content[start:end].strip()
-        
+
     except Exception as e:
-        print(f"❌ Error reading file {file_path}: {e}")
+        _log(f"❌ Error reading file {file_path}: {e}")
         return None
 
-def main():
-    """Convert all Gantt chart files to PNG"""
-    # Find all gantt chart files
-    gantt_files = glob.glob("outputs/gantt_chart_*.md")
-    
+def content_hash(mermaid_content):
+    """Hash of the Mermaid source a PNG is rendered from"""
+    return hashlib.sha256(mermaid_content.encode("utf-8")).hexdigest()
+
+def load_manifest(manifest_path):
+    """Load the PNG -> source hash manifest"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically"""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def convert_all(pattern="outputs/gantt_chart_*.md", workers=DEFAULT_WORKERS, force=False):
+    """Convert every changed Gantt chart matching pattern; returns run statistics"""
+    started = time.perf_counter()
+    gantt_files = sorted(glob.glob(pattern))
+    stats = {"found": len(gantt_files), "converted": 0, "skipped": 0, "failed": 0, "no_mermaid": 0}
     if not gantt_files:
-        print("❌ No Gantt chart files found in outputs/ directory")
-        return
-    
+        stats["seconds"] = 0.0
+        return stats
     print(f"📊 Found {len(gantt_files)} Gantt chart files")
-    
+
+    manifest_path = os.path.join(os.path.dirname(gantt_files[0]) or ".", MANIFEST_NAME)
+    manifest = {} if force else load_manifest(manifest_path)
+
+    # Work out which charts are stale before touching the network
+    pending = []
     for file_path in gantt_files:
-        print(f"\n🔄 Processing: {file_path}")
-        
-        # Extract mermaid content
         mermaid_content = extract_mermaid_from_file(file_path)
         if not mermaid_content:
-            print(f"❌ No Mermaid content found in {file_path}")
+            stats["no_mermaid"] += 1
+            continue
+        output_path = str(Path(file_path).with_suffix('.png'))
+        digest = content_hash(mermaid_content)
+        if manifest.get(output_path) == digest and os.path.exists(output_path):
+            stats["skipped"] += 1
             continue
-        
-        # Create output path
-        output_path = file_path.replace('.md', '.png')
-        
-        # Convert to PNG
-        convert_mermaid_to_png(mermaid_content, output_path)
+        pending.append((file_path, output_path, mermaid_content, digest))
+
+    if pending:
+        _log(f"🔄 Converting {len(pending)} chart(s) with {workers} worker(s)")
+        session = create_session(workers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(convert_mermaid_to_png, mermaid_content, output_path, session): (output_path, digest)
+                    for _, output_path, mermaid_content, digest in pending
+                }
+                for future in as_completed(futures):
+                    output_path, digest = futures[future]
+                    if future.result():
+                        manifest[output_path] = digest
+                        stats["converted"] += 1
+                    else:
+                        stats["failed"] += 1
+        finally:
+            session.close()
+
+    # Forget PNGs whose charts no longer exist
+    known = {str(Path(file_path).with_suffix('.png')) for file_path in gantt_files}
+    manifest = {path: digest for path, digest in manifest.items() if path in known}
+    save_manifest(manifest_path, manifest)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+def print_report(stats):
+    """Print conversion counts and throughput"""
+    seconds = stats["seconds"]
+    rate = stats["converted"] / seconds if seconds > 0 else 0.0
+    print(f"\n📈 GANTT CONVERSION:")
+    print(f"   Found: {stats['found']} | Converted: {stats['converted']} | Up to date: {stats['skipped']} | "
+          f"Failed: {stats['failed']} | No Mermaid: {stats['no_mermaid']}")
+    print(f"   Time: {seconds:.2f}s | Throughput: {rate:.1f} charts/s")
+
+def main():
+    """Convert all changed Gantt chart files to PNG
+
+    Usage: convert_gantt.py [--force] [--workers N]
+    """
+    force = "--force" in sys.argv
+    workers = int(os.getenv("GANTT_WORKERS", DEFAULT_WORKERS))
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    workers = max(1, workers)
+
+    stats = convert_all(workers=workers, force=force)
+    if not stats["found"]:
+        print("❌ No Gantt chart files found in outputs/ directory")
+        return
+    print_report(stats)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -32,6 +32,8 @@ OPENAI_PRESENCE_PENALTY=0.1
 PROJECT_TYPE=AI/ML
 PROJECT_OBJECTIVES=digital transformation
 INDUSTRY=technology
+# Holiday calendar for schedule math (US, UK, CA, NONE)
+WORK_CALENDAR_REGION=US
 
 # Optional: Debug and Logging
 # Set to true for verbose output (increases costs)
@@ -40,15 +42,70 @@ VERBOSE=false
 # Optional: Output Directory
 # Where generated files will be saved
 OUTPUT_DIR=outputs
+# Also bundle each run's artifacts into outputs/archive (gzip, or zstd with the zstandard package)
+# ARTIFACT_ARCHIVE=gzip
+
+# Keep each run as deduplicated section blobs for `diff_runs`
+RUN_STORE=true
+# RUN_STORE_PATH=outputs/.runs
+
+# Most bars in a `roadmap` chart before it zooms out to projects, then programs
+ROADMAP_MAX_BARS=400
 
 # Optional: Cache Settings
 # Enable/disable caching to save API calls
 ENABLE_CACHING=true
 
+# Keep deterministic tool results across runs (always cached within a run)
+TOOL_CACHE_PERSIST=false
+TOOL_CACHE_TTL_HOURS=24
+# TOOL_CACHE_PATH=.cache/tool_cache.db
+
 # Optional: Cost Monitoring
 # Enable/disable cost estimation display
 ENABLE_COST_MONITORING=true
 
+# Optional: Rate Limiting
+# Set to your account's quota; the limiter adapts down on 429 responses
+OPENAI_RPM_LIMIT=500
+OPENAI_TPM_LIMIT=200000
+# Share one quota between parallel batch processes via a lock-protected file
+# RATE_LIMIT_STATE_FILE=.cache/rate_limit_state.json
+
+# Optional: Context Budgeting
+# Token budgets for a whole prompt, the config context added to each task
+# (0 disables; it is re-sent on every agent step), and earlier task outputs
+# chained into the next task
+PROMPT_TOKEN_BUDGET=6000
+TASK_CONTEXT_TOKEN_BUDGET=250
+OUTPUT_CONTEXT_TOKEN_BUDGET=1500
+
+# Optional: Persistent Agent Memory
+# Local SQLite keyword memory shared across runs (no embedding calls),
+# namespaced per project; the entry count, size and age bounds cover the whole file
+AGENT_MEMORY=false
+AGENT_MEMORY_MAX_ENTRIES=500
+AGENT_MEMORY_MAX_MB=5
+AGENT_MEMORY_TTL_DAYS=30
+# AGENT_MEMORY_PATH=.cache/agent_memory.db
+
+# Optional: Deliverable Candidates
+# When the deliverable agent's final answer is missing headings that
+# extract_outputs needs, sample this many candidates and keep the best
+# (1 disables; tool-action turns always use a single completion)
+DELIVERABLE_CANDIDATES=1
+
+# Optional: Evaluation
+# Concurrent iterations for `evaluate` (all share the rate limiter)
+EVAL_WORKERS=4
+
+# Optional: Metrics
+# Prometheus text metrics written at the end of every run (empty disables);
+# point it at node_exporter's textfile collector directory in production
+METRICS_TEXTFILE=.cache/metrics.prom
+# Serve /metrics on localhost while a run is in progress
+# METRICS_PORT=9464
+
 # =============================================================================
 # Next Steps:
 # =============================================================================
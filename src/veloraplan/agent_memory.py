@@ -0,0 +1,253 @@
+"""
+Persistent cross-run agent memory.
+
+A crewAI-compatible storage backend in one local SQLite file with an FTS5
+keyword index, so memory needs no embedding calls. Entries live in
+per-project namespaces; the TTL, the entry cap and the byte cap apply to the
+whole file across namespaces, and the least recently used entries are evicted
+first. Space freed by large evictions is returned to the filesystem.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from veloraplan.knowledge_index import PROJECT_ROOT, tokenize
+
+DEFAULT_MEMORY_PATH = PROJECT_ROOT / ".cache" / "agent_memory.db"
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_TTL_DAYS = 30
+MAX_ENTRY_CHARS = 4000
+MAX_QUERY_TERMS = 32
+# Reclaim free pages once they make up this share of the file (and at least RECLAIM_MIN_PAGES)
+RECLAIM_FREE_RATIO = 0.25
+RECLAIM_MIN_PAGES = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    access_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (namespace, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_memories_lru ON memories (namespace, last_accessed);
+CREATE INDEX IF NOT EXISTS idx_memories_last_accessed ON memories (last_accessed, id);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(content, content='memories', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+def namespace_for(inputs: Dict[str, Any]) -> str:
+    """Derive a stable per-project namespace from crew inputs"""
+    name = inputs.get("project_id") or inputs.get("project_title") or "default"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", str(name)).strip("-").lower() or "default"
+
+class SQLiteMemoryStorage:
+    """crewAI Storage backend (save/search/reset) on SQLite with a keyword index"""
+
+    def __init__(self, namespace: str = "default", db_path: Path = None, max_entries: int = None,
+                 max_bytes: int = None, ttl_days: float = None):
+        self.namespace = namespace
+        self.db_path = Path(db_path or os.getenv("AGENT_MEMORY_PATH", DEFAULT_MEMORY_PATH))
+        self.max_entries = max_entries or int(os.getenv("AGENT_MEMORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.max_bytes = max_bytes or int(float(os.getenv("AGENT_MEMORY_MAX_MB", 0)) * 1024 * 1024) or DEFAULT_MAX_BYTES
+        self.ttl_seconds = (ttl_days if ttl_days is not None else
+                            float(os.getenv("AGENT_MEMORY_TTL_DAYS", DEFAULT_TTL_DAYS))) * 86400
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        # Only takes effect on a new file; older files are compacted with VACUUM instead
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to scoring the (bounded) namespace in Python
+            self.has_fts = False
+        self._conn.commit()
+
+    # --- crewAI Storage interface ---
+    def save(self, value: Any, metadata: Dict[str, Any]) -> None:
+        """Store a memory, refreshing it instead of duplicating identical content"""
+        content = str(value)[:MAX_ENTRY_CHARS]
+        metadata_json = json.dumps(
+            {key: item[:MAX_ENTRY_CHARS] if isinstance(item, str) else item for key, item in (metadata or {}).items()},
+            default=str
+        )
+        content_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO memories (namespace, content_hash, content, metadata, size, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, content_hash) DO UPDATE SET metadata = excluded.metadata, "
+                "last_accessed = excluded.last_accessed",
+                (self.namespace, content_hash, content, metadata_json,
+                 len(content.encode("utf-8")) + len(metadata_json.encode("utf-8")), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+            self._reclaim()
+
+    def search(self, query: str, limit: int = 5, score_threshold: float = 0.6) -> List[Dict[str, Any]]:
+        """Return memories matching the query's keywords, best first.
+
+        Scores are BM25 relative to the best match (1.0), so score_threshold
+        keeps results that are close to the top hit.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+
+        with self._lock:
+            self._expire(time.time())
+            self._conn.commit()
+            rows = self._match_fts(terms, limit) if self.has_fts else self._match_scan(terms, limit)
+            if not rows:
+                return []
+
+            best = rows[0][3] or 1.0
+            results = [
+                {"id": row_id, "content": content, "metadata": json.loads(metadata), "score": round(score / best, 3)}
+                for row_id, content, metadata, score in rows
+                if score / best >= score_threshold
+            ]
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE memories SET last_accessed = ?, access_count = access_count + 1 WHERE id = ?",
+                [(now, result["id"]) for result in results]
+            )
+            self._conn.commit()
+            return results
+
+    def reset(self) -> None:
+        """Delete every memory in this namespace"""
+        with self._lock:
+            self._conn.execute("DELETE FROM memories WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+            self._reclaim()
+
+    # --- Matching ---
+    def _match_fts(self, terms: List[str], limit: int) -> List[tuple]:
+        match = " OR ".join(f'"{term}"' for term in terms)
+        rows = self._conn.execute(
+            "SELECT m.id, m.content, m.metadata, bm25(memories_fts) AS rank FROM memories_fts "
+            "JOIN memories m ON m.id = memories_fts.rowid "
+            "WHERE memories_fts MATCH ? AND m.namespace = ? ORDER BY rank LIMIT ?",
+            (match, self.namespace, limit)
+        ).fetchall()
+        # bm25() is lower-is-better and negative; flip it to a positive score
+        return [(row_id, content, metadata, -rank) for row_id, content, metadata, rank in rows]
+
+    def _match_scan(self, terms: List[str], limit: int) -> List[tuple]:
+        scored = []
+        for row_id, content, metadata in self._conn.execute(
+                "SELECT id, content, metadata FROM memories WHERE namespace = ?", (self.namespace,)):
+            tokens = set(tokenize(content))
+            score = sum(1 for term in terms if term in tokens)
+            if score:
+                scored.append((row_id, content, metadata, float(score)))
+        scored.sort(key=lambda row: row[3], reverse=True)
+        return scored[:limit]
+
+    # --- Eviction ---
+    def _expire(self, now: float):
+        """Drop entries past the TTL in every namespace"""
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM memories WHERE last_accessed < ?", (now - self.ttl_seconds,))
+
+    def _evict(self, now: float):
+        """Apply the TTL, then drop the least recently used entries of any namespace until both caps hold"""
+        self._expire(now)
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memories").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        evict_ids = []
+        for row_id, size in self._conn.execute("SELECT id, size FROM memories ORDER BY last_accessed, id"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict_ids.append((row_id,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM memories WHERE id = ?", evict_ids)
+
+    def _reclaim(self):
+        """Return free pages to the filesystem after large deletions (outside any transaction)"""
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        if free_pages < RECLAIM_MIN_PAGES or free_pages < page_count * RECLAIM_FREE_RATIO:
+            return
+        try:
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                self._conn.execute("PRAGMA incremental_vacuum").fetchall()
+            else:
+                self._conn.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            # e.g. another process is reading; the pages stay free for reuse
+            print(f"⚠️  Agent memory compaction skipped: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get entry count and size for this namespace and for the whole file"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memories WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            all_count, all_total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memories").fetchone()
+        return {
+            "namespace": self.namespace,
+            "entries": count,
+            "bytes": total,
+            "total_entries": all_count,
+            "total_bytes": all_total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_days": self.ttl_seconds / 86400
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def memory_enabled() -> bool:
+    """Whether persistent agent memory is switched on (AGENT_MEMORY=true)"""
+    return os.getenv("AGENT_MEMORY", "false").lower() == "true"
+
+_storages: Dict[str, SQLiteMemoryStorage] = {}
+_storages_lock = threading.Lock()
+
+def get_memory_storage(namespace: str) -> SQLiteMemoryStorage:
+    """Get the shared storage for a project namespace"""
+    with _storages_lock:
+        if namespace not in _storages:
+            _storages[namespace] = SQLiteMemoryStorage(namespace)
+        return _storages[namespace]
+
+def create_short_term_memory(namespace: str) -> Optional[Any]:
+    """Build a crewAI ShortTermMemory on the local storage, or None if memory is off"""
+    if not memory_enabled():
+        return None
+    from crewai.memory.short_term.short_term_memory import ShortTermMemory
+    return ShortTermMemory(storage=get_memory_storage(namespace))
@@ -0,0 +1,176 @@
+"""
+Concurrent, atomic artifact writes.
+
+Every file is written to a temporary file in the target directory and
+renamed into place, so readers never see a partially written artifact.
+ArtifactWriter runs those writes on a small thread pool, keeps the written
+content in memory for later stages, and can bundle a run's artifacts into a
+gzip or zstd compressed tar archive.
+"""
+import io
+import os
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_WORKERS = 4
+ARCHIVE_FORMATS = ("gzip", "zstd")
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it; do it once, before any worker threads exist
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# mkstemp creates 0600 files; new artifacts get the mode a plain open() would give them
+NEW_FILE_MODE = 0o666 & ~_read_umask()
+
+def atomic_write(path: str, content, encoding: str = "utf-8") -> str:
+    """Write text or bytes to path via a temp file and rename; returns path"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    data = content.encode(encoding) if isinstance(content, str) else content
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            mode = os.stat(path).st_mode & 0o7777  # Keep an existing file's permissions
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+def _tar_bytes(files: Dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        now = time.time()
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = now
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def compress_archive(files: Dict[str, bytes], fmt: str) -> Tuple[bytes, str]:
+    """Compress files into a tar archive; returns (data, extension).
+
+    zstd needs the optional zstandard package and falls back to gzip without it.
+    """
+    tar_data = _tar_bytes(files)
+    if fmt == "zstd":
+        try:
+            import zstandard
+            return zstandard.ZstdCompressor(level=10).compress(tar_data), ".tar.zst"
+        except ImportError:
+            print("⚠️  zstandard is not installed; archiving with gzip instead")
+    import gzip
+    return gzip.compress(tar_data, compresslevel=6), ".tar.gz"
+
+class ArtifactWriter:
+    """Writes output artifacts concurrently and atomically"""
+
+    def __init__(self, output_dir: str = "outputs", max_workers: int = None, archive: Optional[str] = None):
+        self.output_dir = output_dir
+        self.archive = (archive if archive is not None else os.getenv("ARTIFACT_ARCHIVE", "")).lower() or None
+        if self.archive and self.archive not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format '{self.archive}'. Use one of: {', '.join(ARCHIVE_FORMATS)}")
+        workers = max_workers or int(os.getenv("ARTIFACT_WRITE_WORKERS", DEFAULT_WORKERS))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="artifact-writer")
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._contents: Dict[str, str] = {}
+        self._closed = False
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.output_dir, name)
+
+    def write(self, name: str, content: str) -> Future:
+        """Queue an atomic write of content to output_dir/name.
+
+        Writes to the same name run in submission order, so the last write wins.
+        """
+        path = self.path_for(name)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ArtifactWriter is closed")
+            previous = self._futures.get(path)
+            self._contents[name] = content
+
+            def task():
+                if previous is not None:
+                    # The earlier write was queued first, so it is running or done
+                    previous.exception()
+                return atomic_write(path, content)
+
+            future = self._executor.submit(task)
+            self._futures[path] = future
+            return future
+
+    def get(self, name: str) -> Optional[str]:
+        """Content last written under name, without reading it back from disk"""
+        return self._contents.get(name)
+
+    def contents(self) -> Dict[str, str]:
+        """Name -> content of everything written so far"""
+        with self._lock:
+            return dict(self._contents)
+
+    def wait(self) -> List[str]:
+        """Wait for queued writes; returns the written paths and raises the first failure"""
+        with self._lock:
+            futures = dict(self._futures)
+        errors = []
+        for path, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                print(f"❌ Could not write {path}: {error}")
+                errors.append(error)
+        if errors:
+            raise errors[0]
+        return list(futures)
+
+    def write_archive(self, timestamp: str = None) -> Optional[str]:
+        """Bundle this run's artifacts into a compressed archive in output_dir/archive"""
+        if not self.archive or not self._contents:
+            return None
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        files = {name: content.encode("utf-8") for name, content in self._contents.items()}
+        data, extension = compress_archive(files, self.archive)
+        path = atomic_write(os.path.join(self.output_dir, "archive", f"artifacts_{timestamp}{extension}"), data)
+        print(f"🗜️  Archived {len(files)} artifacts to: {path}")
+        return path
+
+    def close(self):
+        """Finish all writes, write the archive if enabled, and stop the workers"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self.wait()
+            self.write_archive()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Still let queued writes finish, but keep the original error
+            with self._lock:
+                self._closed = True
+            self._executor.shutdown(wait=True)
+        return False
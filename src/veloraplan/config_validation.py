@@ -0,0 +1,317 @@
+"""
+Pre-flight validation of project config YAML with line and column locations.
+
+The YAML is composed into a node tree in one pass (libyaml when available)
+without building Python objects, and walked against the ProjectConfig
+pydantic schema. Every problem is collected, not just the first, and each one
+points at the YAML line and column it comes from. Cross-checks that the schema
+cannot express are also run: resource allocations must have one entry per
+phase, prioritization scores must equal impact + urgency + complexity, and
+dates, risk ids and risk levels must be consistent. The nodes can then be
+constructed into the config data without parsing the file again.
+
+validate_config and load_validated treat every problem as an error.
+load_with_warnings only fails on what ProjectConfig itself would reject and
+returns the cross-check problems as warnings, so loading a project never
+breaks on a config the models accept.
+"""
+import sys
+import time
+import typing
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+from pydantic import BaseModel
+
+from veloraplan.models import ProjectConfig
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+STR_TAG = "tag:yaml.org,2002:str"
+INT_TAG = "tag:yaml.org,2002:int"
+FLOAT_TAG = "tag:yaml.org,2002:float"
+NULL_TAG = "tag:yaml.org,2002:null"
+BOOL_TAG = "tag:yaml.org,2002:bool"
+RISK_LEVELS = ("Low", "Medium", "High")
+
+class ConfigValidationError(ValueError):
+    """Raised with every problem found in a project config"""
+
+    def __init__(self, errors: List[Dict[str, Any]], path: str = None):
+        self.errors = errors
+        self.path = path
+        super().__init__(f"{len(errors)} problem(s) in {path or 'project config'}:\n" + format_errors(errors, path))
+
+def format_errors(errors: List[Dict[str, Any]], path: str = None) -> str:
+    return "\n".join(f"  {path or '<config>'}:{error['line']}:{error['column']}: {error['path']}: {error['message']}"
+                     for error in errors)
+
+def _error(errors: list, node: Optional[yaml.Node], path: str, message: str):
+    mark = node.start_mark if node is not None else None
+    errors.append({
+        "path": path or "<root>",
+        "line": mark.line + 1 if mark else 0,
+        "column": mark.column + 1 if mark else 0,
+        "message": message
+    })
+
+def _mapping(node: yaml.MappingNode) -> Dict[str, Tuple[yaml.Node, yaml.Node]]:
+    """Key name -> (key node, value node)"""
+    return {str(key.value): (key, value) for key, value in node.value if isinstance(key, yaml.ScalarNode)}
+
+def _unwrap_optional(annotation) -> Tuple[Any, bool]:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return (args[0] if len(args) == 1 else typing.Union[tuple(args)]), True
+    return annotation, False
+
+def _scalar_value(node: yaml.ScalarNode, expected) -> Tuple[Any, Optional[str]]:
+    """Value of a scalar node as the expected type, following pydantic's lax coercion"""
+    text = node.value
+    if expected is str:
+        if node.tag != STR_TAG:
+            return None, f"expected a string, got {text!r} (quote it)"
+        return text, None
+    if expected is bool:
+        if node.tag == BOOL_TAG:
+            return text.lower() in ("true", "yes", "on"), None
+        return None, f"expected true/false, got {text!r}"
+    if expected in (int, float):
+        if node.tag == BOOL_TAG:
+            # pydantic takes true/false as 1/0 for numeric fields
+            value = 1 if text.lower() in ("true", "yes", "on") else 0
+            return (value if expected is int else float(value)), None
+        try:
+            value = float(text.replace("_", ""))
+        except ValueError:
+            return None, f"expected a number, got {text!r}"
+        if expected is int:
+            if value != int(value):
+                return None, f"expected a whole number, got {text!r}"
+            return int(value), None
+        return value, None
+    return text, None
+
+def _check_constraints(value, field, errors: list, node: yaml.Node, path: str):
+    for constraint in getattr(field, "metadata", []) if field is not None else []:
+        for name, check, label in (("ge", lambda v, b: v >= b, ">="), ("le", lambda v, b: v <= b, "<="),
+                                   ("gt", lambda v, b: v > b, ">"), ("lt", lambda v, b: v < b, "<")):
+            bound = getattr(constraint, name, None)
+            if bound is not None and not check(value, bound):
+                _error(errors, node, path, f"must be {label} {bound}, got {value}")
+
+def _check_node(node: yaml.Node, annotation, errors: list, path: str, field=None) -> Any:
+    """Check node against a type annotation; returns the scalar value (or None) for cross-checks"""
+    annotation, optional = _unwrap_optional(annotation)
+    if isinstance(node, yaml.ScalarNode) and node.tag == NULL_TAG:
+        if not optional:
+            _error(errors, node, path, "value is required (got null)")
+        return None
+
+    origin = typing.get_origin(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if not isinstance(node, yaml.MappingNode):
+            _error(errors, node, path, f"expected a mapping for {annotation.__name__}")
+            return None
+        _check_model(node, annotation, errors, path)
+        return None
+    if origin in (list, List):
+        if not isinstance(node, yaml.SequenceNode):
+            _error(errors, node, path, "expected a list")
+            return None
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        return [_check_node(item, item_type, errors, f"{path}[{index}]") for index, item in enumerate(node.value)]
+    if origin in (dict, Dict):
+        if not isinstance(node, yaml.MappingNode):
+            _error(errors, node, path, "expected a mapping")
+        return None
+    if annotation is Any:
+        return None
+
+    if not isinstance(node, yaml.ScalarNode):
+        _error(errors, node, path, f"expected a {getattr(annotation, '__name__', annotation)}, got a "
+                                   f"{'list' if isinstance(node, yaml.SequenceNode) else 'mapping'}")
+        return None
+    value, problem = _scalar_value(node, annotation)
+    if problem:
+        _error(errors, node, path, problem)
+        return None
+    _check_constraints(value, field, errors, node, path)
+    return value
+
+def _check_model(node: yaml.MappingNode, model: typing.Type[BaseModel], errors: list, path: str):
+    entries = _mapping(node)
+    for name, field in model.model_fields.items():
+        field_path = f"{path}.{name}" if path else name
+        if name not in entries:
+            if field.is_required():
+                _error(errors, node, field_path, "required field is missing")
+            continue
+        _check_node(entries[name][1], field.annotation, errors, field_path, field)
+
+def _value(entries: Dict[str, Tuple[yaml.Node, yaml.Node]], name: str):
+    entry = entries.get(name)
+    return entry[1] if entry else None
+
+def _cross_check(root: yaml.MappingNode, errors: list):
+    """Consistency checks between sections"""
+    sections = _mapping(root)
+
+    charter = _value(sections, "project_charter")
+    if isinstance(charter, yaml.MappingNode):
+        fields = _mapping(charter)
+        dates = {}
+        for name in ("start_date", "end_date"):
+            node = _value(fields, name)
+            if isinstance(node, yaml.ScalarNode) and node.tag in (STR_TAG, "tag:yaml.org,2002:timestamp"):
+                try:
+                    dates[name] = datetime.strptime(node.value, "%Y-%m-%d").date()
+                except ValueError:
+                    _error(errors, node, f"project_charter.{name}", f"expected a YYYY-MM-DD date, got {node.value!r}")
+        if len(dates) == 2 and dates["end_date"] < dates["start_date"]:
+            _error(errors, _value(fields, "end_date"), "project_charter.end_date", "end_date is before start_date")
+
+    phases = _value(sections, "project_phases")
+    phase_count = len(phases.value) if isinstance(phases, yaml.SequenceNode) else None
+
+    resources = _value(sections, "resource_allocation")
+    if phase_count is not None and isinstance(resources, yaml.SequenceNode):
+        for index, item in enumerate(resources.value):
+            allocation = _value(_mapping(item), "allocation") if isinstance(item, yaml.MappingNode) else None
+            if isinstance(allocation, yaml.SequenceNode) and len(allocation.value) != phase_count:
+                _error(errors, allocation, f"resource_allocation[{index}].allocation",
+                       f"has {len(allocation.value)} entries but there are {phase_count} phases")
+
+    items = _value(sections, "prioritization_analysis")
+    if isinstance(items, yaml.SequenceNode):
+        for index, item in enumerate(items.value):
+            if not isinstance(item, yaml.MappingNode):
+                continue
+            fields = _mapping(item)
+            values = {}
+            for name in ("impact", "urgency", "complexity", "score"):
+                node = _value(fields, name)
+                if isinstance(node, yaml.ScalarNode) and node.tag == INT_TAG:
+                    values[name] = int(node.value)
+            if len(values) == 4 and values["score"] != values["impact"] + values["urgency"] + values["complexity"]:
+                _error(errors, _value(fields, "score"), f"prioritization_analysis[{index}].score",
+                       f"score {values['score']} != impact + urgency + complexity "
+                       f"({values['impact'] + values['urgency'] + values['complexity']})")
+
+    risks = _value(sections, "risks")
+    if isinstance(risks, yaml.SequenceNode):
+        seen = {}
+        for index, item in enumerate(risks.value):
+            if not isinstance(item, yaml.MappingNode):
+                continue
+            fields = _mapping(item)
+            risk_id = _value(fields, "id")
+            if isinstance(risk_id, yaml.ScalarNode):
+                if risk_id.value in seen:
+                    _error(errors, risk_id, f"risks[{index}].id",
+                           f"duplicate risk id {risk_id.value!r} (first at line {seen[risk_id.value]})")
+                else:
+                    seen[risk_id.value] = risk_id.start_mark.line + 1
+            for name in ("likelihood", "impact"):
+                node = _value(fields, name)
+                if isinstance(node, yaml.ScalarNode) and node.tag == STR_TAG and node.value not in RISK_LEVELS:
+                    _error(errors, node, f"risks[{index}].{name}",
+                           f"expected one of {', '.join(RISK_LEVELS)}, got {node.value!r}")
+
+def compose(text: str) -> Tuple[Optional[yaml.Node], Any]:
+    """Compose text into a node tree; returns (root node, loader able to construct it)"""
+    loader = Loader(text)
+    try:
+        return loader.get_single_node(), loader
+    except Exception:
+        loader.dispose()
+        raise
+
+def _in_file_order(errors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(errors, key=lambda error: (error["line"], error["column"]))
+
+def schema_errors(root: Optional[yaml.Node]) -> List[Dict[str, Any]]:
+    """Errors for anything the ProjectConfig schema rejects, in file order"""
+    errors: List[Dict[str, Any]] = []
+    if root is None or not isinstance(root, yaml.MappingNode):
+        _error(errors, root, "<root>", "project config must be a mapping")
+        return errors
+    _check_model(root, ProjectConfig, errors, "")
+    return _in_file_order(errors)
+
+def cross_check_errors(root: Optional[yaml.Node]) -> List[Dict[str, Any]]:
+    """Consistency problems between sections that the schema accepts, in file order"""
+    errors: List[Dict[str, Any]] = []
+    if isinstance(root, yaml.MappingNode):
+        _cross_check(root, errors)
+    return _in_file_order(errors)
+
+def validate_node(root: Optional[yaml.Node]) -> List[Dict[str, Any]]:
+    """All schema and cross-check errors for a composed config, in file order"""
+    return _in_file_order(schema_errors(root) + cross_check_errors(root))
+
+def validate_text(text: str) -> List[Dict[str, Any]]:
+    """Validate YAML text; YAML syntax errors are reported with their location too"""
+    try:
+        root, loader = compose(text)
+        loader.dispose()
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        return [{"path": "<yaml>", "line": mark.line + 1 if mark else 0, "column": mark.column + 1 if mark else 0,
+                 "message": f"{e.context + ' ' if e.context else ''}{e.problem}"}]
+    return validate_node(root)
+
+def _load(path: str, strict: bool) -> Tuple[dict, List[Dict[str, Any]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        root, loader = compose(text)
+    except yaml.MarkedYAMLError:
+        raise ConfigValidationError(validate_text(text), path)
+    try:
+        errors = schema_errors(root)
+        warnings = cross_check_errors(root) if not errors else []
+        if strict:
+            errors, warnings = _in_file_order(errors + warnings), []
+        if errors:
+            raise ConfigValidationError(errors, path)
+        return loader.construct_document(root), warnings
+    finally:
+        loader.dispose()
+
+def load_validated(path: str) -> dict:
+    """Parse, validate and construct a config file in a single pass; raises ConfigValidationError"""
+    return _load(path, strict=True)[0]
+
+def load_with_warnings(path: str) -> Tuple[dict, List[Dict[str, Any]]]:
+    """Parse and construct a config file, raising ConfigValidationError only on schema errors
+
+    Returns (data, warnings), where warnings are the cross-check problems.
+    """
+    return _load(path, strict=False)
+
+def main():
+    """Validate project config files without calling any LLM
+
+    Usage: validate_config [path ...]
+    """
+    from veloraplan.project_loader import DEFAULT_CONFIG_PATH
+
+    paths = sys.argv[1:] or [str(DEFAULT_CONFIG_PATH)]
+    failed = False
+    for path in paths:
+        started = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            errors = validate_text(f.read())
+        elapsed = (time.perf_counter() - started) * 1000
+        if errors:
+            failed = True
+            print(f"❌ {path}: {len(errors)} problem(s) ({elapsed:.1f} ms)")
+            print(format_errors(errors, path))
+        else:
+            print(f"✅ {path} is valid ({elapsed:.1f} ms)")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
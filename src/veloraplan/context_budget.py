@@ -0,0 +1,315 @@
+"""
+Prompt compaction and context budgeting.
+
+Measures prompts with a local tokenizer (tiktoken when its encoding is
+available offline, otherwise a 4-characters-per-token estimate), selects only
+the ProjectConfig sections each task needs, and compacts earlier task outputs
+so every LLM call stays within a configurable token budget.
+
+The baseline task prompt carried only the project title and budget. Config
+sections and knowledge snippets are added on top of that, so the report counts
+them as tokens added rather than as savings against a full config render that
+was never sent. They are capped small: a task description is re-sent on every
+ReAct step, but so is everything before it, and one Project Configuration Tool
+round trip to look up the phases costs more than the context it replaces.
+"""
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from veloraplan.models import ProjectConfig
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 6000
+DEFAULT_TASK_CONTEXT_TOKEN_BUDGET = 250
+DEFAULT_OUTPUT_CONTEXT_TOKEN_BUDGET = 1500
+DEFAULT_KNOWLEDGE_TOKEN_BUDGET = 300
+DEFAULT_KNOWLEDGE_TOP_K = 2
+
+TRUNCATION_MARKER = "\n…[truncated]"
+
+# ProjectConfig sections each task needs up front, most important first; the rest
+# (charter, prioritization, ...) stay one Project Configuration Tool call away
+TASK_CONFIG_SECTIONS = {
+    "project_planning_task": ["phases", "risks"],
+    "technical_estimation_task": ["phases", "resources"],
+    "deliverable_generation_task": ["phases", "resources", "financials"]
+}
+
+# Keywords that mark the sections of earlier outputs each task relies on
+TASK_CONTEXT_KEYWORDS = {
+    "technical_estimation_task": ["scope", "task", "phase", "resource", "timeline", "milestone", "risk"],
+    "deliverable_generation_task": ["charter", "scope", "objective", "timeline", "phase", "resource",
+                                    "priorit", "risk", "governance", "success", "estimate"]
+}
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+def _get_encoder():
+    """Load the tiktoken encoding once; None if tiktoken or its data is unavailable"""
+    global _encoder, _encoder_loaded
+    with _encoder_lock:
+        if not _encoder_loaded:
+            _encoder_loaded = True
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding(os.getenv("TIKTOKEN_ENCODING", "o200k_base"))
+            except Exception:
+                _encoder = None
+        return _encoder
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with the local tokenizer"""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Hard-truncate text to at most max_tokens, marking the cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoder = _get_encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:budget]) + TRUNCATION_MARKER
+    return text[:budget * 4] + TRUNCATION_MARKER
+
+def _compact_json(text: str) -> Optional[str]:
+    """Re-serialize a JSON document (optionally fenced) without whitespace"""
+    candidate = text.strip()
+    fence = re.match(r"^```(?:json)?\s*(.*?)\s*```$", candidate, re.DOTALL)
+    if fence:
+        candidate = fence.group(1)
+    if not candidate.startswith(("{", "[")):
+        return None
+    try:
+        return json.dumps(json.loads(candidate), separators=(",", ":"), ensure_ascii=False)
+    except ValueError:
+        return None
+
+def _split_blocks(text: str) -> List[str]:
+    """Split markdown into blocks that each start at a heading"""
+    blocks = re.split(r"(?m)^(?=#{1,6} )", text)
+    return [block for block in blocks if block.strip()]
+
+def _summarize_block(block: str, max_lines: int = 2) -> str:
+    """Keep a block's heading and its first few non-empty lines"""
+    lines = [line for line in block.splitlines() if line.strip()]
+    return "\n".join(lines[:max_lines + 1])
+
+def compact_text(text: str, max_tokens: int, keywords: List[str] = None) -> str:
+    """Fit text into max_tokens, keeping relevant sections and summarising the rest"""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    compacted_json = _compact_json(text)
+    if compacted_json is not None:
+        return truncate_to_tokens(compacted_json, max_tokens)
+
+    blocks = _split_blocks(text)
+    if len(blocks) > 1:
+        keywords = [keyword.lower() for keyword in (keywords or [])]
+        compacted = []
+        for block in blocks:
+            heading = block.splitlines()[0].lower()
+            relevant = not keywords or any(keyword in heading for keyword in keywords)
+            compacted.append(block.strip() if relevant else _summarize_block(block))
+        text = "\n\n".join(compacted)
+        if count_tokens(text) > max_tokens:
+            text = "\n\n".join(_summarize_block(block, max_lines=4) for block in blocks)
+
+    return truncate_to_tokens(text, max_tokens)
+
+# --- ProjectConfig section renderers ---
+def _render_charter(config: ProjectConfig) -> str:
+    charter = config.project_charter
+    lines = [
+        f"Charter: {charter.title} | Sponsor: {charter.sponsor} | Manager: {charter.manager}",
+        f"Dates: {charter.start_date} to {charter.end_date} | Budget: ${charter.budget:,.0f}",
+        f"Need: {charter.business_need}",
+        "Goals: " + "; ".join(charter.goals),
+        "In scope: " + "; ".join(charter.scope.includes),
+        "Out of scope: " + "; ".join(charter.scope.excludes)
+    ]
+    return "\n".join(lines)
+
+def _render_phases(config: ProjectConfig) -> str:
+    lines = ["Phases:"]
+    for phase in config.project_phases:
+        lines.append(f"- {phase.name} ({phase.duration_days}d): {', '.join(phase.deliverables)}")
+    return "\n".join(lines)
+
+def _render_risks(config: ProjectConfig) -> str:
+    lines = ["Risks:"]
+    for risk in config.risks:
+        lines.append(f"- {risk.id} [{risk.likelihood}/{risk.impact}] {risk.description} -> {risk.mitigation}")
+    return "\n".join(lines)
+
+def _render_prioritization(config: ProjectConfig) -> str:
+    lines = ["Prioritization (impact/urgency/complexity=score):"]
+    for item in config.prioritization_analysis:
+        lines.append(f"- {item.item}: {item.impact}/{item.urgency}/{item.complexity}={item.score}")
+    return "\n".join(lines)
+
+def _render_resources(config: ProjectConfig) -> str:
+    lines = ["Resources (FTE per phase):"]
+    for resource in config.resource_allocation:
+        lines.append(f"- {resource.role}: {','.join(str(fte) for fte in resource.allocation)}")
+    return "\n".join(lines)
+
+def _render_financials(config: ProjectConfig) -> str:
+    lines = ["Financials (planned):"]
+    for line in config.financials:
+        lines.append(f"- {line.category}: ${line.planned:,.0f}")
+    return "\n".join(lines)
+
+SECTION_RENDERERS: Dict[str, Callable[[ProjectConfig], str]] = {
+    "charter": _render_charter,
+    "phases": _render_phases,
+    "risks": _render_risks,
+    "prioritization": _render_prioritization,
+    "resources": _render_resources,
+    "financials": _render_financials
+}
+
+class ContextBudgeter:
+    """Keeps task prompts within token budgets and tracks the tokens saved"""
+
+    def __init__(self, prompt_budget: int = None, task_context_budget: int = None,
+                 output_context_budget: int = None, knowledge_budget: int = None):
+        self.prompt_budget = prompt_budget or int(os.getenv("PROMPT_TOKEN_BUDGET", DEFAULT_PROMPT_TOKEN_BUDGET))
+        self.task_context_budget = task_context_budget if task_context_budget is not None else int(
+            os.getenv("TASK_CONTEXT_TOKEN_BUDGET", DEFAULT_TASK_CONTEXT_TOKEN_BUDGET))
+        self.output_context_budget = output_context_budget or int(
+            os.getenv("OUTPUT_CONTEXT_TOKEN_BUDGET", DEFAULT_OUTPUT_CONTEXT_TOKEN_BUDGET))
+        self.knowledge_budget = knowledge_budget if knowledge_budget is not None else int(
+            os.getenv("KNOWLEDGE_TOKEN_BUDGET", DEFAULT_KNOWLEDGE_TOKEN_BUDGET))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear the savings counters for a new run"""
+        with self._lock:
+            self.items = 0
+            self.compacted_items = 0
+            self.tokens_before = 0
+            self.tokens_after = 0
+            self.tokens_added = 0
+
+    def _record_added(self, tokens: int):
+        """Count context added on top of what the baseline prompt sent"""
+        with self._lock:
+            self.tokens_added += tokens
+
+    def _record(self, before: int, after: int):
+        with self._lock:
+            self.items += 1
+            self.tokens_before += before
+            self.tokens_after += after
+            if after < before:
+                self.compacted_items += 1
+
+    def build_task_context(self, config: ProjectConfig, task_name: str) -> str:
+        """Render the ProjectConfig sections a task needs within the task context budget"""
+        sections = TASK_CONFIG_SECTIONS.get(task_name, ["phases"])
+        remaining = self.task_context_budget
+        parts = []
+
+        for section in sections:
+            if remaining <= 0:
+                break
+            rendered = SECTION_RENDERERS[section](config)
+            tokens = count_tokens(rendered)
+            if tokens > remaining:
+                rendered = truncate_to_tokens(rendered, remaining)
+                tokens = count_tokens(rendered)
+            parts.append(rendered)
+            remaining -= tokens
+
+        context = "\n".join(parts)
+        self._record_added(count_tokens(context))
+        return context
+
+    def build_knowledge_context(self, query: str, k: int = DEFAULT_KNOWLEDGE_TOP_K) -> str:
+        """Top-k knowledge snippets for a query, truncated to the knowledge budget"""
+        if self.knowledge_budget <= 0:
+            return ""
+        try:
+            from veloraplan.knowledge_index import get_knowledge_index
+            snippets = get_knowledge_index().format_snippets(query, k=k)
+        except Exception as e:
+            print(f"⚠️  Knowledge retrieval unavailable: {e}")
+            return ""
+        if not snippets:
+            return ""
+        fitted = truncate_to_tokens(snippets, self.knowledge_budget)
+        self._record_added(count_tokens(fitted))
+        return fitted
+
+    def compact_context(self, context: str, task_name: str = None) -> str:
+        """Compact earlier task outputs passed as context to the next task"""
+        if not context:
+            return context
+        before = count_tokens(context)
+        compacted = compact_text(context, self.output_context_budget, TASK_CONTEXT_KEYWORDS.get(task_name))
+        self._record(before, count_tokens(compacted))
+        return compacted
+
+    def fit_messages(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Compact the largest message bodies until the prompt fits the prompt budget"""
+        total = sum(count_tokens(str(message.get("content", ""))) for message in messages)
+        if total <= self.prompt_budget:
+            return messages
+
+        before = total
+        fitted = [dict(message) for message in messages]
+        # Never touch the system prompt or the latest message
+        candidates = [i for i, message in enumerate(fitted[:-1]) if message.get("role") != "system"]
+        for i in sorted(candidates, key=lambda i: -len(str(fitted[i].get("content", "")))):
+            if total <= self.prompt_budget:
+                break
+            content = str(fitted[i].get("content", ""))
+            tokens = count_tokens(content)
+            target = max(100, tokens - (total - self.prompt_budget))
+            fitted[i]["content"] = compact_text(content, target)
+            total += count_tokens(fitted[i]["content"]) - tokens
+
+        self._record(before, total)
+        return fitted
+
+    def get_report(self) -> dict:
+        """Get the tokens saved by compaction and added as task context during this run
+
+        tokens_before/tokens_after cover content that would have been sent
+        either way (chained outputs, oversized messages); tokens_added is the
+        config and knowledge context on top of the baseline prompt.
+        """
+        saved = self.tokens_before - self.tokens_after
+        return {
+            "items": self.items,
+            "compacted_items": self.compacted_items,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": saved,
+            "percent_saved": round(100 * saved / self.tokens_before, 1) if self.tokens_before else 0.0,
+            "tokens_added": self.tokens_added,
+            "net_tokens_saved": saved - self.tokens_added
+        }
+
+    def print_report(self):
+        """Print the tokens saved by budgeting during this run"""
+        report = self.get_report()
+        print(f"\n✂️  CONTEXT BUDGET:")
+        print(f"   Prompt budget: {self.prompt_budget:,} tokens | Compacted: {report['compacted_items']}/{report['items']}")
+        print(f"   Tokens: {report['tokens_before']:,} -> {report['tokens_after']:,} "
+              f"(saved {report['tokens_saved']:,}, {report['percent_saved']}%)")
+        print(f"   Task context added: {report['tokens_added']:,} tokens | Net saved: {report['net_tokens_saved']:,}")
+
+# Global context budgeter instance
+context_budgeter = ContextBudgeter()
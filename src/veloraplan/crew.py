@@ -1,17 +1,35 @@
 # Custom tools for CrewAI project pipeline
 from crewai.tools import BaseTool
-from typing import Type, List
+from typing import Type, List, Dict, Optional, Any, ClassVar
 from pydantic import BaseModel, Field
+import hashlib
 import json
 import yaml
 from pathlib import Path
-from crewai import Crew, Agent, Task, Process
+from crewai import Crew, Agent, Task, Process, LLM
+from crewai.events.types.llm_events import LLMCallType
+from crewai.utilities.exceptions.context_window_exceeding_exception import LLMContextLengthExceededError
+import litellm
+from litellm.exceptions import ContextWindowExceededError
 from langchain_openai import ChatOpenAI
+import httpx
 import os
+import threading
 
 # Import the new project configuration system
-from veloraplan.project_loader import ProjectLoader, create_project_loader
+from veloraplan.project_loader import ProjectLoader, create_project_loader, DEFAULT_CONFIG_PATH
 from veloraplan.models import ProjectConfig
+from veloraplan.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from veloraplan.context_budget import ContextBudgeter, context_budgeter
+from veloraplan.tables import render_table
+from veloraplan.knowledge_index import get_knowledge_index
+from veloraplan.agent_memory import create_short_term_memory, namespace_for
+from veloraplan.work_calendar import get_calendar
+from veloraplan.intake_scoring import score_intake
+from veloraplan.metrics import CACHE_REQUESTS, CANDIDATES
+from veloraplan.extract_outputs import validate_output
+from veloraplan.tool_cache import PARALLEL_TOOL_NAME, CachedTool, run_tool_calls
+from veloraplan.prompt_templates import AGENT_FIELDS, TASK_FIELDS, TemplateSet
 
 # Load environment variables from .env file if it exists
 try:
@@ -71,13 +89,26 @@ cost_estimator = CostEstimator()
 # --- Tool 1: Project Configuration Tool ---
 class ProjectConfigInput(BaseModel):
     config_path: str = Field(default=None, description="Path to project configuration file")
+    sections: Optional[List[str]] = Field(
+        default=None,
+        description="Sections to return (project_charter, phases, risks, prioritization, resources, financials); all if omitted"
+    )
 
-class ProjectConfigTool(BaseTool):
+class ProjectConfigTool(CachedTool):
     name: str = "Project Configuration Tool"
     description: str = "Loads and provides access to comprehensive project configuration including charter, phases, risks, and resources."
     args_schema: Type[BaseModel] = ProjectConfigInput
+    persistent_cache: ClassVar[bool] = True
+
+    def cache_version(self, arguments: dict) -> str:
+        # Cached results are only valid for the config file as it is now
+        try:
+            stat = os.stat(arguments.get("config_path") or DEFAULT_CONFIG_PATH)
+            return f"{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            return ""
 
-    def _run(self, config_path: str = None) -> str:
+    def _run(self, config_path: str = None, sections: Optional[List[str]] = None) -> str:
         try:
             loader = create_project_loader(config_path)
             config = loader.config
@@ -96,14 +127,18 @@ class ProjectConfigTool(BaseTool):
                         "excludes": config.project_charter.scope.excludes
                     }
                 },
-                "phases": [{"name": p.name, "duration_days": p.duration_days, "deliverables": p.deliverables} for p in config.project_phases],
+                "phases": [{"name": p.name, "duration_days": p.duration_days, "deliverables": loader.get_deliverables_by_phase(p.name)} for p in config.project_phases],
                 "risks": [{"id": r.id, "description": r.description, "likelihood": r.likelihood, "impact": r.impact, "mitigation": r.mitigation} for r in config.risks],
                 "prioritization": [{"item": p.item, "score": p.score} for p in config.prioritization_analysis],
                 "resources": [{"role": r.role, "allocation": r.allocation} for r in config.resource_allocation],
                 "financials": [{"category": f.category, "planned": f.planned} for f in config.financials]
             }
             
-            return json.dumps(project_info, indent=2)
+            if sections:
+                project_info = {key: value for key, value in project_info.items() if key in sections}
+            
+            # Compact separators keep the tool result small in the next prompt
+            return json.dumps(project_info, separators=(",", ":"))
         except Exception as e:
             return f"Error loading project configuration: {str(e)}"
 
@@ -112,56 +147,52 @@ class ScoringInput(BaseModel):
     score: int = Field(..., description="Total score from intake scoring")
     criticality_multiplier: float = Field(..., description="Business criticality multiplier")
 
-class ScoringCalculatorTool(BaseTool):
+class ScoringCalculatorTool(CachedTool):
     name: str = "Scoring Calculator Tool"
     description: str = (
-        "Calculates weighted score and assigns a priority tier (P1–P4) based on business rules."
+        "Calculates weighted score and assigns a priority tier (P1–P4) and T-shirt size (XS–2XL) based on business rules."
     )
     args_schema: Type[BaseModel] = ScoringInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, score: int, criticality_multiplier: float) -> str:
-        weighted_score = score * criticality_multiplier
-        if weighted_score >= 18:
-            priority = "P1"
-        elif weighted_score >= 12:
-            priority = "P2"
-        elif weighted_score >= 6:
-            priority = "P3"
-        else:
-            priority = "P4"
-        return json.dumps({
-            "weighted_score": weighted_score,
-            "priority": priority
-        })
+        return json.dumps(score_intake(score, criticality_multiplier))
 
 # --- Tool 3: Enhanced Mermaid Gantt Generator Tool ---
 class GanttInput(BaseModel):
     phases: List[dict] = Field(..., description="List of project phases with duration and deliverables")
+    start_date: str = Field("2025-07-01", description="Project start date (YYYY-MM-DD)")
+    region: Optional[str] = Field(None, description="Holiday calendar region (US, UK, CA, NONE)")
 
-class MermaidGanttGeneratorTool(BaseTool):
+class MermaidGanttGeneratorTool(CachedTool):
     name: str = "Mermaid Gantt Generator Tool"
     description: str = "Generates Mermaid-compatible Gantt chart syntax from project phases and deliverables."
     args_schema: Type[BaseModel] = GanttInput
+    persistent_cache: ClassVar[bool] = True
+
+    def cache_version(self, arguments: dict) -> str:
+        # The default holiday calendar comes from the environment
+        return "" if arguments.get("region") else os.getenv("WORK_CALENDAR_REGION", "")
 
-    def _run(self, phases: List[dict]) -> str:
+    def _run(self, phases: List[dict], start_date: str = "2025-07-01", region: Optional[str] = None) -> str:
         lines = ["gantt", "    title Project Timeline", "    dateFormat  YYYY-MM-DD"]
         
-        current_date = "2025-07-01"  # Start date from config
+        # Phases run back to back; duration_days are working days on the region's calendar
+        schedule = get_calendar(region).schedule(start_date, [phase.get("duration_days", 7) for phase in phases])
         day_offset = 0
         
-        for phase in phases:
+        for phase, (phase_start, phase_end) in zip(phases, schedule):
             phase_name = phase.get("name", "Unknown Phase")
-            duration_days = phase.get("duration_days", 7)
             deliverables = phase.get("deliverables", [])
+            calendar_days = (phase_end - phase_start).days + 1
             
             # Add phase section
-            clean_phase_name = phase_name.replace(" ", "_").replace("-", "_")
             lines.append(f"    section {phase_name}")
             
             # Add deliverables within the phase
             for deliverable in deliverables:
                 clean_deliverable = deliverable.replace(" ", "_").replace("-", "_")
-                lines.append(f"    {clean_deliverable} :done, des{day_offset}, {current_date}, {duration_days}d")
+                lines.append(f"    {clean_deliverable} :done, des{day_offset}, {phase_start.isoformat()}, {calendar_days}d")
                 day_offset += 1
         
         return "\n".join(lines)
@@ -170,10 +201,11 @@ class MermaidGanttGeneratorTool(BaseTool):
 class CharterInput(BaseModel):
     project_config: dict = Field(..., description="Complete project configuration")
 
-class CharterFormatterTool(BaseTool):
+class CharterFormatterTool(CachedTool):
     name: str = "Charter Formatter Tool"
     description: str = "Generates a comprehensive project charter using the project configuration."
     args_schema: Type[BaseModel] = CharterInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, project_config: dict) -> str:
         charter = project_config.get("project_charter", {})
@@ -221,10 +253,11 @@ class CharterFormatterTool(BaseTool):
 class ResourceAllocationInput(BaseModel):
     resource_config: List[dict] = Field(..., description="Resource allocation configuration")
 
-class ResourceAllocationFormatterTool(BaseTool):
+class ResourceAllocationFormatterTool(CachedTool):
     name: str = "Resource Allocation Formatter Tool"
     description: str = "Formats resource allocation configuration into a readable table."
     args_schema: Type[BaseModel] = ResourceAllocationInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, resource_config: List[dict]) -> str:
         if not resource_config:
@@ -233,57 +266,55 @@ class ResourceAllocationFormatterTool(BaseTool):
         # Create phase headers
         phases = [f"Week {i+1}" for i in range(max(len(r.get('allocation', [])) for r in resource_config))]
         
-        resource_table = "## Resource Allocation Plan\n\n"
-        resource_table += "| Role | " + " | ".join(phases) + " |\n"
-        resource_table += "|------|" + "|".join(["-----" for _ in phases]) + "|\n"
-        
-        for resource in resource_config:
-            role = resource.get('role', 'Unknown')
-            allocation = resource.get('allocation', [])
-            row = f"| {role} |"
-            for i, phase in enumerate(phases):
-                fte = allocation[i] if i < len(allocation) else 0
-                row += f" {fte} FTE |"
-            resource_table += row + "\n"
+        def rows():
+            for resource in resource_config:
+                allocation = resource.get('allocation', [])
+                yield [resource.get('role', 'Unknown')] + [
+                    f"{allocation[i] if i < len(allocation) else 0} FTE" for i in range(len(phases))
+                ]
         
-        return resource_table
+        return render_table(["Role"] + phases, rows(), title="## Resource Allocation Plan")
 
 # --- Tool 6: Enhanced Risk Assessment Tool ---
 class RiskAssessmentInput(BaseModel):
     risk_config: List[dict] = Field(..., description="Risk configuration from project config")
 
-class RiskAssessmentTool(BaseTool):
+class RiskAssessmentTool(CachedTool):
     name: str = "Risk Assessment Tool"
     description: str = "Formats risk assessment configuration into a comprehensive risk register."
     args_schema: Type[BaseModel] = RiskAssessmentInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, risk_config: List[dict]) -> str:
         if not risk_config:
             return "No risk assessment data available."
         
-        risk_table = "## Risk Assessment and Mitigation Plan\n\n"
-        risk_table += "| Risk ID | Description | Likelihood | Impact | Mitigation Strategy |\n"
-        risk_table += "|---------|-------------|------------|--------|-------------------|\n"
-        
-        for risk in risk_config:
-            risk_id = risk.get('id', 'Unknown')
-            description = risk.get('description', 'No description')
-            likelihood = risk.get('likelihood', 'Unknown')
-            impact = risk.get('impact', 'Unknown')
-            mitigation = risk.get('mitigation', 'No mitigation strategy')
-            
-            risk_table += f"| {risk_id} | {description} | {likelihood} | {impact} | {mitigation} |\n"
+        rows = (
+            (
+                risk.get('id', 'Unknown'),
+                risk.get('description', 'No description'),
+                risk.get('likelihood', 'Unknown'),
+                risk.get('impact', 'Unknown'),
+                risk.get('mitigation', 'No mitigation strategy')
+            )
+            for risk in risk_config
+        )
         
-        return risk_table
+        return render_table(
+            ["Risk ID", "Description", "Likelihood", "Impact", "Mitigation Strategy"],
+            rows,
+            title="## Risk Assessment and Mitigation Plan"
+        )
 
 # --- Tool 7: Enhanced Prioritization Analysis Tool ---
 class PrioritizationInput(BaseModel):
     prioritization_config: List[dict] = Field(..., description="Prioritization configuration from project config")
 
-class PrioritizationAnalysisTool(BaseTool):
+class PrioritizationAnalysisTool(CachedTool):
     name: str = "Prioritization Analysis Tool"
     description: str = "Formats prioritization configuration into a comprehensive analysis."
     args_schema: Type[BaseModel] = PrioritizationInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, prioritization_config: List[dict]) -> str:
         if not prioritization_config:
@@ -292,65 +323,65 @@ class PrioritizationAnalysisTool(BaseTool):
         # Sort by score descending
         sorted_items = sorted(prioritization_config, key=lambda x: x.get('score', 0), reverse=True)
         
-        prioritization_table = "## Prioritization Analysis\n\n"
-        prioritization_table += "| Item | Impact | Urgency | Complexity | Score |\n"
-        prioritization_table += "|------|--------|---------|------------|-------|\n"
-        
-        for item in sorted_items:
-            item_name = item.get('item', 'Unknown')
-            impact = item.get('impact', 0)
-            urgency = item.get('urgency', 0)
-            complexity = item.get('complexity', 0)
-            score = item.get('score', 0)
-            
-            prioritization_table += f"| {item_name} | {impact} | {urgency} | {complexity} | {score} |\n"
+        rows = (
+            (
+                item.get('item', 'Unknown'),
+                item.get('impact', 0),
+                item.get('urgency', 0),
+                item.get('complexity', 0),
+                item.get('score', 0)
+            )
+            for item in sorted_items
+        )
         
-        return prioritization_table
+        return render_table(
+            ["Item", "Impact", "Urgency", "Complexity", "Score"],
+            rows,
+            title="## Prioritization Analysis"
+        )
 
 # --- Tool 8: Enhanced Financial Tracking Tool ---
 class FinancialInput(BaseModel):
     financial_config: List[dict] = Field(..., description="Financial configuration from project config")
 
-class FinancialTrackingTool(BaseTool):
+class FinancialTrackingTool(CachedTool):
     name: str = "Financial Tracking Tool"
     description: str = "Formats financial configuration into a comprehensive budget tracking table."
     args_schema: Type[BaseModel] = FinancialInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, financial_config: List[dict]) -> str:
         if not financial_config:
             return "No financial data available."
         
-        financial_table = "## Financial Summary\n\n"
-        financial_table += "| Category | Planned | Actual | Variance |\n"
-        financial_table += "|----------|---------|--------|----------|\n"
-        
-        total_planned = 0
-        total_actual = 0
-        
-        for financial in financial_config:
-            category = financial.get('category', 'Unknown')
-            planned = financial.get('planned', 0)
-            actual = financial.get('actual', 0)
-            variance = financial.get('variance', actual - planned)
+        def rows():
+            total_planned = 0
+            total_actual = 0
             
-            total_planned += planned
-            total_actual += actual
+            for financial in financial_config:
+                planned = financial.get('planned', 0)
+                actual = financial.get('actual', 0)
+                variance = financial.get('variance', actual - planned)
+                
+                total_planned += planned
+                total_actual += actual
+                
+                yield (financial.get('category', 'Unknown'), f"${planned:,.0f}", f"${actual:,.0f}", f"${variance:,.0f}")
             
-            financial_table += f"| {category} | ${planned:,.0f} | ${actual:,.0f} | ${variance:,.0f} |\n"
-        
-        financial_table += f"| **Total** | **${total_planned:,.0f}** | **${total_actual:,.0f}** | **${total_actual - total_planned:,.0f}** |\n"
+            yield ("**Total**", f"**${total_planned:,.0f}**", f"**${total_actual:,.0f}**", f"**${total_actual - total_planned:,.0f}**")
         
-        return financial_table
+        return render_table(["Category", "Planned", "Actual", "Variance"], rows(), title="## Financial Summary")
 
 # --- Tool 9: Enhanced Work Effort Estimator Tool ---
 class WorkEffortInput(BaseModel):
     task_description: str = Field(..., description="A detailed description of the task")
     phase_context: str = Field(..., description="The phase context for the task")
 
-class WorkEffortEstimatorTool(BaseTool):
+class WorkEffortEstimatorTool(CachedTool):
     name: str = "Work Effort Estimator Tool"
     description: str = "Estimates the work effort (in hours) required for a described task within a specific phase."
     args_schema: Type[BaseModel] = WorkEffortInput
+    persistent_cache: ClassVar[bool] = True
 
     def _run(self, task_description: str, phase_context: str) -> str:
         # Enhanced effort estimation based on task type, complexity, and phase
@@ -394,9 +425,421 @@ class WorkEffortEstimatorTool(BaseTool):
             "complexity_level": "High" if complexity_multiplier > 1.5 else "Medium" if complexity_multiplier > 0.8 else "Low"
         })
 
+# --- Tool 10: Knowledge Search Tool ---
+class KnowledgeSearchInput(BaseModel):
+    query: str = Field(..., description="What to look up in the knowledge base and past outputs")
+    top_k: int = Field(default=3, description="Number of snippets to return")
+
+class KnowledgeSearchTool(BaseTool):
+    name: str = "Knowledge Search Tool"
+    description: str = "Searches the local knowledge base and past project outputs and returns the most relevant snippets."
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+
+    def _run(self, query: str, top_k: int = 3) -> str:
+        try:
+            snippets = get_knowledge_index().format_snippets(query, k=top_k)
+            return snippets or "No relevant knowledge found."
+        except Exception as e:
+            return f"Error searching knowledge base: {str(e)}"
+
+# --- Tool 11: Parallel Tool Runner ---
+class ToolCall(BaseModel):
+    tool: str = Field(..., description="Name of the tool to call, e.g. 'Risk Assessment Tool'")
+    arguments: Dict[str, Any] = Field(default_factory=dict, description="Arguments for that tool")
+
+class ParallelToolRunnerInput(BaseModel):
+    calls: List[ToolCall] = Field(..., description="Independent tool calls to run together")
+
+class ParallelToolRunnerTool(BaseTool):
+    name: str = PARALLEL_TOOL_NAME
+    description: str = (
+        "Runs several independent tool calls at once and returns all their results in order. "
+        "Use it instead of calling tools one after another when no call needs another's result."
+    )
+    args_schema: Type[BaseModel] = ParallelToolRunnerInput
+    tools: Dict[str, Any] = Field(default_factory=dict, exclude=True)
+
+    def _run(self, calls: List[Any]) -> str:
+        by_name = {**self.tools, **{tool.name: tool for tool in self.tools.values()}}
+        parsed = [call if isinstance(call, ToolCall) else ToolCall(**call) for call in calls]
+        results = run_tool_calls(by_name, [(call.tool, call.arguments) for call in parsed])
+        return "\n\n".join(f"### {call.tool}\n{result}" for call, result in zip(parsed, results))
+
+# --- Rate Limited LLM ---
+class RateLimitedLLM(LLM):
+    """crewAI LLM whose calls go through the shared adaptive rate limiter.
+
+    With a prompt_cache (an object with get_or_call(key, fn)) and temperature 0,
+    identical prompts are answered once and replayed from the cache. A trace
+    (an object with llm_call(key, messages, fn), see workload_trace) sees
+    every call and may record or answer it.
+    """
+
+    def __init__(self, *args, rate_limiter: AdaptiveRateLimiter = None, prompt_cache=None, trace=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.prompt_cache = prompt_cache
+        self.trace = trace
+
+    def _estimate_prompt_tokens(self, messages) -> int:
+        """Rough prompt token estimate (about 4 characters per token)"""
+        if isinstance(messages, str):
+            return len(messages) // 4
+        return sum(len(str(message.get("content", ""))) for message in messages) // 4
+
+    def _cache_key(self, messages) -> str:
+        payload = [self.model, self.n, self.max_tokens, self.stop, messages]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def call(self, messages, *args, **kwargs):
+        if isinstance(messages, list):
+            messages = context_budgeter.fit_messages(messages)
+        if self.trace is not None:
+            return self.trace.llm_call(self._cache_key(messages), messages,
+                                       lambda: self._cached_call(messages, *args, **kwargs))
+        return self._cached_call(messages, *args, **kwargs)
+
+    def _cached_call(self, messages, *args, **kwargs):
+        if self.prompt_cache is not None and not self.temperature and not self.stream:
+            return self.prompt_cache.get_or_call(self._cache_key(messages),
+                                                 lambda: self._rate_limited_call(messages, *args, **kwargs))
+        return self._rate_limited_call(messages, *args, **kwargs)
+
+    def _rate_limited_call(self, messages, *args, **kwargs):
+        prompt_tokens = self._estimate_prompt_tokens(messages)
+        return self.rate_limiter.call(
+            super().call,
+            messages,
+            *args,
+            estimated_tokens=prompt_tokens + (self.max_tokens or 0) * (self.n or 1),
+            token_counter=lambda result: prompt_tokens + len(str(result)) // 4,
+            **kwargs
+        )
+
+FINAL_ANSWER = "Final Answer:"
+DEFAULT_DELIVERABLE_CANDIDATES = 1
+
+def select_candidate(texts: List[str]) -> int:
+    """Index of the best of several completions for the same prompt.
+
+    Final answers that pass extract_outputs.validate_output win (first one
+    first). Otherwise a tool action is preferred over an incomplete final
+    answer so the agent can keep working, and with only incomplete final
+    answers the one with the fewest problems is kept.
+    """
+    problems = {}
+    for index, text in enumerate(texts):
+        if FINAL_ANSWER in text:
+            problems[index] = validate_output(text.split(FINAL_ANSWER, 1)[1])
+            CANDIDATES.inc(result="invalid" if problems[index] else "valid")
+            if not problems[index]:
+                return index
+    actions = [index for index in range(len(texts)) if index not in problems]
+    if actions:
+        return actions[0]
+    return min(problems, key=lambda index: len(problems[index]))
+
+class CandidateLLM(RateLimitedLLM):
+    """Rate-limited LLM that resamples incomplete final answers and keeps the best.
+
+    Every ReAct step first gets a single completion. Tool actions and complete
+    final answers are returned as they are; only a final answer that fails
+    extract_outputs.validate_output triggers one more request for n - 1
+    candidates. Checking those locally is far cheaper than re-running the crew
+    when the deliverable is incomplete. Streaming and native tool calls always
+    use a single completion.
+    """
+
+    def _completion(self, params, callbacks) -> List[str]:
+        try:
+            response = litellm.completion(**params)
+        except ContextWindowExceededError as e:
+            raise LLMContextLengthExceededError(str(e)) from e
+        # Report usage so crew token metrics include every candidate
+        usage = getattr(response, "usage", None)
+        for callback in callbacks or []:
+            if usage and hasattr(callback, "log_success_event"):
+                callback.log_success_event(kwargs=params, response_obj={"usage": usage}, start_time=0, end_time=0)
+        return [choice.message.content or "" for choice in response.choices]
+
+    def _handle_non_streaming_response(self, params, callbacks=None, available_functions=None,
+                                       from_task=None, from_agent=None):
+        if (self.n or 1) <= 1 or params.get("tools"):
+            return super()._handle_non_streaming_response(params, callbacks, available_functions,
+                                                          from_task, from_agent)
+        texts = self._completion({**params, "n": None}, callbacks)
+        if FINAL_ANSWER in texts[0] and validate_output(texts[0].split(FINAL_ANSWER, 1)[1]):
+            texts += self._completion({**params, "n": self.n - 1}, callbacks)
+        best = select_candidate(texts)
+        if len(texts) > 1:
+            print(f"🧪 Kept candidate {best + 1} of {len(texts)} for {getattr(from_task, 'name', None) or 'task'}")
+
+        self._handle_emit_call_events(response=texts[best], call_type=LLMCallType.LLM_CALL, from_task=from_task,
+                                      from_agent=from_agent, messages=params["messages"])
+        return texts[best]
+
+# --- Budgeted Crew ---
+class BudgetedCrew(Crew):
+    """Crew that compacts earlier task outputs before chaining them into the next task"""
+
+    def _get_context(self, task: Task, task_outputs: list) -> str:
+        context = super()._get_context(task, task_outputs)
+        return context_budgeter.compact_context(context, task_name=task.name)
+
+# --- Crew Factory ---
+# Tool names shared by each agent; tool instances are stateless and reused across runs
+AGENT_TOOLS = {
+    "project_planner_agent": ["project_config", "knowledge_search", "scoring_calculator", "work_effort_estimator",
+                              "parallel_tool_runner"],
+    "estimation_agent": ["project_config", "knowledge_search", "scoring_calculator", "work_effort_estimator",
+                         "parallel_tool_runner"],
+    "deliverable_agent": [
+        "project_config",
+        "knowledge_search",
+        "charter_formatter",
+        "mermaid_gantt_generator",
+        "resource_allocation_formatter",
+        "risk_assessment",
+        "prioritization_analysis",
+        "financial_tracking",
+        "parallel_tool_runner"
+    ]
+}
+
+# Candidates sampled for incomplete final answers, validated locally (DELIVERABLE_CANDIDATES, opt-in)
+AGENT_CANDIDATES = {
+    "deliverable_agent": int(os.getenv("DELIVERABLE_CANDIDATES", DEFAULT_DELIVERABLE_CANDIDATES))
+}
+
+TOOL_CLASSES = {
+    "project_config": ProjectConfigTool,
+    "knowledge_search": KnowledgeSearchTool,
+    "scoring_calculator": ScoringCalculatorTool,
+    "work_effort_estimator": WorkEffortEstimatorTool,
+    "charter_formatter": CharterFormatterTool,
+    "mermaid_gantt_generator": MermaidGanttGeneratorTool,
+    "resource_allocation_formatter": ResourceAllocationFormatterTool,
+    "risk_assessment": RiskAssessmentTool,
+    "prioritization_analysis": PrioritizationAnalysisTool,
+    "financial_tracking": FinancialTrackingTool
+}
+
+class CrewFactory:
+    """Builds crews from prompt templates parsed once, shared tools and a pooled LLM client.
+
+    Everything that does not depend on the project (YAML templates, tool
+    instances, the HTTP connection pool and LLM clients) is created on first
+    use and reused for every later crew in the same process. Agents are cached
+    per set of prompt inputs; tasks are rebuilt per crew because they carry
+    the outputs of a run.
+    """
+
+    def __init__(self, budgeter: ContextBudgeter = None):
+        self.budgeter = budgeter or context_budgeter
+        self._lock = threading.RLock()
+        self._yaml_cache: Dict[str, dict] = {}
+        self._templates: Dict[str, TemplateSet] = {}
+        self._tools: Optional[Dict[str, BaseTool]] = None
+        self._http_client = None
+        self._llms: Dict[tuple, Any] = {}
+        self._agents: Dict[tuple, dict] = {}
+
+    def load_yaml(self, filename: str) -> dict:
+        """Load a YAML file from the package config directory, parsing it only once"""
+        with self._lock:
+            if filename not in self._yaml_cache:
+                config_path = Path(__file__).parent / "config" / filename
+                with open(config_path, 'r', encoding='utf-8') as file:
+                    self._yaml_cache[filename] = yaml.safe_load(file)
+            return self._yaml_cache[filename]
+
+    def load_templates(self, filename: str) -> TemplateSet:
+        """Compile the prompt templates of agents.yaml or tasks.yaml once, validating their placeholders"""
+        with self._lock:
+            if filename not in self._templates:
+                fields = AGENT_FIELDS if filename == "agents.yaml" else TASK_FIELDS
+                self._templates[filename] = TemplateSet(self.load_yaml(filename), fields, source=f"{filename}: ")
+            return self._templates[filename]
+
+    def get_tools(self) -> Dict[str, BaseTool]:
+        """Get the shared tool instances keyed by tool name"""
+        with self._lock:
+            if self._tools is None:
+                self._tools = {name: tool_class() for name, tool_class in TOOL_CLASSES.items()}
+                self._tools["parallel_tool_runner"] = ParallelToolRunnerTool(tools=dict(self._tools))
+            return self._tools
+
+    def get_http_client(self) -> httpx.Client:
+        """Get the pooled HTTP client shared by all LLM clients.
+
+        It is also installed as litellm.client_session, which the OpenAI
+        clients litellm builds for the agents' LLM calls pick up.
+        """
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                    timeout=httpx.Timeout(120.0, connect=10.0)
+                )
+                litellm.client_session = self._http_client
+            return self._http_client
+
+    def get_llm(self, model: str = None) -> ChatOpenAI:
+        """Get the cost-optimized LLM client for a model, creating it once"""
+        model = model or os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
+        key = (model,)
+        with self._lock:
+            if key not in self._llms:
+                self._llms[key] = ChatOpenAI(
+                    model=model,
+                    temperature=0.1,  # Low temperature for consistent, focused output
+                    max_tokens=800,   # Reduced from 1000 to save costs
+                    top_p=0.9,
+                    frequency_penalty=0.1,
+                    presence_penalty=0.1,
+                    http_client=self.get_http_client()
+                )
+            return self._llms[key]
+
+    def get_agent_llm(self, model: str = None, stream: bool = False, candidates: int = 1,
+                      temperature: float = None, prompt_cache=None, trace=None) -> LLM:
+        """Get the rate-limited, cost-optimized LLM shared by all agents.
+
+        With candidates > 1 (and no streaming or temperature 0) an incomplete final
+        answer is resampled up to that many times and the best one kept, see CandidateLLM. temperature
+        overrides the default, and prompt_cache and trace are passed to RateLimitedLLM.
+        """
+        model = model or os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
+        # Identical completions are pointless at temperature 0
+        candidates = 1 if stream or temperature == 0 else max(1, candidates)
+        if temperature is None:
+            temperature = 0.1 if candidates == 1 else 0.4  # Some variety between candidates
+        key = ("agent", model, stream, candidates, temperature, id(prompt_cache) if prompt_cache else None,
+               id(trace) if trace else None)
+        self.get_http_client()
+        with self._lock:
+            if key not in self._llms:
+                llm_class = CandidateLLM if candidates > 1 else RateLimitedLLM
+                self._llms[key] = llm_class(
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=800,
+                    top_p=0.9,
+                    frequency_penalty=0.1,
+                    presence_penalty=0.1,
+                    n=candidates if candidates > 1 else None,
+                    stream=stream,
+                    num_retries=0,  # Retries are handled by the rate limiter
+                    prompt_cache=prompt_cache,
+                    trace=trace
+                )
+            return self._llms[key]
+
+    def create_agents(self, inputs: dict, stream: bool = False, fresh: bool = False, **llm_options) -> dict:
+        """Create agents for the given inputs, reusing agents built for the same inputs.
+
+        fresh=True builds new, uncached agents (for crews that run concurrently,
+        since agents hold per-run state); llm_options go to get_agent_llm.
+        """
+        templates = self.load_templates("agents.yaml")
+        # Agents only differ by the inputs their prompts use
+        key = (templates.cache_key(inputs), stream)
+        with self._lock:
+            if not fresh:
+                if key in self._agents:
+                    CACHE_REQUESTS.inc(cache="agents", result="hit")
+                    return self._agents[key]
+                CACHE_REQUESTS.inc(cache="agents", result="miss")
+
+            tools = self.get_tools()
+            agents = {}
+
+            for agent_name, agent_config in templates.items():
+                # Customize agent with project-specific information
+                agents[agent_name] = Agent(
+                    role=templates.render(agent_name, "role", inputs),
+                    goal=templates.render(agent_name, "goal", inputs),
+                    backstory=templates.render(agent_name, "backstory", inputs),
+                    allow_delegation=agent_config.get("allow_delegation", False),
+                    verbose=agent_config.get("verbose", False),
+                    tools=[tools[name] for name in AGENT_TOOLS.get(agent_name, [])],
+                    llm=self.get_agent_llm(stream=stream, candidates=AGENT_CANDIDATES.get(agent_name, 1),
+                                           **llm_options)
+                )
+
+            if not fresh:
+                self._agents[key] = agents
+            return agents
+
+    def create_tasks(self, agents: dict, inputs: dict, config: Optional[ProjectConfig] = None) -> List[Task]:
+        """Create fresh tasks bound to the given agents and project inputs"""
+        templates = self.load_templates("tasks.yaml")
+        tasks = []
+
+        for task_name, task_config in templates.items():
+            # Customize task with project-specific information
+            description = templates.render(task_name, "description", inputs)
+            expected_output = templates.render(task_name, "expected_output", inputs)
+            agent = agents[task_config["agent"]]
+
+            # Add minimal project context plus the config sections this task needs, within budget
+            if config:
+                description += f"\n\nProject: {config.project_charter.title} | Budget: ${config.project_charter.budget:,.0f}"
+                task_context = self.budgeter.build_task_context(config, task_name)
+                if task_context:
+                    description += "\n" + task_context
+            
+            # Ground the task with the few most relevant local knowledge snippets
+            snippets = self.budgeter.build_knowledge_context(description)
+            if snippets:
+                description += "\n\nRelevant knowledge:\n" + snippets
+
+            tasks.append(Task(
+                name=task_name,
+                description=description,
+                expected_output=expected_output,
+                agent=agent
+            ))
+
+        return tasks
+
+    def build(self, inputs: dict, config: Optional[ProjectConfig] = None, stream: bool = False,
+              fresh: bool = False, **llm_options) -> Crew:
+        """Build a crew for one project, rebinding only the per-project inputs"""
+        agents = self.create_agents(inputs, stream=stream, fresh=fresh or bool(llm_options), **llm_options)
+        tasks = self.create_tasks(agents, inputs, config)
+
+        # Create crew with COST OPTIMIZATION
+        return BudgetedCrew(
+            agents=list(agents.values()),
+            tasks=tasks,
+            verbose=False,  # Disable verbose to reduce token usage
+            memory=False,   # Default crewAI memory needs embedding and evaluator LLM calls
+            short_term_memory=create_short_term_memory(namespace_for(inputs)),  # Local, opt-in via AGENT_MEMORY
+            max_rpm=None,   # Throughput is controlled by the adaptive rate limiter
+            max_iter=2,     # Reduced from 3 to limit iterations
+            process=Process.sequential  # No manager LLM: only hierarchical crews call it
+        )
+
+    def close(self):
+        """Close the pooled HTTP client"""
+        with self._lock:
+            if self._http_client is not None:
+                if litellm.client_session is self._http_client:
+                    litellm.client_session = None
+                    # litellm caches OpenAI clients built on the closed pool
+                    litellm.in_memory_llm_clients_cache.flush_cache()
+                self._http_client.close()
+                self._http_client = None
+            self._llms = {}
+
+# Global crew factory instance
+crew_factory = CrewFactory()
+
 class Veloraplan:
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, factory: CrewFactory = None):
         self.config_path = config_path
+        self.factory = factory or crew_factory
         self.project_loader = None
         self.config = None
         
@@ -411,89 +854,18 @@ class Veloraplan:
 
     def _load_yaml(self, filename: str) -> dict:
         """Load YAML configuration file"""
-        config_path = Path(__file__).parent / "config" / filename
-        with open(config_path, 'r', encoding='utf-8') as file:
-            return yaml.safe_load(file)
+        return self.factory.load_yaml(filename)
 
     def _create_agents(self, inputs: dict) -> dict:
         """Create agents using project configuration"""
-        agents_config = self._load_yaml("agents.yaml")
-        agents = {}
-        
-        # Get project context for agent customization
-        project_title = inputs.get("project_title", "Project")
-        project_type = inputs.get("type", "Transformation")
-        
-        for agent_name, agent_config in agents_config.items():
-            # Customize agent with project-specific information
-            role = agent_config["role"].format(project_type=project_type)
-            goal = agent_config["goal"].format(project_type=project_type)
-            backstory = agent_config["backstory"].format(project_type=project_type)
-            
-            # Add project-specific tools
-            tools = []
-            if agent_name == "project_planner_agent":
-                tools = [
-                    ProjectConfigTool(),
-                    ScoringCalculatorTool(),
-                    WorkEffortEstimatorTool()
-                ]
-            elif agent_name == "estimation_agent":
-                tools = [
-                    ProjectConfigTool(),
-                    ScoringCalculatorTool(),
-                    WorkEffortEstimatorTool()
-                ]
-            elif agent_name == "deliverable_agent":
-                tools = [
-                    ProjectConfigTool(),
-                    CharterFormatterTool(),
-                    MermaidGanttGeneratorTool(),
-                    ResourceAllocationFormatterTool(),
-                    RiskAssessmentTool(),
-                    PrioritizationAnalysisTool(),
-                    FinancialTrackingTool()
-                ]
-            
-            agents[agent_name] = Agent(
-                role=role,
-                goal=goal,
-                backstory=backstory,
-                allow_delegation=agent_config.get("allow_delegation", False),
-                verbose=agent_config.get("verbose", False),
-                tools=tools
-            )
-        
-        return agents
+        return self.factory.create_agents(inputs)
 
     def _create_tasks(self, agents: dict, inputs: dict) -> List[Task]:
         """Create tasks using project configuration"""
-        tasks_config = self._load_yaml("tasks.yaml")
-        tasks = []
-        
-        # Get project context
-        project_title = inputs.get("project_title", "Project")
-        
-        for task_name, task_config in tasks_config.items():
-            # Customize task with project-specific information
-            description = task_config["description"].format(project_type=inputs.get("type", "Transformation"))
-            expected_output = task_config["expected_output"]
-            agent = agents[task_config["agent"]]
-            
-            # Add minimal project context to task
-            if self.config:
-                description += f"\n\nProject: {self.config.project_charter.title} | Budget: ${self.config.project_charter.budget:,.0f}"
-            
-            tasks.append(Task(
-                description=description,
-                expected_output=expected_output,
-                agent=agent
-            ))
-        
-        return tasks
+        return self.factory.create_tasks(agents, inputs, self.config)
 
-    def crew(self) -> Crew:
-        """Create and return the crew with project configuration"""
+    def crew(self, stream: bool = False, trace=None) -> Crew:
+        """Create and return the crew with project configuration; trace records its LLM calls"""
         # Get inputs from project configuration
         if self.project_loader:
             inputs = self.project_loader.get_crew_inputs()
@@ -514,32 +886,7 @@ class Veloraplan:
                 "total_score": 25
             }
         
-        agents = self._create_agents(inputs)
-        tasks = self._create_tasks(agents, inputs)
-        
-        # Create crew with COST OPTIMIZATION
-        model = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
-        
-        # Cost-optimized LLM configuration
-        llm = ChatOpenAI(
-            model=model,
-            temperature=0.1,  # Low temperature for consistent, focused output
-            max_tokens=800,   # Reduced from 1000 to save costs
-            top_p=0.9,
-            frequency_penalty=0.1,
-            presence_penalty=0.1
-        )
-        
-        return Crew(
-            agents=list(agents.values()),
-            tasks=tasks,
-            verbose=False,  # Disable verbose to reduce token usage
-            memory=False,   # Disable memory to save costs
-            max_rpm=5,      # Reduced from 10 to limit API calls
-            max_iter=2,     # Reduced from 3 to limit iterations
-            process=Process.sequential,
-            manager_llm=llm
-        )
+        return self.factory.build(inputs, self.config, stream=stream, **({"trace": trace} if trace else {}))
 
     def get_cost_estimate(self) -> dict:
         """Get current cost estimate"""
@@ -0,0 +1,319 @@
+"""
+Compact struct-of-arrays store for large deliverable sets.
+
+Keeps one row per deliverable in typed arrays: interned phase, status and
+owner ids, date ordinals, and dependency lists encoded as (start, length)
+slices into one flat index array, plus a sparse reverse map from each row to
+the rows that depend on it so removals only touch those rows. Default notes are derived from the phase
+instead of being stored; only other notes, including an explicit None, are.
+Pydantic Deliverable objects are only built at the I/O boundary (lookups,
+export), so a row costs little more than its name.
+"""
+import sys
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from veloraplan.models import Deliverable, ProjectConfig
+
+DELIVERABLE_STATUSES = ["Not Started", "In Progress", "Completed", "Delayed"]
+
+NO_ID = -1
+DEFAULT_NOTES = object()  # add() sentinel: use the phase's default notes
+
+class _Interner:
+    """Maps repeated strings to small integer ids"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for value in values:
+            self.id_for(value)
+
+    def id_for(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_ID
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            value = sys.intern(value)
+            self.values.append(value)
+            self.ids[value] = value_id
+        return value_id
+
+    def value_for(self, value_id: int) -> Optional[str]:
+        return None if value_id == NO_ID else self.values[value_id]
+
+def _date_to_ordinal(value: Optional[str]) -> int:
+    return 0 if not value else date.fromisoformat(value).toordinal()
+
+def _ordinal_to_date(ordinal: int) -> Optional[str]:
+    return None if ordinal == 0 else date.fromordinal(ordinal).isoformat()
+
+class DeliverableStore:
+    """Columnar deliverable storage with the same lookup API as Dict[str, Deliverable]"""
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._phases = _Interner()
+        self._statuses = _Interner(DELIVERABLE_STATUSES)
+        self._owners = _Interner()
+        self._phase_ids = array("i")
+        self._status_ids = array("h")
+        self._owner_ids = array("i")
+        self._due_dates = array("i")
+        self._dep_start = array("I")
+        self._dep_len = array("I")
+        self._dep_flat = array("I")
+        self._dependents: Dict[int, Set[int]] = {}  # Row -> rows listing it as a dependency
+        self._notes: Dict[int, Optional[str]] = {}  # Only notes that differ from the default, None included
+
+    # --- Construction ---
+    @classmethod
+    def from_config(cls, config: ProjectConfig) -> "DeliverableStore":
+        """Build the store from project phases, as ProjectLoader.initialize_deliverables does"""
+        store = cls()
+        for phase in config.project_phases:
+            for deliverable_name in phase.deliverables:
+                store.add(deliverable_name, phase.name)
+        return store
+
+    @classmethod
+    def from_deliverables(cls, deliverables: Dict[str, Deliverable]) -> "DeliverableStore":
+        """Build the store from validated Deliverable models"""
+        store = cls()
+        for deliverable in deliverables.values():
+            store.add(
+                deliverable.name,
+                deliverable.phase,
+                status=deliverable.status,
+                due_date=deliverable.due_date,
+                owner=deliverable.owner,
+                notes=deliverable.notes
+            )
+        for deliverable in deliverables.values():
+            if deliverable.dependencies:
+                store.set_dependencies(deliverable.name, deliverable.dependencies)
+        return store
+
+    @staticmethod
+    def default_notes(phase: str) -> str:
+        return f"Deliverable from {phase} phase"
+
+    def add(self, name: str, phase: str, status: str = "Not Started", due_date: str = None,
+            owner: str = None, notes: Optional[str] = DEFAULT_NOTES) -> int:
+        """Add or replace a deliverable row; returns its row index
+
+        Without notes the row gets the phase's default notes; notes=None is
+        stored as no notes.
+        """
+        row = self._index.get(name)
+        if row is None:
+            row = len(self._names)
+            name = sys.intern(name)
+            self._names.append(name)
+            self._index[name] = row
+            self._phase_ids.append(self._phases.id_for(phase))
+            self._status_ids.append(self._statuses.id_for(status))
+            self._owner_ids.append(self._owners.id_for(owner))
+            self._due_dates.append(_date_to_ordinal(due_date))
+            self._dep_start.append(0)
+            self._dep_len.append(0)
+        else:
+            self._phase_ids[row] = self._phases.id_for(phase)
+            self._status_ids[row] = self._statuses.id_for(status)
+            self._owner_ids[row] = self._owners.id_for(owner)
+            self._due_dates[row] = _date_to_ordinal(due_date)
+
+        if notes is not DEFAULT_NOTES and notes != self.default_notes(phase):
+            self._notes[row] = notes
+        else:
+            self._notes.pop(row, None)
+        return row
+
+    # --- Mutation ---
+    def _row(self, name: str) -> int:
+        row = self._index.get(name)
+        if row is None:
+            raise KeyError(name)
+        return row
+
+    def set_status(self, name: str, status: str):
+        self._status_ids[self._row(name)] = self._statuses.id_for(status)
+
+    def set_owner(self, name: str, owner: Optional[str]):
+        self._owner_ids[self._row(name)] = self._owners.id_for(owner)
+
+    def set_due_date(self, name: str, due_date: Optional[str]):
+        self._due_dates[self._row(name)] = _date_to_ordinal(due_date)
+
+    def _dependency_rows(self, row: int) -> array:
+        start = self._dep_start[row]
+        return self._dep_flat[start:start + self._dep_len[row]]
+
+    def _unlink(self, dependency: int, dependent: int):
+        dependents = self._dependents.get(dependency)
+        if dependents is not None:
+            dependents.discard(dependent)
+            if not dependents:
+                del self._dependents[dependency]
+
+    def set_dependencies(self, name: str, dependencies: List[str]):
+        """Replace a deliverable's dependencies; all of them must already exist"""
+        row = self._row(name)
+        dependency_rows = [self._row(dependency) for dependency in dependencies]
+        for dependency in self._dependency_rows(row):
+            self._unlink(dependency, row)
+        for dependency in dependency_rows:
+            self._dependents.setdefault(dependency, set()).add(row)
+        if len(dependency_rows) <= self._dep_len[row]:
+            # Reuse the existing slice in place
+            start = self._dep_start[row]
+            self._dep_flat[start:start + len(dependency_rows)] = array("I", dependency_rows)
+        else:
+            self._dep_start[row] = len(self._dep_flat)
+            self._dep_flat.extend(dependency_rows)
+        self._dep_len[row] = len(dependency_rows)
+
+    def compact(self):
+        """Rewrite the flat dependency array, dropping slices orphaned by updates"""
+        flat = array("I")
+        for row in range(len(self._names)):
+            start, length = self._dep_start[row], self._dep_len[row]
+            self._dep_start[row] = len(flat)
+            flat.extend(self._dep_flat[start:start + length])
+        self._dep_flat = flat
+
+    def remove(self, name: str):
+        """Remove a deliverable row; other deliverables drop it from their dependencies
+
+        The last row is moved into the freed slot, so row order is not preserved.
+        """
+        row = self._row(name)
+        last = len(self._names) - 1
+        # Only slices that reference the removed or the moved row change; each is
+        # rewritten in place (never longer), and compact() reclaims freed tails
+        for other in self._dependents.pop(row, ()):
+            kept = [dependency for dependency in self._dependency_rows(other) if dependency != row]
+            start = self._dep_start[other]
+            self._dep_flat[start:start + len(kept)] = array("I", kept)
+            self._dep_len[other] = len(kept)
+        for dependency in self._dependency_rows(row):
+            self._unlink(dependency, row)
+        if row != last:
+            dependents = self._dependents.pop(last, set())
+            for other in dependents:
+                start = self._dep_start[other]
+                for i in range(start, start + self._dep_len[other]):
+                    if self._dep_flat[i] == last:
+                        self._dep_flat[i] = row
+            if dependents:
+                self._dependents[row] = {row if other == last else other for other in dependents}
+            for dependency in set(self._dependency_rows(last)) - {last}:
+                dependents = self._dependents[dependency]
+                dependents.discard(last)
+                dependents.add(row)
+
+        del self._index[name]
+        self._notes.pop(row, None)
+        if row != last:
+            moved = self._names[last]
+            self._names[row] = moved
+            self._index[moved] = row
+            for column in (self._phase_ids, self._status_ids, self._owner_ids, self._due_dates,
+                           self._dep_start, self._dep_len):
+                column[row] = column[last]
+            if last in self._notes:
+                self._notes[row] = self._notes.pop(last)
+        self._names.pop()
+        for column in (self._phase_ids, self._status_ids, self._owner_ids, self._due_dates,
+                       self._dep_start, self._dep_len):
+            column.pop()
+
+    # --- Column access ---
+    def phase_of(self, name: str) -> str:
+        return self._phases.values[self._phase_ids[self._row(name)]]
+
+    def status_of(self, name: str) -> str:
+        return self._statuses.values[self._status_ids[self._row(name)]]
+
+    def owner_of(self, name: str) -> Optional[str]:
+        return self._owners.value_for(self._owner_ids[self._row(name)])
+
+    def dependencies_of(self, name: str) -> List[str]:
+        row = self._row(name)
+        start = self._dep_start[row]
+        return [self._names[i] for i in self._dep_flat[start:start + self._dep_len[row]]]
+
+    def names_by_phase(self, phase: str) -> List[str]:
+        phase_id = self._phases.ids.get(phase)
+        if phase_id is None:
+            return []
+        return [self._names[row] for row, value in enumerate(self._phase_ids) if value == phase_id]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = [0] * len(self._statuses.values)
+        for status_id in self._status_ids:
+            counts[status_id] += 1
+        return dict(zip(self._statuses.values, counts))
+
+    def iter_index_fields(self) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+        """Yield (name, phase, status, owner) per row without building models"""
+        phases, statuses = self._phases.values, self._statuses.values
+        for row, name in enumerate(self._names):
+            yield (name, phases[self._phase_ids[row]], statuses[self._status_ids[row]],
+                   self._owners.value_for(self._owner_ids[row]))
+
+    # --- Materialization (I/O boundary) ---
+    def _materialize(self, row: int) -> Deliverable:
+        phase = self._phases.values[self._phase_ids[row]]
+        start = self._dep_start[row]
+        return Deliverable(
+            name=self._names[row],
+            phase=phase,
+            status=self._statuses.values[self._status_ids[row]],
+            due_date=_ordinal_to_date(self._due_dates[row]),
+            owner=self._owners.value_for(self._owner_ids[row]),
+            dependencies=[self._names[i] for i in self._dep_flat[start:start + self._dep_len[row]]],
+            notes=self._notes.get(row, self.default_notes(phase))
+        )
+
+    def to_deliverables(self) -> Dict[str, Deliverable]:
+        """Export every row as a validated Deliverable model"""
+        return {name: self._materialize(row) for row, name in enumerate(self._names)}
+
+    # --- Mapping API ---
+    def __getitem__(self, name: str) -> Deliverable:
+        return self._materialize(self._row(name))
+
+    def __setitem__(self, name: str, deliverable: Deliverable):
+        # Check dependencies before adding the row so an unknown one leaves the store unchanged
+        for dependency in deliverable.dependencies:
+            if dependency != name:
+                self._row(dependency)
+        self.add(name, deliverable.phase, deliverable.status, deliverable.due_date,
+                 deliverable.owner, deliverable.notes)
+        self.set_dependencies(name, deliverable.dependencies)
+
+    def get(self, name: str, default=None) -> Optional[Deliverable]:
+        row = self._index.get(name)
+        return default if row is None else self._materialize(row)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def keys(self) -> List[str]:
+        return list(self._names)
+
+    def values(self) -> Iterator[Deliverable]:
+        return (self._materialize(row) for row in range(len(self._names)))
+
+    def items(self) -> Iterator[Tuple[str, Deliverable]]:
+        return ((name, self._materialize(row)) for row, name in enumerate(self._names))
@@ -0,0 +1,232 @@
+"""
+Concurrent evaluation harness.
+
+Runs N iterations of the crew on a thread pool under the shared adaptive rate
+limiter. The project config is loaded once, each iteration gets its own
+agents, and at temperature 0 identical prompts are sent once and replayed
+from a PromptCache for every other iteration. Per-iteration latency, tokens
+and quality scores are collected into a single markdown + JSON report.
+
+Quality is scored locally from the checks in extract_outputs.validate_output
+(0-10); an optional judge model adds an LLM score per iteration.
+"""
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from veloraplan.artifacts import atomic_write
+from veloraplan.context_budget import context_budgeter
+from veloraplan.crew import CrewFactory, crew_factory
+from veloraplan.extract_outputs import SECTION_HEADINGS, validate_output
+from veloraplan.metrics import CACHE_REQUESTS
+from veloraplan.project_loader import create_project_loader
+from veloraplan.rate_limiter import get_rate_limiter
+from veloraplan.tables import render_table
+
+DEFAULT_WORKERS = 4
+# Charter title, executive summary and mermaid gantt block, plus each split-out section
+QUALITY_CHECKS = 3 + len(SECTION_HEADINGS)
+JUDGE_PROMPT = (
+    "Rate the following project deliverables from 1 (unusable) to 10 (executive-ready) for completeness, "
+    "internal consistency and realism. Reply with the number only.\n\n{output}"
+)
+
+class PromptCache:
+    """Thread-safe prompt -> response cache shared by concurrent iterations.
+
+    Concurrent requests for the same key wait for the first one instead of
+    all calling the API. Only string responses are cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        self._pending: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_call(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache="prompt", result="hit")
+                return self._entries[key]
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="prompt", result="miss")
+                future = self._pending[key] = Future()
+
+        if pending is not None:
+            with self._lock:
+                self.hits += 1
+            CACHE_REQUESTS.inc(cache="prompt", result="hit")
+            return pending.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if isinstance(result, str):
+                self._entries[key] = result
+            del self._pending[key]
+        future.set_result(result)
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def quality_score(output: str) -> Dict[str, Any]:
+    """Local 0-10 quality score from the extraction checks"""
+    problems = validate_output(output)
+    return {"quality": round(10 * (QUALITY_CHECKS - len(problems)) / QUALITY_CHECKS, 1), "problems": problems}
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class EvaluationHarness:
+    """Runs crew iterations concurrently and reports latency, tokens and quality"""
+
+    def __init__(self, iterations: int, workers: int = None, temperature: float = 0.0,
+                 judge_model: str = None, factory: CrewFactory = None, config_path: str = None,
+                 output_dir: str = "outputs"):
+        self.iterations = iterations
+        self.workers = max(1, workers or int(os.getenv("EVAL_WORKERS", DEFAULT_WORKERS)))
+        self.temperature = temperature
+        self.judge_model = judge_model
+        self.factory = factory or crew_factory
+        self.output_dir = output_dir
+        self.prompt_cache = PromptCache() if not temperature else None
+
+        # Load the project once; every iteration reuses the same inputs and config
+        loader = create_project_loader(config_path)
+        self.config = loader.config
+        self.inputs = loader.get_crew_inputs()
+        self.results: List[Dict[str, Any]] = []
+        self.wall_seconds = 0.0
+
+    def run_iteration(self, index: int) -> Dict[str, Any]:
+        """Build a crew with its own agents, run it and score the output"""
+        result = {"iteration": index, "latency_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+                  "total_tokens": 0, "requests": 0, "quality": 0.0, "judge_score": None, "problems": [],
+                  "error": None}
+        started = time.perf_counter()
+        try:
+            crew = self.factory.build(self.inputs, self.config, fresh=True, temperature=self.temperature,
+                                      prompt_cache=self.prompt_cache)
+            output = crew.kickoff()
+            result["latency_seconds"] = time.perf_counter() - started
+
+            usage = getattr(output, "token_usage", None)
+            if usage is not None:
+                result.update(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens,
+                              total_tokens=usage.total_tokens, requests=usage.successful_requests)
+            result.update(quality_score(str(output)))
+            if self.judge_model:
+                result["judge_score"] = self.judge(str(output))
+        except Exception as e:
+            result["latency_seconds"] = time.perf_counter() - started
+            result["error"] = str(e)
+        return result
+
+    def judge(self, output: str) -> Optional[float]:
+        """Ask the judge model for a 1-10 score"""
+        llm = self.factory.get_llm(self.judge_model)
+        prompt = JUDGE_PROMPT.format(output=output)
+        try:
+            reply = get_rate_limiter().call(llm.invoke, prompt, estimated_tokens=len(prompt) // 4 + 10)
+        except Exception as e:
+            print(f"⚠️  Judge call failed: {e}")
+            return None
+        match = re.search(r"\d+(?:\.\d+)?", getattr(reply, "content", str(reply)))
+        return min(10.0, float(match.group())) if match else None
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Run all iterations concurrently; returns per-iteration results in order"""
+        print(f"🧪 Evaluating {self.iterations} iterations on {self.workers} workers "
+              f"(temperature {self.temperature}{', prompt cache on' if self.prompt_cache else ''})")
+        # Iterations share the budgeter concurrently, so its report covers the whole evaluation run
+        context_budgeter.reset()
+        started = time.perf_counter()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evaluation") as executor:
+            futures = [executor.submit(self.run_iteration, index) for index in range(1, self.iterations + 1)]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                status = f"❌ {result['error']}" if result["error"] else f"quality {result['quality']}"
+                print(f"   Iteration {result['iteration']}: {result['latency_seconds']:.1f}s, "
+                      f"{result['total_tokens']:,} tokens, {status}")
+        self.wall_seconds = time.perf_counter() - started
+        self.results = sorted(results, key=lambda result: result["iteration"])
+        return self.results
+
+    def summary(self) -> Dict[str, Any]:
+        completed = [result for result in self.results if not result["error"]]
+        latencies = [result["latency_seconds"] for result in completed]
+        judged = [result["judge_score"] for result in completed if result["judge_score"] is not None]
+        return {
+            "iterations": len(self.results),
+            "failed": len(self.results) - len(completed),
+            "wall_seconds": round(self.wall_seconds, 2),
+            "latency_mean_seconds": round(statistics.mean(latencies), 2) if latencies else None,
+            "latency_p50_seconds": round(_percentile(latencies, 0.5), 2) if latencies else None,
+            "latency_p95_seconds": round(_percentile(latencies, 0.95), 2) if latencies else None,
+            "total_tokens": sum(result["total_tokens"] for result in self.results),
+            "quality_mean": round(statistics.mean(result["quality"] for result in completed), 2) if completed else None,
+            "judge_mean": round(statistics.mean(judged), 2) if judged else None,
+            "prompt_cache_hit_rate": round(self.prompt_cache.hit_rate, 3) if self.prompt_cache else None
+        }
+
+    def write_report(self) -> str:
+        """Write the markdown report and its JSON twin; returns the markdown path"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        summary = self.summary()
+        rows = [
+            [result["iteration"], f"{result['latency_seconds']:.1f}", f"{result['total_tokens']:,}", result["requests"],
+             result["quality"], "" if result["judge_score"] is None else result["judge_score"],
+             result["error"] or "; ".join(result["problems"])]
+            for result in self.results
+        ]
+        report = "\n".join([
+            f"# Evaluation: {self.config.project_charter.title}",
+            "",
+            render_table(["Metric", "Value"], [[key, "" if value is None else value] for key, value in summary.items()],
+                         title="## Summary"),
+            render_table(["Iteration", "Latency (s)", "Tokens", "Requests", "Quality", "Judge", "Problems"], rows,
+                         title="## Iterations"),
+            f"---\n*Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
+            ""
+        ])
+        path = atomic_write(os.path.join(self.output_dir, f"evaluation_{timestamp}.md"), report)
+        atomic_write(os.path.join(self.output_dir, f"evaluation_{timestamp}.json"),
+                     json.dumps({"summary": summary, "iterations": self.results}, indent=2))
+        return path
+
+    def print_report(self, path: str = None):
+        summary = self.summary()
+        print("\n📊 EVALUATION SUMMARY:")
+        print(f"   Iterations: {summary['iterations']} ({summary['failed']} failed) in {summary['wall_seconds']:.1f}s")
+        if summary["latency_mean_seconds"] is not None:
+            print(f"   Latency: mean {summary['latency_mean_seconds']}s | p50 {summary['latency_p50_seconds']}s | "
+                  f"p95 {summary['latency_p95_seconds']}s")
+        print(f"   Tokens: {summary['total_tokens']:,}")
+        print(f"   Quality: {summary['quality_mean']}/10" +
+              (f" | Judge: {summary['judge_mean']}/10" if summary["judge_mean"] is not None else ""))
+        if summary["prompt_cache_hit_rate"] is not None:
+            print(f"   Prompt cache hit rate: {summary['prompt_cache_hit_rate']:.1%}")
+        if path:
+            print(f"   Report: {path}")
@@ -0,0 +1,32 @@
+"""
+crewAI event bus handler registration.
+
+The event bus can register handlers but has no public way to remove one, and
+scoped_handlers() swaps out every handler at once, including crewAI's own
+listeners and any other collector attached at the same time. Collectors
+register and remove their handlers here so the one access to the bus's
+private handler table lives in a single place; emit_event publishes events
+raised outside crewAI's own tool and LLM paths.
+"""
+from typing import Any, Callable, Iterable, Tuple, Type
+
+from crewai.events import crewai_event_bus
+
+Handler = Tuple[Type, Callable]
+
+def register_handlers(handlers: Iterable[Handler]):
+    """Register (event type, handler) pairs on the global event bus"""
+    for event_type, handler in handlers:
+        crewai_event_bus.register_handler(event_type, handler)
+
+def emit_event(source: Any, event: Any):
+    """Emit an event on the global event bus"""
+    crewai_event_bus.emit(source, event)
+
+def unregister_handlers(handlers: Iterable[Handler]):
+    """Remove (event type, handler) pairs registered with register_handlers"""
+    table = getattr(crewai_event_bus, "_handlers", {})
+    for event_type, handler in handlers:
+        registered = table.get(event_type, [])
+        if handler in registered:
+            registered.remove(handler)
@@ -0,0 +1,174 @@
+"""
+Earned value management (EVM) analytics.
+
+All metrics are NumPy column operations, so the same functions work for one
+project, per category, per week, or a whole portfolio of projects at once
+(any arrays that broadcast together). Phase durations are working days, so
+elapsed time is measured in working days on the work calendar too.
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from veloraplan.models import ProjectConfig, ProjectStatus
+from veloraplan.work_calendar import get_calendar
+
+ArrayLike = Union[float, np.ndarray, List[float]]
+
+def compute_evm(bac: ArrayLike, planned_fraction: ArrayLike, percent_complete: ArrayLike,
+                actual_cost: ArrayLike) -> Dict[str, np.ndarray]:
+    """Compute EVM metrics element-wise over broadcastable arrays.
+
+    bac is the budget at completion, planned_fraction and percent_complete
+    are 0-1 fractions of the work scheduled and done, actual_cost is money
+    spent so far. CPI/SPI are NaN where their denominator is zero; EAC falls
+    back to BAC when there is no cost performance yet.
+    """
+    bac = np.asarray(bac, dtype=np.float64)
+    pv = bac * np.clip(np.asarray(planned_fraction, dtype=np.float64), 0.0, 1.0)
+    ev = bac * np.clip(np.asarray(percent_complete, dtype=np.float64), 0.0, 1.0)
+    ac = np.asarray(actual_cost, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cpi = np.where(ac > 0, ev / ac, np.nan)
+        spi = np.where(pv > 0, ev / pv, np.nan)
+        eac = np.where(np.isfinite(cpi) & (cpi > 0), bac / cpi, bac)
+
+    return {
+        "bac": bac,
+        "pv": pv,
+        "ev": ev,
+        "ac": ac,
+        "cv": ev - ac,
+        "sv": ev - pv,
+        "cpi": cpi,
+        "spi": spi,
+        "eac": eac,
+        "etc": np.maximum(eac - ac, 0.0),
+        "vac": bac - eac
+    }
+
+def planned_value_curve(phase_days: ArrayLike, phase_weights: ArrayLike = None, days: ArrayLike = None) -> np.ndarray:
+    """Cumulative fraction of planned work at each elapsed day.
+
+    Spend within a phase is linear; phase_weights (e.g. total FTE per phase)
+    set each phase's share of the budget, defaulting to its duration.
+    """
+    phase_days = np.asarray(phase_days, dtype=np.float64)
+    weights = phase_days if phase_weights is None else np.asarray(phase_weights, dtype=np.float64)
+    if weights.sum() <= 0:
+        weights = phase_days
+    weights = weights / weights.sum()
+
+    # Breakpoints of the piecewise-linear cumulative curve
+    day_points = np.concatenate(([0.0], np.cumsum(phase_days)))
+    fraction_points = np.concatenate(([0.0], np.cumsum(weights)))
+    if days is None:
+        days = np.arange(int(day_points[-1]) + 1)
+    return np.interp(np.asarray(days, dtype=np.float64), day_points, fraction_points)
+
+def _parse_date(value: Union[str, date, datetime]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+class EVMEngine:
+    """EVM for one project, per financial category and per week"""
+
+    def __init__(self, config: ProjectConfig):
+        self.config = config
+        self.categories = [line.category for line in config.financials]
+        self.bac = np.array([line.planned for line in config.financials], dtype=np.float64)
+        actuals = [line.actual for line in config.financials]
+        self.has_actuals = any(actual is not None for actual in actuals)
+        self.actual = np.array([actual or 0.0 for actual in actuals], dtype=np.float64)
+        self.start_date = _parse_date(config.project_charter.start_date)
+
+        self.phase_days = np.array([phase.duration_days for phase in config.project_phases], dtype=np.float64)
+        # Weight phases by total FTE when the allocation lines up with the phases
+        self.phase_weights = None
+        allocations = [resource.allocation for resource in config.resource_allocation]
+        if allocations and all(len(allocation) == len(self.phase_days) for allocation in allocations):
+            self.phase_weights = np.asarray(allocations, dtype=np.float64).sum(axis=0)
+
+    @property
+    def total_days(self) -> int:
+        return int(self.phase_days.sum())
+
+    def planned_fraction(self, as_of: Union[str, date, datetime, None] = None) -> float:
+        """Fraction of the budget scheduled to be spent by the given date"""
+        as_of = _parse_date(as_of) if as_of else date.today()
+        elapsed = get_calendar().working_days_between(self.start_date, as_of)
+        return float(planned_value_curve(self.phase_days, self.phase_weights, [elapsed])[0])
+
+    def category_actuals(self, status: Optional[ProjectStatus] = None) -> np.ndarray:
+        """Actual cost per category; spreads budget_consumed by BAC when lines have no actuals"""
+        if self.has_actuals or status is None or not self.bac.sum():
+            return self.actual
+        return status.budget_consumed * self.bac / self.bac.sum()
+
+    def compute(self, status: ProjectStatus, as_of: Union[str, date, datetime, None] = None) -> Dict[str, Dict[str, float]]:
+        """EVM metrics per category and for the whole project at a status date"""
+        metrics = compute_evm(
+            self.bac,
+            self.planned_fraction(as_of),
+            status.overall_progress / 100,
+            self.category_actuals(status)
+        )
+        totals = compute_evm(
+            self.bac.sum(),
+            self.planned_fraction(as_of),
+            status.overall_progress / 100,
+            metrics["ac"].sum()
+        )
+
+        result = {
+            category: {key: float(values[i]) for key, values in metrics.items()}
+            for i, category in enumerate(self.categories)
+        }
+        result["Total"] = {key: float(value) for key, value in totals.items()}
+        return result
+
+    def weekly(self, percent_complete: ArrayLike, actual_cost: ArrayLike) -> Dict[str, np.ndarray]:
+        """EVM per week from cumulative progress (0-1) and cumulative cost series.
+
+        Returns arrays of shape (categories, weeks); cost is spread over
+        categories in proportion to their budget.
+        """
+        percent_complete = np.asarray(percent_complete, dtype=np.float64)
+        actual_cost = np.asarray(actual_cost, dtype=np.float64)
+        weeks = np.arange(1, percent_complete.shape[-1] + 1)
+        start = self.start_date.toordinal()
+        elapsed = get_calendar().working_days_between_many(np.full(len(weeks), start), start + weeks * 7)
+        planned = planned_value_curve(self.phase_days, self.phase_weights, elapsed)
+
+        share = self.bac / self.bac.sum() if self.bac.sum() else np.zeros_like(self.bac)
+        return compute_evm(
+            self.bac[:, None],
+            planned[None, :],
+            percent_complete[None, :],
+            share[:, None] * actual_cost[None, :]
+        )
+
+def portfolio_evm(bac: ArrayLike, planned_fraction: ArrayLike, percent_complete: ArrayLike,
+                  actual_cost: ArrayLike) -> Dict[str, np.ndarray]:
+    """EVM across many projects (and optionally weeks) plus portfolio totals.
+
+    Inputs are arrays of shape (projects,) or (projects, weeks); pass bac as
+    bac[:, None] for the weekly case. Totals are summed over projects and
+    recomputed so CPI/SPI are budget-weighted.
+    """
+    metrics = compute_evm(bac, planned_fraction, percent_complete, actual_cost)
+    bac_total = np.broadcast_to(metrics["bac"], metrics["pv"].shape).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        totals = compute_evm(
+            bac_total,
+            np.where(bac_total > 0, metrics["pv"].sum(axis=0) / bac_total, 0.0),
+            np.where(bac_total > 0, metrics["ev"].sum(axis=0) / bac_total, 0.0),
+            np.broadcast_to(metrics["ac"], metrics["pv"].shape).sum(axis=0)
+        )
+    metrics["portfolio"] = totals
+    return metrics
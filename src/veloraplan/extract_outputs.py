@@ -1,6 +1,34 @@
+import io
 import os
 import re
 from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from veloraplan.artifacts import ArtifactWriter
+
+# Headings the split-out documents are extracted from
+SECTION_HEADINGS = {
+    "resource_allocation": r"## Resource Allocation Plan",
+    "prioritization_analysis": r"## Prioritization Analysis",
+    "detailed_project_plan": r"## Detailed Project Plan",
+    "risk_assessment": r"## Risk Assessment and Mitigation Plan"
+}
+SECTION_END = r"^## |\Z"
+# Sections the comprehensive charter is assembled from
+CHARTER_SECTIONS = {
+    "executive_summary": r"## Executive Summary",
+    "objectives": r"## Objectives",
+    "scope": r"## Scope",
+    "timeline": r"## Timeline",
+    "resources": r"## Resources",
+    "risks": r"## Risks",
+    "governance": r"## Governance",
+    "communication": r"## Communication Plan"
+}
+TITLE_RE = re.compile(r"# Project Charter:", re.IGNORECASE)
+SECTION_END_RE = re.compile(r"## ")
+MERMAID_START = "```mermaid"
+FENCE = "```"
 
 def extract_section(text, start_pattern, end_pattern=None):
     """Extracts a section from text between start_pattern and end_pattern (regex)."""
@@ -25,19 +53,132 @@ def extract_project_title(text):
     match = re.search(r"# Project Charter:\s*(.+)", text, re.IGNORECASE)
     return match.group(1).strip() if match else "Project Plan"
 
-def create_comprehensive_charter(content, project_title):
-    """Creates a comprehensive project charter with all sections."""
-    charter_sections = []
-    
-    # Extract all relevant sections
-    executive_summary = extract_section(content, r"## Executive Summary", r"^## |\Z")
-    objectives = extract_section(content, r"## Objectives", r"^## |\Z")
-    scope = extract_section(content, r"## Scope", r"^## |\Z")
-    timeline = extract_section(content, r"## Timeline", r"^## |\Z")
-    resources = extract_section(content, r"## Resources", r"^## |\Z")
-    risks = extract_section(content, r"## Risks", r"^## |\Z")
-    governance = extract_section(content, r"## Governance", r"^## |\Z")
-    communication = extract_section(content, r"## Communication Plan", r"^## |\Z")
+class SectionExtractor:
+    """Extracts the title, first mermaid block and sections from crew output in one pass over its lines.
+
+    Gives the same results as extract_project_title, extract_mermaid and
+    extract_section(text, pattern, SECTION_END), but only the lines of sections
+    that are still open are held in memory. Each section is passed to
+    on_section(name, text) as soon as the next "## " heading closes it.
+    """
+
+    def __init__(self, patterns: Dict[str, str], on_section: Callable[[str, str], None] = None):
+        self.patterns = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in patterns.items()}
+        self.on_section = on_section
+        self.sections: Dict[str, Optional[str]] = {name: None for name in patterns}
+        self.title: Optional[str] = None
+        self.title_seen = False
+        self.mermaid: Optional[str] = None
+        self._open: Dict[str, List[str]] = {}
+        self._mermaid_lines: Optional[List[str]] = None
+
+    def feed(self, line: str):
+        """Feed one line of output, including its newline"""
+        self._handle_title(line)
+        self._handle_mermaid(line)
+
+        if self._open and SECTION_END_RE.match(line):
+            for name in list(self._open):
+                self._finish(name)
+        for lines in self._open.values():
+            lines.append(line)
+
+        # A section starting on this line keeps only the text after its heading
+        if "##" not in line:
+            return
+        for name, pattern in self.patterns.items():
+            if self.sections[name] is not None or name in self._open:
+                continue
+            match = pattern.search(line)
+            if match:
+                self._open[name] = [line[match.end():]]
+                if SECTION_END_RE.match(self._open[name][0]):
+                    self._open[name] = []
+                    self._finish(name)
+
+    def close(self) -> "SectionExtractor":
+        """Finish sections still open at the end of the output"""
+        for name in list(self._open):
+            self._finish(name)
+        self._mermaid_lines = None
+        return self
+
+    def _finish(self, name: str):
+        text = "".join(self._open.pop(name)).strip()
+        self.sections[name] = text
+        if self.on_section:
+            self.on_section(name, text)
+
+    def _handle_title(self, line: str):
+        if self.title is not None:
+            return
+        if not self.title_seen:
+            match = TITLE_RE.search(line)
+            if not match:
+                return
+            self.title_seen = True
+            line = line[match.end():]
+        # The title may follow on a later line, as "\s*(.+)" allows
+        if line.strip():
+            self.title = line.strip()
+
+    def _handle_mermaid(self, line: str):
+        if self.mermaid is not None:
+            return
+        if self._mermaid_lines is None:
+            start = line.lower().find(MERMAID_START)
+            if start == -1:
+                return
+            self._mermaid_lines = []
+            line = line[start + len(MERMAID_START):]
+        end = line.find(FENCE)
+        if end == -1:
+            self._mermaid_lines.append(line)
+            return
+        self._mermaid_lines.append(line[:end])
+        self.mermaid = f"{MERMAID_START}{''.join(self._mermaid_lines)}{FENCE}"
+        self._mermaid_lines = None
+
+def scan(lines: Iterable[str], on_section: Callable[[str, str], None] = None) -> SectionExtractor:
+    """Run a SectionExtractor for the charter and split-out sections over lines"""
+    extractor = SectionExtractor({**CHARTER_SECTIONS, **SECTION_HEADINGS}, on_section)
+    for line in lines:
+        extractor.feed(line)
+    return extractor.close()
+
+def validate_output(text) -> List[str]:
+    """Problems that would leave extracted documents empty; an empty list means the output is complete"""
+    extracted = scan(io.StringIO(text))
+    problems = []
+    if not extracted.title_seen:
+        problems.append("missing '# Project Charter:' title")
+    if extracted.sections["executive_summary"] is None:
+        problems.append("missing '## Executive Summary' heading")
+    if not extracted.mermaid:
+        problems.append("missing mermaid block")
+    elif "gantt" not in extracted.mermaid.lower():
+        problems.append("mermaid block is not a gantt chart")
+    for name, pattern in SECTION_HEADINGS.items():
+        if not extracted.sections[name]:
+            problems.append(f"missing or empty '{pattern}' section")
+    return problems
+
+def create_comprehensive_charter(content, project_title, sections=None):
+    """Creates a comprehensive project charter with all sections.
+
+    sections maps CHARTER_SECTIONS names to already extracted text; when
+    omitted they are extracted from content.
+    """
+    if sections is None:
+        sections = {name: extract_section(content, pattern, SECTION_END) for name, pattern in CHARTER_SECTIONS.items()}
+    executive_summary = sections.get("executive_summary")
+    objectives = sections.get("objectives")
+    scope = sections.get("scope")
+    timeline = sections.get("timeline")
+    resources = sections.get("resources")
+    risks = sections.get("risks")
+    governance = sections.get("governance")
+    communication = sections.get("communication")
     
     # Build comprehensive charter
     charter = f"""# Project Charter: {project_title}
@@ -196,70 +337,85 @@ def create_enhanced_project_plan(plan_content, project_title):
 """
     return enhanced_plan
 
-def main():
-    output_dir = "outputs"
+# Split-out documents built from SECTION_HEADINGS sections
+SECTION_DOCUMENTS = {
+    "resource_allocation": ("Enhanced resource allocation plan", create_enhanced_resource_plan),
+    "prioritization_analysis": ("Enhanced prioritization analysis", create_enhanced_prioritization),
+    "detailed_project_plan": ("Enhanced detailed project plan", create_enhanced_project_plan),
+    "risk_assessment": ("Enhanced risk assessment", create_enhanced_risk_assessment)
+}
+
+def latest_output_path(output_dir="outputs"):
+    """Path of the newest crew_output_*.md in output_dir, or None"""
     files = [f for f in os.listdir(output_dir) if f.startswith("crew_output_") and f.endswith(".md")]
     if not files:
-        print("No crew_output_*.md files found in outputs directory.")
-        return
-
-    latest_file = max(files, key=lambda f: os.path.getctime(os.path.join(output_dir, f)))
-    with open(os.path.join(output_dir, latest_file), "r", encoding="utf-8") as f:
-        content = f.read()
+        return None
+    return os.path.join(output_dir, max(files, key=lambda f: os.path.getctime(os.path.join(output_dir, f))))
+
+def main(content=None, writer=None):
+    """Build the enhanced output files from crew output.
+
+    content is the crew output text; when omitted the latest crew_output_*.md
+    in outputs/ is streamed line by line instead of being read whole. Each
+    split-out section is written as soon as it ends, so memory stays bounded
+    by the open sections rather than the size of the output. Files are written
+    through writer (an ArtifactWriter) when given, so they join the caller's
+    concurrent writes.
+    """
+    output_dir = "outputs"
+    if content is None:
+        path = latest_output_path(output_dir)
+        if path is None:
+            print("No crew_output_*.md files found in outputs directory.")
+            return
+        source = open(path, "r", encoding="utf-8")
+    else:
+        source = io.StringIO(content)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    project_title = extract_project_title(content)
-
-    # Enhanced Project Charter
-    charter = create_comprehensive_charter(content, project_title)
-    charter_path = os.path.join(output_dir, f"project_charter_{timestamp}.md")
-    with open(charter_path, "w", encoding="utf-8") as f:
-        f.write(charter)
-    print(f"✅ Enhanced project charter saved to: {charter_path}")
-
-    # Enhanced Gantt Chart
-    gantt = extract_mermaid(content)
-    enhanced_gantt = create_enhanced_gantt(gantt, project_title)
-    gantt_path = os.path.join(output_dir, f"gantt_chart_{timestamp}.md")
-    with open(gantt_path, "w", encoding="utf-8") as f:
-        f.write(enhanced_gantt)
-    print(f"✅ Enhanced Gantt chart saved to: {gantt_path}")
-
-    # Enhanced Resource Allocation Plan
-    resource = extract_section(content, r"## Resource Allocation Plan", r"^## |\Z")
-    enhanced_resource = create_enhanced_resource_plan(resource, project_title)
-    resource_path = os.path.join(output_dir, f"resource_allocation_{timestamp}.md")
-    with open(resource_path, "w", encoding="utf-8") as f:
-        f.write(enhanced_resource)
-    print(f"✅ Enhanced resource allocation plan saved to: {resource_path}")
-
-    # Enhanced Prioritization Analysis
-    prioritization = extract_section(content, r"## Prioritization Analysis", r"^## |\Z")
-    enhanced_prioritization = create_enhanced_prioritization(prioritization, project_title)
-    prioritization_path = os.path.join(output_dir, f"prioritization_analysis_{timestamp}.md")
-    with open(prioritization_path, "w", encoding="utf-8") as f:
-        f.write(enhanced_prioritization)
-    print(f"✅ Enhanced prioritization analysis saved to: {prioritization_path}")
-
-    # Enhanced Detailed Project Plan
-    detailed_plan = extract_section(content, r"## Detailed Project Plan", r"^## |\Z")
-    enhanced_plan = create_enhanced_project_plan(detailed_plan, project_title)
-    detailed_plan_path = os.path.join(output_dir, f"detailed_project_plan_{timestamp}.md")
-    with open(detailed_plan_path, "w", encoding="utf-8") as f:
-        f.write(enhanced_plan)
-    print(f"✅ Enhanced detailed project plan saved to: {detailed_plan_path}")
-
-    # Enhanced Risk Assessment and Mitigation Plan
-    risk_assessment = extract_section(content, r"## Risk Assessment and Mitigation Plan", r"^## |\Z")
-    enhanced_risk = create_enhanced_risk_assessment(risk_assessment, project_title)
-    risk_assessment_path = os.path.join(output_dir, f"risk_assessment_{timestamp}.md")
-    with open(risk_assessment_path, "w", encoding="utf-8") as f:
-        f.write(enhanced_risk)
-    print(f"✅ Enhanced risk assessment saved to: {risk_assessment_path}")
+    artifacts = writer or ArtifactWriter(output_dir)
+    pending = {}
+
+    def save(prefix, label, document):
+        name = f"{prefix}_{timestamp}.md"
+        artifacts.write(name, document)
+        print(f"✅ {label} saved to: {os.path.join(output_dir, name)}")
+
+    def save_section(name, text, title):
+        label, create = SECTION_DOCUMENTS[name]
+        save(name, label, create(text, title))
+
+    def on_section(name, text):
+        if name not in SECTION_DOCUMENTS:
+            return
+        if extractor.title is None:
+            pending[name] = text  # Written at the end, once the title is known
+        else:
+            save_section(name, text, extractor.title)
+
+    try:
+        with source:
+            extractor = SectionExtractor({**CHARTER_SECTIONS, **SECTION_HEADINGS}, on_section)
+            for line in source:
+                extractor.feed(line)
+            extractor.close()
+
+        project_title = extractor.title or "Project Plan"
+        for name, text in pending.items():
+            save_section(name, text, project_title)
+        for name in SECTION_DOCUMENTS:
+            if extractor.sections[name] is None:
+                save_section(name, None, project_title)
+        save("project_charter", "Enhanced project charter",
+             create_comprehensive_charter(None, project_title, extractor.sections))
+        save("gantt_chart", "Enhanced Gantt chart", create_enhanced_gantt(extractor.mermaid, project_title))
+    finally:
+        if writer is None:
+            artifacts.close()
 
     print(f"\n🎉 All enhanced output files generated successfully!")
     print(f"📁 Files saved in: {output_dir}")
     print(f"📋 Project: {project_title}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
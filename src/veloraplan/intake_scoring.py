@@ -0,0 +1,230 @@
+"""
+Batch intake scoring and tiering.
+
+Reads intake requests (the test_intake.json format) as a JSONL or CSV
+stream, scores them in NumPy batches and streams the results back out, so
+large intake queues can be triaged without any LLM calls. Memory stays
+bounded by the batch size, not by the input size.
+
+Intakes are scored on the same framework as ScoringCalculatorTool (see
+tasks.yaml): weighted score = score x business criticality multiplier, where
+score is the 5-25 framework total (five dimensions of 1-5). The intake's
+total_score is used when present; otherwise the score is estimated from its
+1-10 criteria (mean / 2 per dimension, times five dimensions). The P1-P4
+tiers come from the weighted score and the XS-2XL sizes from the score.
+"""
+import csv
+import io
+import json
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence, TextIO
+
+import numpy as np
+
+# 1-10 intake criteria, used to estimate the score when total_score is missing
+CRITERIA = ["business_value", "timeline_pressure", "resource_availability", "technical_complexity"]
+FRAMEWORK_DIMENSIONS = 5
+MIN_SCORE, MAX_SCORE = 5, 25
+
+URGENCY_MULTIPLIERS = {"critical": 1.5, "high": 1.2, "medium": 1.0, "low": 0.8}
+DEFAULT_MULTIPLIER = 1.0
+
+# Priority tiers: weighted score >= threshold, highest first
+PRIORITY_THRESHOLDS = [(18, "P1"), (12, "P2"), (6, "P3")]
+LOWEST_PRIORITY = "P4"
+
+# T-shirt sizes by score (XS-2XL): score >= break moves up one size
+SIZE_BREAKS = [9, 12, 15, 18, 22]
+SIZES = np.array(["XS", "S", "M", "L", "XL", "2XL"])
+
+OUTPUT_FIELDS = ["project_id", "project_title", "type", "urgency", "weighted_score", "priority", "size", "error"]
+DEFAULT_BATCH_SIZE = 10000
+
+def priority_tier(weighted_score: float) -> str:
+    """Priority tier (P1-P4) for a single weighted score"""
+    for threshold, priority in PRIORITY_THRESHOLDS:
+        if weighted_score >= threshold:
+            return priority
+    return LOWEST_PRIORITY
+
+def size_for_score(score: float) -> str:
+    """T-shirt size (XS-2XL) for a single framework score"""
+    return str(SIZES[np.digitize(score, SIZE_BREAKS)])
+
+def score_intake(score: float, criticality_multiplier: float) -> Dict[str, object]:
+    """Weighted score, priority tier and size for one score; the formula every scoring path uses"""
+    weighted_score = round(score * criticality_multiplier, 2)
+    return {"weighted_score": weighted_score, "priority": priority_tier(weighted_score), "size": size_for_score(score)}
+
+def priority_tiers(weighted_scores: np.ndarray) -> np.ndarray:
+    """Vectorized priority_tier"""
+    conditions = [weighted_scores >= threshold for threshold, _ in PRIORITY_THRESHOLDS]
+    return np.select(conditions, [priority for _, priority in PRIORITY_THRESHOLDS], default=LOWEST_PRIORITY)
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _multiplier(intake: dict) -> float:
+    if intake.get("criticality_multiplier") not in (None, ""):
+        return _to_float(intake["criticality_multiplier"])
+    return URGENCY_MULTIPLIERS.get(str(intake.get("urgency", "")).strip().lower(), DEFAULT_MULTIPLIER)
+
+def score_batch(intakes: Sequence[dict]) -> Dict[str, np.ndarray]:
+    """Vectorized score_intake for a batch of intakes; returns weighted_score, priority, size and error columns"""
+    scores = np.array([_to_float(intake.get("total_score")) for intake in intakes], dtype=np.float64)
+    criteria = np.array([[_to_float(intake.get(name)) for name in CRITERIA] for intake in intakes],
+                        dtype=np.float64).reshape(len(intakes), len(CRITERIA))
+    multipliers = np.array([_multiplier(intake) for intake in intakes], dtype=np.float64)
+
+    # Without a total_score, map the mean 1-10 criterion onto the 5-25 framework scale
+    present = (~np.isnan(criteria)).sum(axis=1)
+    criteria_means = np.divide(np.nansum(criteria, axis=1), present, out=np.full(len(intakes), np.nan),
+                               where=present > 0)
+    estimated = np.clip(criteria_means / 2, 1.0, 5.0) * FRAMEWORK_DIMENSIONS
+    missing_score = np.isnan(scores)
+    scores = np.where(missing_score, estimated, scores)
+    no_score = np.isnan(scores)
+    scores = np.where(no_score, 0.0, scores)
+
+    bad_multiplier = np.isnan(multipliers)
+    multipliers = np.where(bad_multiplier, DEFAULT_MULTIPLIER, multipliers)
+    weighted = np.round(scores * multipliers, 2)
+
+    errors = np.where(no_score, "no total_score or scoring criteria",
+                      np.where(bad_multiplier, "invalid criticality_multiplier", ""))
+    return {
+        "weighted_score": weighted,
+        "priority": priority_tiers(weighted),
+        "size": SIZES[np.digitize(scores, SIZE_BREAKS)],
+        "error": errors
+    }
+
+# --- Streaming I/O ---
+def read_intakes(stream: TextIO, fmt: str = "jsonl") -> Iterator[dict]:
+    """Yield intakes from a JSONL or CSV stream; a JSON array or object is accepted too"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    first = ""
+    for line in stream:
+        if line.strip():
+            first = line
+            break
+    if not first:
+        return
+
+    try:
+        record = json.loads(first)
+    except ValueError:
+        # A single pretty-printed JSON document (array or object)
+        record = json.loads(first + stream.read())
+    yield from (record if isinstance(record, list) else [record])
+
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+def batched(items: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def score_stream(intakes: Iterable[dict], out: TextIO, fmt: str = "jsonl",
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Score intakes batch by batch and stream results to out; returns counts per priority"""
+    counts = {priority: 0 for _, priority in PRIORITY_THRESHOLDS}
+    counts[LOWEST_PRIORITY] = 0
+    counts["total"] = 0
+    if fmt == "csv":
+        csv.DictWriter(out, fieldnames=OUTPUT_FIELDS).writeheader()
+
+    for batch in batched(intakes, batch_size):
+        scores = score_batch(batch)
+        rows = [
+            {
+                "project_id": intake.get("project_id"),
+                "project_title": intake.get("project_title"),
+                "type": intake.get("type"),
+                "urgency": intake.get("urgency"),
+                "weighted_score": float(weighted_score),
+                "priority": str(priority),
+                "size": str(size),
+                "error": str(error) or None
+            }
+            for intake, weighted_score, priority, size, error in zip(
+                batch, scores["weighted_score"], scores["priority"], scores["size"], scores["error"])
+        ]
+
+        # One write per batch keeps output fast on pipes and large files
+        buffer = io.StringIO()
+        if fmt == "csv":
+            csv.DictWriter(buffer, fieldnames=OUTPUT_FIELDS).writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+        out.write(buffer.getvalue())
+
+        for row in rows:
+            counts[row["priority"]] += 1
+        counts["total"] += len(batch)
+    return counts
+
+def _detect_format(path: str, explicit: str = None) -> str:
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def main():
+    """Score intakes from files (or stdin) and stream the results
+
+    Usage: score_intakes [input ...] [--output PATH] [--format jsonl|csv] [--batch-size N]
+    """
+    args = sys.argv[1:]
+    options = {}
+    inputs = []
+    i = 0
+    while i < len(args):
+        if args[i] in ("--output", "--format", "--batch-size", "--input-format"):
+            options[args[i]] = args[i + 1]
+            i += 2
+        else:
+            inputs.append(args[i])
+            i += 1
+
+    output_path = options.get("--output", "-")
+    output_format = _detect_format(output_path, options.get("--format"))
+    batch_size = int(options.get("--batch-size", DEFAULT_BATCH_SIZE))
+
+    def all_intakes() -> Iterator[dict]:
+        if not inputs:
+            yield from read_intakes(sys.stdin, options.get("--input-format", "jsonl"))
+        for path in inputs:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                yield from read_intakes(f, _detect_format(path, options.get("--input-format")))
+
+    started = time.perf_counter()
+    out = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8", newline="")
+    try:
+        counts = score_stream(all_intakes(), out, output_format, batch_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    rate = counts["total"] / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"📥 Scored {counts['total']:,} intakes in {elapsed:.2f}s ({rate:,.0f}/min) | "
+          + " ".join(f"{priority}: {counts[priority]:,}" for priority in ("P1", "P2", "P3", "P4")),
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Local retrieval over knowledge/ and past outputs/.
+
+A small BM25 index, persisted to disk and updated incrementally: only files
+whose content hash changed are re-chunked. Agents get the top-k relevant
+snippets instead of whole documents pasted into their prompts. Runs fully
+offline with no embedding calls.
+
+Everything under knowledge/ is indexed. From outputs/ only the deliverables at
+its top level are: profiling, evaluation and replay reports, streamed task
+transcripts, traces and the run store are not knowledge and stay out of
+prompts.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "outputs"
+DEFAULT_SOURCE_DIRS = [PROJECT_ROOT / "knowledge", OUTPUT_DIR]
+DEFAULT_INDEX_PATH = PROJECT_ROOT / ".cache" / "knowledge_index.json"
+INDEXED_SUFFIXES = {".txt", ".md"}
+# Deliverable files written to outputs/ by main and extract_outputs
+DELIVERABLE_PREFIXES = (
+    "crew_output_", "project_charter_", "gantt_chart_", "resource_allocation_",
+    "prioritization_analysis_", "detailed_project_plan_", "risk_assessment_"
+)
+
+CHUNK_CHARS = 800
+INDEX_VERSION = 1
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS and len(token) > 1]
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Split text into chunks at headings and paragraph breaks"""
+    blocks = [block.strip() for block in re.split(r"(?m)\n\s*\n|^(?=#{1,6} )", text) if block and block.strip()]
+    chunks, current = [], ""
+    for block in blocks:
+        if current and len(current) + len(block) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        while len(block) > max_chars:
+            chunks.append(block[:max_chars])
+            block = block[max_chars:]
+        current = f"{current}\n\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+class KnowledgeIndex:
+    """BM25 index over text and markdown files, persisted as JSON"""
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, source_dirs: List[Path] = None, index_path: Path = None):
+        self.source_dirs = [Path(d) for d in (source_dirs or DEFAULT_SOURCE_DIRS)]
+        self.index_path = Path(index_path or DEFAULT_INDEX_PATH)
+        self._lock = threading.Lock()
+        # files: path -> {"hash": str, "chunks": [{"text": str, "tf": {term: count}, "length": int}]}
+        self.files: Dict[str, dict] = {}
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._chunks: List[Tuple[str, str, int]] = []
+        self._avg_length = 0.0
+
+    def load(self) -> "KnowledgeIndex":
+        """Load the persisted index if present"""
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not read knowledge index, rebuilding: {e}")
+                self.files = {}
+        self._rebuild_postings()
+        return self
+
+    def save(self):
+        """Persist the index atomically"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _source_files(self) -> List[Path]:
+        files = []
+        for source_dir in self.source_dirs:
+            if not source_dir.is_dir():
+                continue
+            if source_dir.resolve() == OUTPUT_DIR.resolve():
+                files.extend(p for p in source_dir.glob("*.md")
+                             if p.is_file() and p.name.startswith(DELIVERABLE_PREFIXES))
+            else:
+                files.extend(p for p in source_dir.rglob("*") if p.is_file() and p.suffix in INDEXED_SUFFIXES)
+        return sorted(files)
+
+    def update(self) -> Dict[str, int]:
+        """Re-index new and changed files, drop deleted ones; returns change counts"""
+        with self._lock:
+            changes = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+            seen = set()
+            for path in self._source_files():
+                key = str(path)
+                seen.add(key)
+                try:
+                    text = path.read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"⚠️  Skipping {path}: {e}")
+                    continue
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                entry = self.files.get(key)
+                if entry and entry["hash"] == digest:
+                    changes["unchanged"] += 1
+                    continue
+                changes["updated" if entry else "added"] += 1
+                self.files[key] = {
+                    "hash": digest,
+                    "chunks": [
+                        {"text": chunk, "tf": dict(Counter(tokens)), "length": len(tokens)}
+                        for chunk in chunk_text(text)
+                        for tokens in [tokenize(chunk)]
+                    ]
+                }
+
+            for key in list(self.files):
+                if key not in seen:
+                    del self.files[key]
+                    changes["removed"] += 1
+
+            if changes["added"] or changes["updated"] or changes["removed"]:
+                self._rebuild_postings()
+                self.save()
+            return changes
+
+    def _rebuild_postings(self):
+        """Build in-memory postings lists from the per-file chunk term counts"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        chunks = []
+        for path, entry in self.files.items():
+            for chunk in entry["chunks"]:
+                chunk_id = len(chunks)
+                chunks.append((path, chunk["text"], chunk["length"]))
+                for term, count in chunk["tf"].items():
+                    postings.setdefault(term, []).append((chunk_id, count))
+        self._postings = postings
+        self._chunks = chunks
+        self._avg_length = sum(length for _, _, length in chunks) / len(chunks) if chunks else 0.0
+
+    def search(self, query: str, k: int = 3) -> List[dict]:
+        """Return the top-k chunks for a query by BM25 score"""
+        n = len(self._chunks)
+        if not n:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                length = self._chunks[chunk_id][2]
+                norm = tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * length / (self._avg_length or 1)))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * norm
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            {"source": os.path.relpath(self._chunks[chunk_id][0], PROJECT_ROOT), "score": round(score, 3),
+             "text": self._chunks[chunk_id][1]}
+            for chunk_id, score in top
+        ]
+
+    def format_snippets(self, query: str, k: int = 3) -> str:
+        """Top-k snippets formatted for a prompt"""
+        results = self.search(query, k)
+        return "\n\n".join(f"[{result['source']}]\n{result['text']}" for result in results)
+
+_knowledge_index: Optional[KnowledgeIndex] = None
+_knowledge_index_lock = threading.Lock()
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Get the process-wide knowledge index, loaded and brought up to date once"""
+    global _knowledge_index
+    with _knowledge_index_lock:
+        if _knowledge_index is None:
+            _knowledge_index = KnowledgeIndex().load()
+            _knowledge_index.update()
+        return _knowledge_index
@@ -16,26 +16,35 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 # Import your crew configuration
 from veloraplan.crew import Veloraplan
 from veloraplan.project_loader import create_project_loader
+from veloraplan.streaming import StreamingOutputWriter
+from veloraplan.context_budget import context_budgeter
+from veloraplan.artifacts import ArtifactWriter
+from veloraplan import extract_outputs
+from veloraplan.profiling import profiler_from_argv, positional_args
+from veloraplan.metrics import run_metrics
+from veloraplan.evaluation import EvaluationHarness
+from veloraplan.run_store import RunStore, store_enabled
+from veloraplan.workload_trace import (recording, trace_stage, record_path_from_argv, replay_trace,
+                                       write_report as write_replay_report, print_report as print_replay_report)
 
 # This main file is intended to be a way for you to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
-def save_output_to_files(output):
+def save_output_to_files(output, writer: ArtifactWriter = None):
     """Save the crew output to files for easy viewing."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # Create output directory
+    # Writes run concurrently and atomically; use the caller's writer when given
     output_dir = "outputs"
-    os.makedirs(output_dir, exist_ok=True)
+    artifacts = writer or ArtifactWriter(output_dir)
     
     # Convert output to string if it's not already
     output_str = str(output)
     
     # Save the full output
-    with open(f"{output_dir}/crew_output_{timestamp}.md", "w", encoding="utf-8") as f:
-        f.write(output_str)
+    artifacts.write(f"crew_output_{timestamp}.md", output_str)
     
     # Extract and save Gantt chart separately
     if "```mermaid" in output_str:
@@ -43,8 +52,7 @@ def save_output_to_files(output):
         end_idx = output_str.find("```", start_idx + 10)
         if end_idx != -1:
             gantt_content = output_str[start_idx:end_idx + 3]
-            with open(f"{output_dir}/gantt_chart_{timestamp}.md", "w", encoding="utf-8") as f:
-                f.write(gantt_content)
+            artifacts.write(f"gantt_chart_{timestamp}.md", gantt_content)
             print(f"✅ Gantt chart saved to: {output_dir}/gantt_chart_{timestamp}.md")
     
     # Save project charter
@@ -57,17 +65,26 @@ def save_output_to_files(output):
             charter_end = len(output_str)
         
         charter_content = output_str[charter_start:charter_end].strip()
-        with open(f"{output_dir}/project_charter_{timestamp}.md", "w", encoding="utf-8") as f:
-            f.write(charter_content)
+        artifacts.write(f"project_charter_{timestamp}.md", charter_content)
         print(f"✅ Project charter saved to: {output_dir}/project_charter_{timestamp}.md")
     
+    if writer is None:
+        artifacts.close()
     print(f"✅ Full output saved to: {output_dir}/crew_output_{timestamp}.md")
+    return output_str
 
 def run():
     """
     Run the crew with OpenAI (Cost Optimized) using project configuration.
+    Usage: python main.py [--stream] [--profile] [--memprofile] [--record [TRACE_PATH]]
     """
+    with run_metrics("run"), profiler_from_argv("run"):
+        _run()
+
+def _run():
     try:
+        context_budgeter.reset()  # The budget report covers this run only
+        
         # Load project configuration
         project_loader = create_project_loader()
         config = project_loader.config
@@ -79,24 +96,49 @@ def run():
         model = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
         print(f"🤖 {model} | 💰 Cost optimized: max_tokens=800, max_iter=2, verbose=false")
         
-        veloraplan = Veloraplan()
-        crew = veloraplan.crew()
+        # Stream tokens to disk and console as they arrive
+        stream = "--stream" in sys.argv or os.getenv("STREAM_OUTPUT", "false").lower() == "true"
         
-        # Run the crew
-        result = crew.kickoff()
+        # With --record, capture inputs, LLM calls, tool calls and stage timings for `replay --trace`
+        with recording(record_path_from_argv(), project_loader.get_crew_inputs(), config) as recorder:
+            veloraplan = Veloraplan()
+            with trace_stage(recorder, "build"):
+                crew = veloraplan.crew(stream=stream, trace=recorder)
+            
+            # Run the crew
+            with trace_stage(recorder, "kickoff"):
+                if stream:
+                    with StreamingOutputWriter() as writer:
+                        result = crew.kickoff()
+                        writer.save_final_output(result)
+                else:
+                    result = crew.kickoff()
+            
+            with ArtifactWriter() as artifacts:
+                if not stream:
+                    # Save the output to files
+                    save_output_to_files(result, artifacts)
+                
+                # Extract enhanced outputs from the in-memory result instead of re-reading the saved file
+                with trace_stage(recorder, "extract"):
+                    try:
+                        extract_outputs.main(content=str(result), writer=artifacts)
+                    except Exception as e:
+                        print(f"⚠️  Could not extract outputs automatically: {e}")
         
-        # Save the output to files
-        save_output_to_files(result)
+        # Keep the run as deduplicated section blobs so later runs can be diffed against it
+        if store_enabled():
+            try:
+                manifest = RunStore().save_run(artifacts.contents())
+                stats = manifest["stats"]
+                print(f"🗂️  Stored run {manifest['run_id']}: {stats['new_bytes']:,} new of {stats['total_bytes']:,} bytes "
+                      f"(diff with: diff_runs)")
+            except Exception as e:
+                print(f"⚠️  Could not store run history: {e}")
         
-        # Print cost estimate
+        # Print cost estimate and context budget savings
         veloraplan.print_cost_estimate()
-
-        # Automatically extract outputs after run
-        try:
-            import subprocess
-            subprocess.run(["python", "extract_outputs.py"], check=True)
-        except Exception as e:
-            print(f"⚠️  Could not run extract_outputs.py automatically: {e}")
+        context_budgeter.print_report()
         
         print("\n" + "="*50)
         print("✅ CREW EXECUTION COMPLETED!")
@@ -116,22 +158,32 @@ def run():
 def train():
     """
     Train the crew for a given number of iterations.
-    Usage: python main.py <n_iterations> <output_filename>
+    Usage: python main.py <n_iterations> <output_filename> [--profile] [--memprofile]
     """
     try:
         project_loader = create_project_loader()
         inputs = project_loader.get_crew_inputs()
+        args = positional_args()
         
-        Veloraplan().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        with run_metrics("train"), profiler_from_argv("train"):
+            Veloraplan().crew().train(n_iterations=int(args[0]), filename=args[1], inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
 
 def replay():
     """
-    Replay the crew execution from a specific task.
+    Replay the crew execution from a specific task, or re-execute a recorded workload trace
+    (from `veloraplan --record`) against the current code with the recorded LLM responses.
     Usage: python main.py <task_id>
+           python main.py --trace <trace_path> [--profile] [--memprofile]
     """
     try:
+        if "--trace" in sys.argv:
+            trace_path = sys.argv[sys.argv.index("--trace") + 1]
+            with profiler_from_argv("replay"):
+                replayer = replay_trace(trace_path)
+            print_replay_report(replayer, write_replay_report(replayer, trace_path))
+            return
         Veloraplan().crew().replay(task_id=sys.argv[1])
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -139,15 +191,48 @@ def replay():
 def test():
     """
     Test the crew execution and return the results.
-    Usage: python main.py <n_iterations> <llm_model>
+    Usage: python main.py <n_iterations> <llm_model> [--profile] [--memprofile]
     """
     try:
         project_loader = create_project_loader()
         inputs = project_loader.get_crew_inputs()
+        args = positional_args()
         
-        Veloraplan().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        with run_metrics("test"), profiler_from_argv("test"):
+            Veloraplan().crew().test(n_iterations=int(args[0]), eval_llm=args[1], inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
 
+def evaluate():
+    """
+    Run the crew for several iterations concurrently and write one evaluation report.
+    Usage: python main.py <n_iterations> [--workers N] [--temperature T] [--judge MODEL]
+    """
+    try:
+        # Each option flag takes the token after it; everything else that is not a --flag is positional
+        options, args = {}, []
+        argv = sys.argv[1:]
+        i = 0
+        while i < len(argv):
+            if argv[i] in ("--workers", "--temperature", "--judge") and i + 1 < len(argv):
+                options[argv[i]] = argv[i + 1]
+                i += 2
+                continue
+            if not argv[i].startswith("--"):
+                args.append(argv[i])
+            i += 1
+
+        harness = EvaluationHarness(
+            iterations=int(args[0]) if args else 5,
+            workers=int(options["--workers"]) if "--workers" in options else None,
+            temperature=float(options.get("--temperature", 0.0)),
+            judge_model=options.get("--judge")
+        )
+        with run_metrics("evaluate"), profiler_from_argv("evaluate"):
+            harness.run()
+        harness.print_report(harness.write_report())
+    except Exception as e:
+        raise Exception(f"An error occurred while evaluating the crew: {e}")
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,399 @@
+"""
+Run metrics in the Prometheus text exposition format.
+
+A small dependency-free registry (counters, gauges, histograms with labels)
+fed by crewAI events: run counts and duration, per-task latency, LLM calls,
+token usage, cache hit/miss counts, tool calls and failure reasons. Metrics
+are written to a node_exporter textfile-collector file at the end of every
+run (METRICS_TEXTFILE) and can be served on a local /metrics endpoint while
+the run is in progress (METRICS_PORT). Counters are restored from the
+previous textfile, so they keep counting across scheduled runs.
+
+Updating a metric is a dict lookup and an addition under a lock, so
+collection can stay on in production.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from crewai.events.types.crew_events import CrewKickoffCompletedEvent
+from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent
+from crewai.events.types.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent
+
+from veloraplan.artifacts import atomic_write
+from veloraplan.events import register_handlers, unregister_handlers
+
+DEFAULT_TEXTFILE = os.path.join(".cache", "metrics.prom")
+LATENCY_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+    def restore(self, suffix: str, key: LabelValues, extra: Dict[str, str], value: float):
+        if not suffix:
+            self._values[key] = value
+
+class Gauge(Counter):
+    """Value that can go up and down; not restored across runs"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def restore(self, suffix: str, key: LabelValues, extra: Dict[str, str], value: float):
+        pass
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [per-bucket counts (non-cumulative) + overflow, sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def _entry(self, key: LabelValues) -> list:
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        return entry
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._entry(key)
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+    def restore(self, suffix: str, key: LabelValues, extra: Dict[str, str], value: float):
+        entry = self._entry(key)
+        if suffix == "_sum":
+            entry[1] = value
+        elif suffix == "_count":
+            entry[2] = int(value)
+        elif suffix == "_bucket" and "le" in extra:
+            bound = float("inf") if extra["le"] == "+Inf" else float(extra["le"])
+            bounds = list(self.buckets) + [float("inf")]
+            if bound in bounds:
+                # Rebuild per-bucket counts from the cumulative value
+                index = bounds.index(bound)
+                below = sum(entry[0][:index])
+                entry[0][index] = max(0, int(value) - below)
+
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> str:
+        """Write all metrics atomically, as the textfile collector requires"""
+        return atomic_write(path, self.render())
+
+    def restore_textfile(self, path: str) -> int:
+        """Seed counters and histograms from a previous textfile; returns samples restored"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return 0
+
+        restored = 0
+        for line in lines:
+            match = _SAMPLE_RE.match(line)
+            if not match or line.startswith("#"):
+                continue
+            name, label_text, value = match.groups()
+            metric, suffix = self._metrics.get(name), ""
+            if metric is None:
+                for candidate in ("_bucket", "_sum", "_count"):
+                    if name.endswith(candidate) and name[:-len(candidate)] in self._metrics:
+                        metric, suffix = self._metrics[name[:-len(candidate)]], candidate
+                        break
+            if metric is None:
+                continue
+            labels = {key: value.replace('\\"', '"').replace("\\n", "\n").replace("\\\\", "\\")
+                      for key, value in _LABEL_RE.findall(label_text or "")}
+            try:
+                metric.restore(suffix, metric._key(labels), labels, float(value))
+                restored += 1
+            except ValueError:
+                continue
+        return restored
+
+registry = MetricsRegistry()
+
+RUNS = registry.counter("veloraplan_runs_total", "Runs by entry point and outcome", ["entrypoint", "status"])
+RUN_FAILURES = registry.counter("veloraplan_run_failures_total", "Failed runs by reason", ["entrypoint", "reason"])
+RUN_DURATION = registry.histogram("veloraplan_run_duration_seconds", "Run wall time", ["entrypoint"],
+                                  buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600))
+LAST_RUN = registry.gauge("veloraplan_last_run_timestamp_seconds", "Unix time the last run finished",
+                          ["entrypoint", "status"])
+TASK_DURATION = registry.histogram("veloraplan_task_duration_seconds", "Task latency", ["task"])
+TASK_FAILURES = registry.counter("veloraplan_task_failures_total", "Failed tasks by reason", ["task", "reason"])
+LLM_CALLS = registry.counter("veloraplan_llm_calls_total", "LLM calls by outcome", ["status"])
+LLM_FAILURES = registry.counter("veloraplan_llm_failures_total", "Failed LLM calls by reason", ["reason"])
+TOKENS = registry.counter("veloraplan_llm_tokens_total", "LLM tokens by kind", ["kind"])
+TOOL_CALLS = registry.counter("veloraplan_tool_calls_total", "Tool calls by tool and outcome", ["tool", "status"])
+CANDIDATES = registry.counter("veloraplan_deliverable_candidates_total",
+                              "Deliverable candidates checked locally, by validity", ["result"])
+CACHE_REQUESTS = registry.counter("veloraplan_cache_requests_total", "Cache lookups by cache and result",
+                                  ["cache", "result"])
+
+def failure_reason(error) -> str:
+    """Map an exception or error message to a small, fixed set of reasons"""
+    text = f"{type(error).__name__} {error}".lower() if isinstance(error, BaseException) else str(error).lower()
+    reasons = [
+        ("rate_limit", ("ratelimit", "rate limit", "429")),
+        ("timeout", ("timeout", "timed out")),
+        ("auth", ("authentication", "401", "api key", "permission")),
+        ("context_length", ("context length", "context_length", "maximum context")),
+        ("connection", ("connection", "network", "unreachable")),
+        ("validation", ("validation", "invalid", "parse"))
+    ]
+    for reason, needles in reasons:
+        if any(needle in text for needle in needles):
+            return reason
+    return "other"
+
+class MetricsCollector:
+    """Feeds the registry from crewAI task, LLM and tool events"""
+
+    def __init__(self):
+        self._handlers = []
+        self._lock = threading.Lock()
+        self._task_started: Dict[Any, float] = {}
+
+    def attach(self):
+        self._handlers = [
+            (CrewKickoffCompletedEvent, self._on_crew_completed),
+            (TaskStartedEvent, self._on_task_started),
+            (TaskCompletedEvent, self._on_task_completed),
+            (TaskFailedEvent, self._on_task_failed),
+            (LLMCallCompletedEvent, self._on_llm_completed),
+            (LLMCallFailedEvent, self._on_llm_failed),
+            (ToolUsageFinishedEvent, self._on_tool_finished),
+            (ToolUsageErrorEvent, self._on_tool_error)
+        ]
+        register_handlers(self._handlers)
+
+    def detach(self):
+        unregister_handlers(self._handlers)
+        self._handlers = []
+
+    @staticmethod
+    def _task_name(event) -> str:
+        task = getattr(event, "task", None)
+        return getattr(task, "name", None) or getattr(event, "task_name", None) or "unknown"
+
+    @staticmethod
+    def _task_key(event):
+        # Concurrent evaluation iterations run tasks with the same name, so key on the task itself
+        task = getattr(event, "task", None)
+        return getattr(task, "id", None) or id(task) if task is not None else getattr(event, "task_name", None)
+
+    def _on_crew_completed(self, source, event):
+        # Every kickoff, including the crew copies train/test/evaluate run, reports its own usage
+        record_token_usage(getattr(source, "token_usage", None))
+
+    def _on_task_started(self, source, event):
+        with self._lock:
+            self._task_started[self._task_key(event)] = time.perf_counter()
+
+    def _finish_task(self, event) -> str:
+        name = self._task_name(event)
+        with self._lock:
+            started = self._task_started.pop(self._task_key(event), None)
+        if started is not None:
+            TASK_DURATION.observe(time.perf_counter() - started, task=name)
+        return name
+
+    def _on_task_completed(self, source, event):
+        self._finish_task(event)
+
+    def _on_task_failed(self, source, event):
+        TASK_FAILURES.inc(task=self._finish_task(event), reason=failure_reason(event.error))
+
+    def _on_llm_completed(self, source, event):
+        LLM_CALLS.inc(status="success")
+
+    def _on_llm_failed(self, source, event):
+        LLM_CALLS.inc(status="failure")
+        LLM_FAILURES.inc(reason=failure_reason(event.error))
+
+    def _on_tool_finished(self, source, event):
+        TOOL_CALLS.inc(tool=event.tool_name, status="success")
+        CACHE_REQUESTS.inc(cache="tool", result="hit" if event.from_cache else "miss")
+
+    def _on_tool_error(self, source, event):
+        TOOL_CALLS.inc(tool=event.tool_name, status="error")
+
+def record_token_usage(usage):
+    """Add a crew's token usage (crewAI UsageMetrics or a dict) to the token counters"""
+    if usage is None:
+        return
+    values = usage if isinstance(usage, dict) else getattr(usage, "model_dump", lambda: vars(usage))()
+    for kind, field in (("prompt", "prompt_tokens"), ("completion", "completion_tokens"),
+                        ("cached_prompt", "cached_prompt_tokens")):
+        amount = values.get(field) or 0
+        if amount:
+            TOKENS.inc(amount, kind=kind)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server: Optional[ThreadingHTTPServer] = None
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (once per process)"""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics available at http://{host}:{port}/metrics")
+    return _server
+
+@contextmanager
+def run_metrics(entrypoint: str):
+    """Collect metrics for one run and write the textfile when it ends.
+
+    METRICS_TEXTFILE sets the textfile path (empty disables it); METRICS_PORT
+    starts the local /metrics endpoint.
+    """
+    textfile = os.getenv("METRICS_TEXTFILE", DEFAULT_TEXTFILE)
+    if textfile:
+        registry.restore_textfile(textfile)
+    if os.getenv("METRICS_PORT"):
+        try:
+            start_http_server(int(os.getenv("METRICS_PORT")))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not start metrics endpoint: {e}")
+
+    collector = MetricsCollector()
+    collector.attach()
+    started = time.perf_counter()
+    status = "success"
+    try:
+        yield registry
+    except BaseException as e:
+        status = "failure"
+        RUN_FAILURES.inc(entrypoint=entrypoint, reason=failure_reason(e.__cause__ or e))
+        raise
+    finally:
+        collector.detach()
+        RUN_DURATION.observe(time.perf_counter() - started, entrypoint=entrypoint)
+        RUNS.inc(entrypoint=entrypoint, status=status)
+        LAST_RUN.set(time.time(), entrypoint=entrypoint, status=status)
+        if textfile:
+            try:
+                registry.write_textfile(textfile)
+            except OSError as e:
+                print(f"⚠️  Could not write metrics textfile: {e}")
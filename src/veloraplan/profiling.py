@@ -0,0 +1,182 @@
+"""
+Per-run CPU and memory profiling.
+
+RunProfiler wraps a run in cProfile (--profile) and/or tracemalloc
+(--memprofile), writes sorted hotspot and top-allocation reports next to the
+outputs, and splits wall time between local code and LLM calls using the
+crewAI LLM call events.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent
+
+from veloraplan.artifacts import atomic_write
+from veloraplan.events import register_handlers, unregister_handlers
+
+DEFAULT_TOP = 30
+
+class RunProfiler:
+    """Context manager that profiles one run and writes its reports"""
+
+    def __init__(self, name: str = "run", output_dir: str = "outputs", cpu: bool = False,
+                 memory: bool = False, top: int = DEFAULT_TOP):
+        self.name = name
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.report_paths: List[str] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._handlers = []
+        self._lock = threading.Lock()
+        self._llm_started: Dict[int, float] = {}
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+        self.started_at = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.cpu or self.memory
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        self._attach()
+        if self.memory:
+            tracemalloc.start()
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.enabled:
+            return False
+        self.wall_seconds = time.perf_counter() - self.started_at
+        if self._profile is not None:
+            self._profile.disable()
+        snapshot, peak = None, 0
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self._detach()
+
+        try:
+            self._write_reports(snapshot, peak)
+        except Exception as e:
+            print(f"⚠️  Could not write profiling reports: {e}")
+        return False
+
+    # --- LLM wait tracking ---
+    def _attach(self):
+        self._handlers = [
+            (LLMCallStartedEvent, self._on_llm_started),
+            (LLMCallCompletedEvent, self._on_llm_finished),
+            (LLMCallFailedEvent, self._on_llm_finished)
+        ]
+        register_handlers(self._handlers)
+
+    def _detach(self):
+        unregister_handlers(self._handlers)
+        self._handlers = []
+
+    def _on_llm_started(self, source, event):
+        with self._lock:
+            self._llm_started[threading.get_ident()] = time.perf_counter()
+
+    def _on_llm_finished(self, source, event):
+        with self._lock:
+            started = self._llm_started.pop(threading.get_ident(), None)
+            if started is not None:
+                self.llm_seconds += time.perf_counter() - started
+                self.llm_calls += 1
+
+    # --- Reports ---
+    def time_split(self) -> Dict[str, float]:
+        """Wall time split into LLM calls and everything else"""
+        llm = min(self.llm_seconds, self.wall_seconds)
+        return {
+            "wall_seconds": self.wall_seconds,
+            "llm_seconds": llm,
+            "local_seconds": self.wall_seconds - llm,
+            "llm_calls": self.llm_calls
+        }
+
+    def _time_split_lines(self) -> List[str]:
+        split = self.time_split()
+        wall = split["wall_seconds"] or 1.0
+        return [
+            f"Wall time: {split['wall_seconds']:.2f}s",
+            f"LLM calls: {split['llm_calls']} taking {split['llm_seconds']:.2f}s "
+            f"({100 * split['llm_seconds'] / wall:.1f}%)",
+            f"Local code: {split['local_seconds']:.2f}s ({100 * split['local_seconds'] / wall:.1f}%)"
+        ]
+
+    def _write_reports(self, snapshot, peak: int):
+        os.makedirs(self.output_dir, exist_ok=True)
+        header = [f"# Profile: {self.name} ({self.timestamp})", ""] + self._time_split_lines() + [""]
+
+        if self._profile is not None:
+            stats_path = os.path.join(self.output_dir, f"profile_{self.name}_{self.timestamp}.prof")
+            self._profile.dump_stats(stats_path)
+            buffer = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=buffer).strip_dirs()
+            buffer.write(f"## Top {self.top} by cumulative time\n")
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            buffer.write(f"\n## Top {self.top} by own time\n")
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+            path = atomic_write(os.path.join(self.output_dir, f"profile_{self.name}_{self.timestamp}.txt"),
+                                "\n".join(header) + "\n" + buffer.getvalue())
+            self.report_paths += [path, stats_path]
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+            ))
+            statistics = snapshot.statistics("lineno")
+            total = sum(stat.size for stat in statistics)
+            lines = header + [
+                f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+                f"Live at end of run: {total / 1024 / 1024:.1f} MiB in {len(statistics):,} allocation sites",
+                "",
+                f"## Top {self.top} allocation sites",
+            ]
+            for rank, stat in enumerate(statistics[:self.top], 1):
+                frame = stat.traceback[0]
+                lines.append(f"{rank:>3}. {stat.size / 1024:>10.1f} KiB {stat.count:>8,} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+            path = atomic_write(os.path.join(self.output_dir, f"memprofile_{self.name}_{self.timestamp}.txt"),
+                                "\n".join(lines) + "\n")
+            self.report_paths.append(path)
+
+        print(f"\n🔬 PROFILE ({self.name}):")
+        for line in self._time_split_lines():
+            print(f"   {line}")
+        if snapshot is not None:
+            print(f"   Peak traced memory: {peak / 1024 / 1024:.1f} MiB")
+        for path in self.report_paths:
+            print(f"   Report: {path}")
+
+def profiler_from_argv(name: str, argv: List[str] = None) -> RunProfiler:
+    """Build a RunProfiler from --profile / --memprofile flags"""
+    argv = sys.argv if argv is None else argv
+    return RunProfiler(name=name, cpu="--profile" in argv, memory="--memprofile" in argv)
+
+def positional_args(argv: List[str] = None) -> List[str]:
+    """Command-line arguments without --flags"""
+    argv = sys.argv if argv is None else argv
+    return [arg for arg in argv[1:] if not arg.startswith("--")]
@@ -1,12 +1,61 @@
-import yaml
+import math
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
-from veloraplan.models import ProjectConfig, ProjectStatus, Deliverable
+from typing import Dict, Any, Hashable, List, Optional, Tuple, Union
+from veloraplan.models import ProjectConfig, ProjectStatus, Deliverable, Risk, ResourceAllocation
+from veloraplan.tables import render_table
+from veloraplan.evm import EVMEngine
+from veloraplan.deliverable_store import DeliverableStore
+from veloraplan.work_calendar import get_calendar
+from veloraplan.config_validation import format_errors, load_with_warnings
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DEFAULT_CONFIG_PATH = PROJECT_ROOT / 'config' / 'project_config.yaml'
 
+# Ordinal scale used to rank risks by likelihood x impact
+RISK_LEVELS = {"Low": 1, "Medium": 2, "High": 3}
+
+# Keys of ProjectLoader.get_crew_inputs(), usable as {placeholders} in agents.yaml and tasks.yaml
+CREW_INPUT_KEYS = (
+    "project_id", "current_year", "project_title", "objectives", "type", "urgency", "sponsor",
+    "business_value", "technical_complexity", "resource_availability", "timeline_pressure", "total_score",
+    "budget", "start_date", "end_date", "business_need", "scope_includes", "scope_excludes",
+    "assumptions", "constraints", "stakeholders"
+)
+
+class KeyIndex:
+    """Secondary index mapping a key to an insertion-ordered set of item ids"""
+    
+    def __init__(self):
+        self._buckets: Dict[Hashable, Dict[Hashable, None]] = {}
+    
+    def add(self, key: Hashable, item_id: Hashable):
+        self._buckets.setdefault(key, {})[item_id] = None
+    
+    def remove(self, key: Hashable, item_id: Hashable):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.pop(item_id, None)
+            if not bucket:
+                del self._buckets[key]
+    
+    def move(self, old_key: Hashable, new_key: Hashable, item_id: Hashable):
+        if old_key != new_key:
+            self.remove(old_key, item_id)
+            self.add(new_key, item_id)
+    
+    def get(self, key: Hashable) -> List[Hashable]:
+        return list(self._buckets.get(key, ()))
+    
+    def has(self, key: Hashable, item_id: Hashable) -> bool:
+        return item_id in self._buckets.get(key, ())
+    
+    def count(self, key: Hashable) -> int:
+        return len(self._buckets.get(key, ()))
+    
+    def keys(self) -> List[Hashable]:
+        return list(self._buckets)
+
 class ProjectLoader:
     """Loads and manages project configuration for CrewAI system"""
     
@@ -14,24 +63,74 @@ class ProjectLoader:
         self.config_path = str(DEFAULT_CONFIG_PATH if config_path is None else config_path)
         self.config: Optional[ProjectConfig] = None
         self.status: Optional[ProjectStatus] = None
-        self.deliverables: Dict[str, Deliverable] = {}
+        self.deliverables: Union[Dict[str, Deliverable], DeliverableStore] = {}
+        
+        # Secondary indexes, built at load and kept current by the mutation methods below
+        self.deliverables_by_phase = KeyIndex()
+        self.deliverables_by_status = KeyIndex()
+        self.deliverables_by_owner = KeyIndex()
+        self.risks_by_id: Dict[str, Risk] = {}
+        self.risks_by_level = KeyIndex()
+        self.resources_by_role: Dict[str, ResourceAllocation] = {}
+        self.warnings: List[Dict[str, Any]] = []
         
     def load_config(self) -> ProjectConfig:
         """Load project configuration from YAML file"""
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
         
-        with open(self.config_path, 'r', encoding='utf-8') as file:
-            data = yaml.safe_load(file)
+        # Single-pass parse; raises ConfigValidationError only for what ProjectConfig would reject.
+        # Cross-check problems (run validate_config for the strict view) are reported as warnings.
+        data, self.warnings = load_with_warnings(self.config_path)
+        if self.warnings:
+            print(f"⚠️  {len(self.warnings)} consistency warning(s) in {self.config_path}:")
+            print(format_errors(self.warnings, str(self.config_path)))
         
         self.config = ProjectConfig(**data)
+        self._build_config_indexes()
         return self.config
     
-    def initialize_deliverables(self) -> Dict[str, Deliverable]:
-        """Initialize deliverables from project phases"""
+    def _build_config_indexes(self):
+        """Index risks by id and likelihood x impact, and resources by role"""
+        self.risks_by_id = {}
+        self.risks_by_level = KeyIndex()
+        for risk in self.config.risks:
+            self.risks_by_id[risk.id] = risk
+            self.risks_by_level.add((risk.likelihood, risk.impact), risk.id)
+        
+        self.resources_by_role = {resource.role: resource for resource in self.config.resource_allocation}
+    
+    def _build_deliverable_indexes(self):
+        """Index deliverables by phase, status and owner"""
+        self.deliverables_by_phase = KeyIndex()
+        self.deliverables_by_status = KeyIndex()
+        self.deliverables_by_owner = KeyIndex()
+        
+        if isinstance(self.deliverables, DeliverableStore):
+            fields = self.deliverables.iter_index_fields()
+        else:
+            fields = ((name, d.phase, d.status, d.owner) for name, d in self.deliverables.items())
+        
+        for name, phase, status, owner in fields:
+            self.deliverables_by_phase.add(phase, name)
+            self.deliverables_by_status.add(status, name)
+            self.deliverables_by_owner.add(owner, name)
+    
+    def initialize_deliverables(self, compact: bool = False) -> Union[Dict[str, Deliverable], DeliverableStore]:
+        """Initialize deliverables from project phases.
+        
+        With compact=True the deliverables are kept in a columnar
+        DeliverableStore, which has the same lookup API but builds
+        Deliverable models only when they are read.
+        """
         if not self.config:
             raise ValueError("Configuration must be loaded first")
         
+        if compact:
+            self.deliverables = DeliverableStore.from_config(self.config)
+            self._build_deliverable_indexes()
+            return self.deliverables
+        
         self.deliverables = {}
         for phase in self.config.project_phases:
             for deliverable_name in phase.deliverables:
@@ -45,8 +144,118 @@ class ProjectLoader:
                 )
                 self.deliverables[deliverable_name] = deliverable
         
+        self._build_deliverable_indexes()
         return self.deliverables
     
+    # --- Indexed queries ---
+    def get_deliverables_by_phase(self, phase: str) -> List[str]:
+        """Get deliverable names in a phase"""
+        return self.deliverables_by_phase.get(phase)
+    
+    def get_deliverables_by_status(self, status: str) -> List[str]:
+        """Get deliverable names with a status"""
+        return self.deliverables_by_status.get(status)
+    
+    def get_deliverables_by_owner(self, owner: Optional[str]) -> List[str]:
+        """Get deliverable names assigned to an owner (None for unassigned)"""
+        return self.deliverables_by_owner.get(owner)
+    
+    def get_risks_by_level(self, likelihood: str, impact: str) -> List[Risk]:
+        """Get risks with the given likelihood and impact"""
+        return [self.risks_by_id[risk_id] for risk_id in self.risks_by_level.get((likelihood, impact))]
+    
+    def get_risks_by_min_score(self, min_score: int) -> List[Risk]:
+        """Get risks whose likelihood x impact score is at least min_score, highest first"""
+        levels = [
+            (RISK_LEVELS.get(likelihood, 0) * RISK_LEVELS.get(impact, 0), (likelihood, impact))
+            for likelihood, impact in self.risks_by_level.keys()
+        ]
+        risks = []
+        for score, level in sorted(levels, reverse=True):
+            if score >= min_score:
+                risks.extend(self.get_risks_by_level(*level))
+        return risks
+    
+    def get_resource(self, role: str) -> Optional[ResourceAllocation]:
+        """Get the resource allocation for a role"""
+        return self.resources_by_role.get(role)
+    
+    # --- Mutations that keep the indexes current ---
+    def _deliverable_fields(self, name: str) -> Tuple[str, str, Optional[str]]:
+        if isinstance(self.deliverables, DeliverableStore):
+            return self.deliverables.phase_of(name), self.deliverables.status_of(name), self.deliverables.owner_of(name)
+        deliverable = self.deliverables[name]
+        return deliverable.phase, deliverable.status, deliverable.owner
+    
+    def update_deliverable_status(self, name: str, status: str):
+        """Change a deliverable's status"""
+        _, old_status, _ = self._deliverable_fields(name)
+        if isinstance(self.deliverables, DeliverableStore):
+            self.deliverables.set_status(name, status)
+        else:
+            self.deliverables[name].status = status
+        self.deliverables_by_status.move(old_status, status, name)
+    
+    def assign_deliverable_owner(self, name: str, owner: Optional[str]):
+        """Assign (or clear) a deliverable's owner"""
+        _, _, old_owner = self._deliverable_fields(name)
+        if isinstance(self.deliverables, DeliverableStore):
+            self.deliverables.set_owner(name, owner)
+        else:
+            self.deliverables[name].owner = owner
+        self.deliverables_by_owner.move(old_owner, owner, name)
+    
+    def add_deliverable(self, deliverable: Deliverable):
+        """Add or replace a deliverable"""
+        if deliverable.name in self.deliverables:
+            self.remove_deliverable(deliverable.name)
+        self.deliverables[deliverable.name] = deliverable
+        self.deliverables_by_phase.add(deliverable.phase, deliverable.name)
+        self.deliverables_by_status.add(deliverable.status, deliverable.name)
+        self.deliverables_by_owner.add(deliverable.owner, deliverable.name)
+    
+    def remove_deliverable(self, name: str):
+        """Remove a deliverable from the deliverable set and the indexes"""
+        phase, status, owner = self._deliverable_fields(name)
+        self.deliverables_by_phase.remove(phase, name)
+        self.deliverables_by_status.remove(status, name)
+        self.deliverables_by_owner.remove(owner, name)
+        if isinstance(self.deliverables, DeliverableStore):
+            self.deliverables.remove(name)
+        else:
+            del self.deliverables[name]
+    
+    def add_risk(self, risk: Risk):
+        """Add or replace a risk in the register"""
+        if risk.id in self.risks_by_id:
+            self.remove_risk(risk.id)
+        self.config.risks.append(risk)
+        self.risks_by_id[risk.id] = risk
+        self.risks_by_level.add((risk.likelihood, risk.impact), risk.id)
+    
+    def update_risk_level(self, risk_id: str, likelihood: str, impact: str):
+        """Re-rate a risk's likelihood and impact"""
+        risk = self.risks_by_id[risk_id]
+        self.risks_by_level.move((risk.likelihood, risk.impact), (likelihood, impact), risk_id)
+        risk.likelihood = likelihood
+        risk.impact = impact
+    
+    def remove_risk(self, risk_id: str):
+        """Remove a risk from the register"""
+        risk = self.risks_by_id.pop(risk_id)
+        self.risks_by_level.remove((risk.likelihood, risk.impact), risk_id)
+        self.config.risks = [r for r in self.config.risks if r.id != risk_id]
+    
+    def set_resource_allocation(self, role: str, allocation: List[int]):
+        """Set a role's FTE allocation, adding the role if it is new"""
+        resource = self.resources_by_role.get(role)
+        if resource is None:
+            resource = ResourceAllocation(role=role, allocation=allocation)
+            self.config.resource_allocation.append(resource)
+            self.resources_by_role[role] = resource
+        else:
+            resource.allocation = allocation
+    
     def initialize_status(self) -> ProjectStatus:
         """Initialize project status"""
         if not self.config:
@@ -97,29 +306,56 @@ class ProjectLoader:
         if not self.config:
             raise ValueError("Configuration must be loaded first")
         
+        # Phases run back to back from the charter start; duration_days are working days
+        schedule = get_calendar().schedule(
+            self.config.project_charter.start_date,
+            [phase.duration_days for phase in self.config.project_phases]
+        )
         phases_info = {}
-        for phase in self.config.project_phases:
+        for phase, (start, end) in zip(self.config.project_phases, schedule):
             phases_info[phase.name] = {
                 "duration_days": phase.duration_days,
-                "deliverables": phase.deliverables,
-                "duration_weeks": phase.duration_days // 7
+                "deliverables": self.get_deliverables_by_phase(phase.name),
+                "duration_weeks": math.ceil(phase.duration_days / 5),  # Five working days per week
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat()
             }
         
         return phases_info
     
+    def get_deliverable_summary(self) -> str:
+        """Get formatted deliverable status per phase, read from the deliverable indexes"""
+        if not self.config:
+            raise ValueError("Configuration must be loaded first")
+        
+        statuses = ("Completed", "In Progress", "Delayed")
+        
+        def rows():
+            for phase in self.config.project_phases:
+                names = self.get_deliverables_by_phase(phase.name)
+                counts = [sum(self.deliverables_by_status.has(status, name) for name in names) for status in statuses]
+                unassigned = sum(self.deliverables_by_owner.has(None, name) for name in names)
+                yield (phase.name, len(names), *counts, unassigned)
+            
+            totals = [self.deliverables_by_status.count(status) for status in statuses]
+            yield ("**Total**", len(self.deliverables), *totals, self.deliverables_by_owner.count(None))
+        
+        return render_table(["Phase", "Deliverables", *statuses, "Unassigned"], rows(),
+                            title="## Deliverable Status")
+    
     def get_risk_summary(self) -> str:
         """Get formatted risk summary"""
         if not self.config:
             raise ValueError("Configuration must be loaded first")
         
-        risk_summary = "## Risk Register\n\n"
+        lines = ["## Risk Register\n"]
         for risk in self.config.risks:
-            risk_summary += f"**{risk.id}: {risk.description}**\n"
-            risk_summary += f"- Likelihood: {risk.likelihood}\n"
-            risk_summary += f"- Impact: {risk.impact}\n"
-            risk_summary += f"- Mitigation: {risk.mitigation}\n\n"
+            lines.append(f"**{risk.id}: {risk.description}**")
+            lines.append(f"- Likelihood: {risk.likelihood}")
+            lines.append(f"- Impact: {risk.impact}")
+            lines.append(f"- Mitigation: {risk.mitigation}\n")
         
-        return risk_summary
+        return "\n".join(lines) + "\n"
     
     def get_prioritization_summary(self) -> str:
         """Get formatted prioritization summary"""
@@ -129,80 +365,84 @@ class ProjectLoader:
         # Sort by score descending
         sorted_items = sorted(self.config.prioritization_analysis, key=lambda x: x.score, reverse=True)
         
-        prioritization_summary = "## Prioritization Analysis\n\n"
-        prioritization_summary += "| Item | Impact | Urgency | Complexity | Score |\n"
-        prioritization_summary += "|------|--------|---------|------------|-------|\n"
-        
-        for item in sorted_items:
-            prioritization_summary += f"| {item.item} | {item.impact} | {item.urgency} | {item.complexity} | {item.score} |\n"
-        
-        return prioritization_summary
+        return render_table(
+            ["Item", "Impact", "Urgency", "Complexity", "Score"],
+            ((item.item, item.impact, item.urgency, item.complexity, item.score) for item in sorted_items),
+            title="## Prioritization Analysis"
+        )
     
     def get_resource_summary(self) -> str:
         """Get formatted resource allocation summary"""
         if not self.config:
             raise ValueError("Configuration must be loaded first")
         
-        resource_summary = "## Resource Allocation\n\n"
-        resource_summary += "| Role | Total FTE | Peak FTE |\n"
-        resource_summary += "|------|-----------|----------|\n"
-        
-        for resource in self.config.resource_allocation:
-            total_fte = sum(resource.allocation)
-            peak_fte = max(resource.allocation)
-            resource_summary += f"| {resource.role} | {total_fte} | {peak_fte} |\n"
-        
-        return resource_summary
+        return render_table(
+            ["Role", "Total FTE", "Peak FTE"],
+            ((resource.role, sum(resource.allocation), max(resource.allocation)) for resource in self.config.resource_allocation),
+            title="## Resource Allocation"
+        )
     
     def get_financial_summary(self) -> str:
         """Get formatted financial summary"""
         if not self.config:
             raise ValueError("Configuration must be loaded first")
         
-        financial_summary = "## Financial Summary\n\n"
-        financial_summary += "| Category | Planned | Actual | Variance |\n"
-        financial_summary += "|----------|---------|--------|----------|\n"
-        
-        total_planned = 0
-        total_actual = 0
-        
-        for financial in self.config.financials:
-            planned = financial.planned
-            actual = financial.actual or 0
-            variance = financial.variance or (actual - planned)
+        def rows():
+            total_planned = 0
+            total_actual = 0
             
-            total_planned += planned
-            total_actual += actual
+            for financial in self.config.financials:
+                planned = financial.planned
+                actual = financial.actual or 0
+                variance = financial.variance or (actual - planned)
+                
+                total_planned += planned
+                total_actual += actual
+                
+                yield (financial.category, f"${planned:,.0f}", f"${actual:,.0f}", f"${variance:,.0f}")
             
-            financial_summary += f"| {financial.category} | ${planned:,.0f} | ${actual:,.0f} | ${variance:,.0f} |\n"
+            yield ("**Total**", f"**${total_planned:,.0f}**", f"**${total_actual:,.0f}**", f"**${total_actual - total_planned:,.0f}**")
         
-        financial_summary += f"| **Total** | **${total_planned:,.0f}** | **${total_actual:,.0f}** | **${total_actual - total_planned:,.0f}** |\n"
+        return render_table(["Category", "Planned", "Actual", "Variance"], rows(), title="## Financial Summary")
+    
+    def get_evm_summary(self, as_of: str = None) -> str:
+        """Get formatted earned value summary per category"""
+        if not self.config or not self.status:
+            raise ValueError("Configuration and status must be initialized first")
         
-        return financial_summary
+        metrics = EVMEngine(self.config).compute(self.status, as_of)
+        
+        def fmt_index(value):
+            return "n/a" if value != value else f"{value:.2f}"
+        
+        rows = (
+            (category, f"${m['pv']:,.0f}", f"${m['ev']:,.0f}", f"${m['ac']:,.0f}", fmt_index(m['cpi']),
+             fmt_index(m['spi']), f"${m['eac']:,.0f}", f"${m['etc']:,.0f}")
+            for category, m in metrics.items()
+        )
+        
+        return render_table(["Category", "PV", "EV", "AC", "CPI", "SPI", "EAC", "ETC"], rows, title="## Earned Value Summary")
     
     def get_stakeholder_communication_plan(self) -> str:
         """Get formatted stakeholder communication plan"""
         if not self.config:
             raise ValueError("Configuration must be loaded first")
         
-        comm_plan = "## Stakeholder Communication Plan\n\n"
-        comm_plan += "| Stakeholder | Needs | Frequency | Channel |\n"
-        comm_plan += "|-------------|-------|-----------|---------|\n"
-        
-        for comm in self.config.stakeholder_communications:
-            comm_plan += f"| {comm.stakeholder} | {comm.needs} | {comm.frequency} | {comm.channel} |\n"
-        
-        return comm_plan
+        return render_table(
+            ["Stakeholder", "Needs", "Frequency", "Channel"],
+            ((comm.stakeholder, comm.needs, comm.frequency, comm.channel) for comm in self.config.stakeholder_communications),
+            title="## Stakeholder Communication Plan"
+        )
 
 def load_project_config(config_path: str = None) -> ProjectConfig:
     """Convenience function to load project configuration"""
     loader = ProjectLoader(config_path)
     return loader.load_config()
 
-def create_project_loader(config_path: str = None) -> ProjectLoader:
+def create_project_loader(config_path: str = None, compact_deliverables: bool = False) -> ProjectLoader:
     """Create and initialize a project loader"""
     loader = ProjectLoader(config_path)
     loader.load_config()
-    loader.initialize_deliverables()
+    loader.initialize_deliverables(compact=compact_deliverables)
     loader.initialize_status()
     return loader 
\ No newline at end of file
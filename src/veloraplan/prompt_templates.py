@@ -0,0 +1,147 @@
+"""
+Prompt templates for agents.yaml and tasks.yaml, compiled once.
+
+Each role, goal, backstory, description and expected_output string is parsed
+into literal text and placeholders when the YAML is first loaded. At that point
+every placeholder is checked against the keys that
+ProjectLoader.get_crew_inputs() provides, so a typo fails before any crew is
+built instead of raising a KeyError in the middle of a batch. Placeholders
+use str.format syntax, including format specs and conversions such as
+{budget:,.0f} or {project_title!r}; {project_type} is an alias for {type}.
+
+Rendered prompts are cached per template on the values of the placeholders
+that template actually uses. Templates that use no placeholders, or only
+ones that are the same across projects, are therefore rendered once per
+process.
+"""
+import string
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from veloraplan.metrics import CACHE_REQUESTS
+from veloraplan.project_loader import CREW_INPUT_KEYS
+
+# Placeholder name -> crew input key
+PLACEHOLDER_ALIASES = {"project_type": "type"}
+# Used when an input is missing, e.g. the fallback inputs without a loaded config
+INPUT_DEFAULTS = {"type": "Transformation"}
+MISSING_VALUE = "TBD"
+AGENT_FIELDS = ("role", "goal", "backstory")
+TASK_FIELDS = ("description", "expected_output")
+DEFAULT_CACHE_SIZE = 256
+
+class PromptTemplateError(ValueError):
+    """Raised with every invalid placeholder found while compiling templates"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__(f"{len(problems)} invalid prompt placeholder(s):\n" + "\n".join(f"  {p}" for p in problems))
+
+class PromptTemplate:
+    """A str.format template parsed once and checked against the known input keys"""
+
+    _formatter = string.Formatter()
+
+    def __init__(self, name: str, text: str, known_keys: Iterable[str] = CREW_INPUT_KEYS,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.name = name
+        self.text = text
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        # (literal text, input key or None, conversion, format spec)
+        self._parts: List[Tuple[str, Optional[str], Optional[str], str]] = []
+        self.problems: List[str] = []
+
+        known = set(known_keys)
+        try:
+            parsed = list(self._formatter.parse(text))
+        except ValueError as e:
+            self.problems.append(f"{name}: {e} (write literal braces as {{{{ and }}}})")
+            parsed = [(text, None, None, None)]
+        for literal, field, spec, conversion in parsed:
+            if field is None:
+                self._parts.append((literal, None, None, ""))
+                continue
+            key = PLACEHOLDER_ALIASES.get(field, field)
+            if not field or not field.isidentifier():
+                self.problems.append(f"{name}: placeholder {{{field}}} must be a plain input name")
+            elif key not in known:
+                self.problems.append(f"{name}: unknown placeholder {{{field}}}; "
+                                     f"available: {', '.join(sorted(known | set(PLACEHOLDER_ALIASES)))}")
+            elif spec and "{" in spec:
+                self.problems.append(f"{name}: nested placeholders in {{{field}:{spec}}} are not supported")
+            self._parts.append((literal, key, conversion, spec or ""))
+        self.keys = tuple(dict.fromkeys(key for _, key, _, _ in self._parts if key))
+        self._static = "".join(literal for literal, _, _, _ in self._parts)
+
+    def cache_key(self, inputs: Dict[str, Any]) -> tuple:
+        """The values this template depends on"""
+        return tuple(inputs.get(key, INPUT_DEFAULTS.get(key, MISSING_VALUE)) for key in self.keys)
+
+    def _render(self, values: tuple) -> str:
+        lookup = dict(zip(self.keys, values))
+        out = []
+        for literal, key, conversion, spec in self._parts:
+            out.append(literal)
+            if key is not None:
+                value = self._formatter.convert_field(lookup[key], conversion)
+                try:
+                    out.append(format(value, spec))
+                except (TypeError, ValueError):
+                    # e.g. a numeric spec on a missing value: show it plainly
+                    out.append(str(value))
+        return "".join(out)
+
+    def render(self, inputs: Dict[str, Any]) -> str:
+        if not self.keys:
+            return self._static
+        values = self.cache_key(inputs)
+        try:
+            hash(values)
+        except TypeError:
+            return self._render(values)
+        with self._lock:
+            if values in self._cache:
+                self._cache.move_to_end(values)
+                CACHE_REQUESTS.inc(cache="prompt_template", result="hit")
+                return self._cache[values]
+        CACHE_REQUESTS.inc(cache="prompt_template", result="miss")
+        rendered = self._render(values)
+        with self._lock:
+            self._cache[values] = rendered
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rendered
+
+class TemplateSet:
+    """Compiled templates for every entry of agents.yaml or tasks.yaml"""
+
+    def __init__(self, config: Dict[str, dict], fields: Iterable[str], source: str = "",
+                 known_keys: Iterable[str] = CREW_INPUT_KEYS):
+        self.config = config
+        self.templates: Dict[str, Dict[str, PromptTemplate]] = {}
+        problems = []
+        for entry, entry_config in config.items():
+            compiled = {}
+            for field in fields:
+                if isinstance(entry_config.get(field), str):
+                    template = PromptTemplate(f"{source}{entry}.{field}", entry_config[field], known_keys)
+                    problems += template.problems
+                    compiled[field] = template
+            self.templates[entry] = compiled
+        if problems:
+            raise PromptTemplateError(problems)
+        self.keys = tuple(dict.fromkeys(key for compiled in self.templates.values()
+                                        for template in compiled.values() for key in template.keys))
+
+    def cache_key(self, inputs: Dict[str, Any]) -> tuple:
+        """The input values any template in the set depends on, e.g. for caching objects built from them"""
+        return tuple((key, str(inputs.get(key, INPUT_DEFAULTS.get(key, MISSING_VALUE)))) for key in self.keys)
+
+    def render(self, entry: str, field: str, inputs: Dict[str, Any]) -> str:
+        return self.templates[entry][field].render(inputs)
+
+    def items(self):
+        return self.config.items()
@@ -0,0 +1,198 @@
+"""
+Adaptive rate limiting for LLM calls.
+
+Tracks requests per minute and tokens per minute with two token buckets,
+shrinks the effective rate when the API answers 429 and grows it back on
+success. State can live in a small JSON file guarded by a file lock so that
+several processes of a batch run share one quota.
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to per-process limiting
+    fcntl = None
+
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200000
+
+class RateLimitExceeded(Exception):
+    """Raised when a call still hits the rate limit after all retries"""
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is a 429 / rate limit response"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None)
+    return status_code == 429 or "RateLimit" in type(error).__name__
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Get the Retry-After delay in seconds from an API error, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class AdaptiveRateLimiter:
+    """Token-bucket limiter over requests and tokens per minute with adaptive backoff"""
+
+    # Effective rate is quota * rate_factor; 429s halve it, successes restore it slowly
+    DECREASE_FACTOR = 0.5
+    INCREASE_STEP = 0.05
+    MIN_RATE_FACTOR = 0.1
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+                 state_path: str = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+
+    def _initial_state(self) -> Dict[str, float]:
+        return {
+            "requests": float(self.requests_per_minute),
+            "tokens": float(self.tokens_per_minute),
+            "rate_factor": 1.0,
+            "blocked_until": 0.0,
+            "updated": time.time()
+        }
+
+    @contextmanager
+    def _locked_state(self):
+        """Yield the bucket state under a thread lock and, if shared, a file lock"""
+        with self._lock:
+            if not self.state_path or fcntl is None:
+                yield self._state
+                return
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            with open(self.state_path, "a+", encoding="utf-8") as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    file.seek(0)
+                    raw = file.read()
+                    state = json.loads(raw) if raw.strip() else self._initial_state()
+                    yield state
+                    file.seek(0)
+                    file.truncate()
+                    json.dump(state, file)
+                    file.flush()
+                finally:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _refill(self, state: Dict[str, float], now: float):
+        """Refill both buckets for the time elapsed since the last update"""
+        elapsed = max(0.0, now - state["updated"])
+        factor = state["rate_factor"]
+        request_capacity = self.requests_per_minute * factor
+        token_capacity = self.tokens_per_minute * factor
+        state["requests"] = min(request_capacity, state["requests"] + elapsed * request_capacity / 60)
+        state["tokens"] = min(token_capacity, state["tokens"] + elapsed * token_capacity / 60)
+        state["updated"] = now
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request and the given number of tokens are available.
+
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                self._refill(state, now)
+                factor = state["rate_factor"]
+                # A single call never needs more than the (reduced) bucket can hold
+                tokens = min(tokens, self.tokens_per_minute * factor)
+
+                if now < state["blocked_until"]:
+                    wait = state["blocked_until"] - now
+                elif state["requests"] >= 1 and state["tokens"] >= tokens:
+                    state["requests"] -= 1
+                    state["tokens"] -= tokens
+                    return waited
+                else:
+                    request_wait = max(0.0, 1 - state["requests"]) * 60 / (self.requests_per_minute * factor)
+                    token_wait = max(0.0, tokens - state["tokens"]) * 60 / (self.tokens_per_minute * factor)
+                    wait = max(request_wait, token_wait)
+
+            wait = min(wait, 60.0)
+            time.sleep(wait)
+            waited += wait
+
+    def record_success(self, reserved_tokens: int = 0, used_tokens: int = None):
+        """Return unused reserved tokens and nudge the rate back towards the quota"""
+        with self._locked_state() as state:
+            if used_tokens is not None and used_tokens < reserved_tokens:
+                state["tokens"] += reserved_tokens - used_tokens
+            state["rate_factor"] = min(1.0, state["rate_factor"] + self.INCREASE_STEP)
+
+    def record_rate_limit(self, retry_after: float = None):
+        """Halve the effective rate and pause all callers after a 429"""
+        with self._locked_state() as state:
+            state["rate_factor"] = max(self.MIN_RATE_FACTOR, state["rate_factor"] * self.DECREASE_FACTOR)
+            state["requests"] = 0.0
+            if retry_after:
+                state["blocked_until"] = max(state["blocked_until"], time.time() + retry_after)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get the current bucket levels and effective rate factor"""
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            return dict(state)
+
+    def call(self, fn: Callable[..., Any], *args, estimated_tokens: int = 0,
+             max_retries: int = 5, token_counter: Callable[[Any], int] = None, **kwargs) -> Any:
+        """Call fn under the limiter, retrying 429s with Retry-After or jittered backoff"""
+        for attempt in range(max_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                retry_after = get_retry_after(e)
+                self.record_rate_limit(retry_after)
+                if attempt == max_retries:
+                    raise RateLimitExceeded(f"Rate limited after {max_retries} retries: {e}") from e
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                print(f"⏳ Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+                time.sleep(delay)
+                continue
+
+            used_tokens = token_counter(result) if token_counter else None
+            self.record_success(estimated_tokens, used_tokens)
+            return result
+
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Get the process-wide rate limiter configured from the environment"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter(
+                requests_per_minute=int(os.getenv("OPENAI_RPM_LIMIT", DEFAULT_REQUESTS_PER_MINUTE)),
+                tokens_per_minute=int(os.getenv("OPENAI_TPM_LIMIT", DEFAULT_TOKENS_PER_MINUTE)),
+                state_path=os.getenv("RATE_LIMIT_STATE_FILE") or None
+            )
+        return _rate_limiter
@@ -0,0 +1,264 @@
+"""
+Portfolio roadmap: one Mermaid Gantt chart across many projects.
+
+All phases of all projects are scheduled in one vectorized pass on the
+working-day calendar (WorkCalendar.schedule_many), grouped into a section per
+program, and emitted line by line. Mermaid renderers slow down badly past a
+few hundred bars, so the level of detail follows a zoom level:
+
+- phase:   one bar per phase
+- project: one bar per project, from its first phase start to its last phase end
+- program: one bar per program
+- auto:    the most detailed level that fits within max_bars
+
+Within a section, bars beyond max_bars_per_section are folded into one
+"+N more" bar spanning them, so large programs stay readable at any zoom.
+"""
+import os
+import re
+import sys
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+import numpy as np
+
+from veloraplan.intake_scoring import read_intakes
+from veloraplan.work_calendar import _to_date, get_calendar
+
+ZOOM_LEVELS = ("phase", "project", "program")
+DEFAULT_MAX_BARS = 400
+DEFAULT_MAX_BARS_PER_SECTION = 40
+DEFAULT_PROGRAM = "Unassigned"
+DEFAULT_START = "2025-07-01"
+
+def _label(text: Any) -> str:
+    """Bar or section label without characters that break Mermaid gantt syntax"""
+    return re.sub(r"\s+", " ", re.sub(r"[:;#,]", " ", str(text))).strip() or "Untitled"
+
+# --- Input ---
+def project_from_config(path: str) -> Dict[str, Any]:
+    """A portfolio project record from a project_config.yaml file"""
+    from veloraplan.config_validation import format_errors, load_with_warnings
+
+    data, warnings = load_with_warnings(path)
+    if warnings:
+        print(f"⚠️  {len(warnings)} consistency warning(s) in {path}:\n{format_errors(warnings, path)}", file=sys.stderr)
+    charter = data["project_charter"]
+    return {
+        "project_id": os.path.splitext(os.path.basename(path))[0],
+        "title": charter["title"],
+        "program": charter.get("program", DEFAULT_PROGRAM),
+        "start_date": charter["start_date"],
+        "phases": data["project_phases"]
+    }
+
+def group_projects(records: Iterable[dict]) -> Iterator[dict]:
+    """Project records from either nested records (with "phases") or flat one-row-per-phase records"""
+    current = None
+    for record in records:
+        if "phases" in record:
+            if current:
+                yield current
+                current = None
+            yield record
+            continue
+        project_id = record.get("project_id") or record.get("title")
+        if current is None or current["project_id"] != project_id:
+            if current:
+                yield current
+            current = {key: record.get(key) for key in ("project_id", "title", "program", "start_date")}
+            current["project_id"] = project_id
+            current["phases"] = []
+        current["phases"].append({"name": record.get("phase") or record.get("name"),
+                                  "duration_days": record.get("duration_days")})
+    if current:
+        yield current
+
+class Portfolio:
+    """Columnar schedule of every phase in a set of projects"""
+
+    def __init__(self, projects: Iterable[dict], region: str = None):
+        calendar = get_calendar(region)
+        titles, programs, starts = [], [], []
+        phase_names, groups, durations = [], [], []
+        for project in projects:
+            phases = project.get("phases") or []
+            if not phases:
+                continue
+            index = len(titles)
+            titles.append(_label(project.get("title") or project.get("project_title") or project.get("project_id")))
+            programs.append(_label(project.get("program") or DEFAULT_PROGRAM))
+            starts.append(_to_date(project.get("start_date") or DEFAULT_START).toordinal())
+            for phase in phases:
+                phase_names.append(_label(phase.get("name", "Phase")))
+                groups.append(index)
+                try:
+                    durations.append(int(float(phase.get("duration_days") or 0)))
+                except (TypeError, ValueError):
+                    durations.append(0)
+
+        self.titles = titles
+        self.programs = np.array(programs, dtype=object)
+        self.phase_names = phase_names
+        self.groups = np.array(groups, dtype=np.int64)
+        self.phase_starts, self.phase_ends = calendar.schedule_many(starts, self.groups, durations)
+
+        # Project spans: phases are contiguous per project, so take the first start and last end
+        count = len(titles)
+        self.project_starts = np.full(count, np.iinfo(np.int64).max, dtype=np.int64)
+        self.project_ends = np.zeros(count, dtype=np.int64)
+        np.minimum.at(self.project_starts, self.groups, self.phase_starts)
+        np.maximum.at(self.project_ends, self.groups, self.phase_ends)
+
+    @property
+    def project_count(self) -> int:
+        return len(self.titles)
+
+    @property
+    def phase_count(self) -> int:
+        return len(self.phase_names)
+
+    def bar_counts(self) -> Dict[str, int]:
+        return {"phase": self.phase_count, "project": self.project_count,
+                "program": len(set(self.programs.tolist()))}
+
+    def choose_zoom(self, zoom: str, max_bars: int) -> str:
+        if zoom != "auto":
+            if zoom not in ZOOM_LEVELS:
+                raise ValueError(f"Unknown zoom '{zoom}'. Use one of: auto, {', '.join(ZOOM_LEVELS)}")
+            return zoom
+        counts = self.bar_counts()
+        return next((level for level in ZOOM_LEVELS if counts[level] <= max_bars), "program")
+
+    def bars(self, zoom: str) -> Iterator[Tuple[str, str, int, int]]:
+        """(section, label, start ordinal, end ordinal) per bar, by program then start date"""
+        if zoom == "program":
+            for program in sorted(set(self.programs.tolist())):
+                mask = self.programs == program
+                yield (program, f"{program} ({int(mask.sum())} projects)",
+                       int(self.project_starts[mask].min()), int(self.project_ends[mask].max()))
+            return
+
+        if zoom == "project":
+            order = np.lexsort((self.project_starts, self.programs.astype(str)))
+            for index in order:
+                yield (self.programs[index], self.titles[index],
+                       int(self.project_starts[index]), int(self.project_ends[index]))
+            return
+
+        phase_programs = self.programs[self.groups].astype(str)
+        order = np.lexsort((self.phase_starts, self.project_starts[self.groups], phase_programs))
+        for index in order:
+            project = self.groups[index]
+            yield (self.programs[project], f"{self.titles[project]} - {self.phase_names[index]}",
+                   int(self.phase_starts[index]), int(self.phase_ends[index]))
+
+# --- Output ---
+def iter_roadmap_lines(portfolio: Portfolio, zoom: str = "auto", max_bars: int = DEFAULT_MAX_BARS,
+                       max_bars_per_section: int = DEFAULT_MAX_BARS_PER_SECTION,
+                       title: str = "Portfolio Roadmap") -> Iterator[str]:
+    """Mermaid gantt lines for the portfolio, generated lazily"""
+    zoom = portfolio.choose_zoom(zoom, max_bars)
+    yield "gantt"
+    yield f"    title {_label(title)} ({portfolio.project_count} projects, zoom {zoom})"
+    yield "    dateFormat YYYY-MM-DD"
+    yield "    axisFormat %b %Y"
+
+    section, shown, folded = None, 0, []
+    bar_id = 0
+
+    def fold():
+        # One bar spanning everything that did not fit in the section
+        start, end = min(bar[0] for bar in folded), max(bar[1] for bar in folded)
+        return (f"    +{len(folded)} more :b{bar_id}, {date.fromordinal(start).isoformat()}, "
+                f"{date.fromordinal(end + 1).isoformat()}")
+
+    for bar_section, label, start, end in portfolio.bars(zoom):
+        if bar_section != section:
+            if folded:
+                yield fold()
+                bar_id += 1
+            section, shown, folded = bar_section, 0, []
+            yield f"    section {bar_section}"
+        if shown >= max_bars_per_section:
+            folded.append((start, end))
+            continue
+        # Mermaid end dates are exclusive, so end the bar on the day after the last working day
+        yield (f"    {label} :b{bar_id}, {date.fromordinal(start).isoformat()}, "
+               f"{date.fromordinal(end + 1).isoformat()}")
+        bar_id += 1
+        shown += 1
+    if folded:
+        yield fold()
+
+def write_roadmap(out: TextIO, portfolio: Portfolio, markdown: bool = False, chunk_lines: int = 1000, **options) -> int:
+    """Stream the roadmap to out in chunks; returns the number of lines written"""
+    count = 0
+    buffer = ["```mermaid"] if markdown else []
+    for line in iter_roadmap_lines(portfolio, **options):
+        buffer.append(line)
+        count += 1
+        if len(buffer) >= chunk_lines:
+            out.write("\n".join(buffer) + "\n")
+            buffer = []
+    if markdown:
+        buffer.append("```")
+    if buffer:
+        out.write("\n".join(buffer) + "\n")
+    return count
+
+def load_projects(paths: List[str], stdin: TextIO = None) -> Iterator[dict]:
+    """Projects from project_config YAML files and JSON, JSONL or CSV portfolio files (stdin if none)"""
+    if not paths:
+        yield from group_projects(read_intakes(stdin or sys.stdin))
+        return
+    for path in paths:
+        if path.lower().endswith((".yaml", ".yml")):
+            yield project_from_config(path)
+            continue
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from group_projects(read_intakes(f, "csv" if path.lower().endswith(".csv") else "jsonl"))
+
+def main():
+    """Build a combined portfolio roadmap
+
+    Usage: roadmap [input ...] [--output PATH] [--zoom auto|phase|project|program]
+                   [--max-bars N] [--max-per-section N] [--region US] [--title TEXT] [--markdown]
+    """
+    args = sys.argv[1:]
+    options, inputs = {}, []
+    i = 0
+    while i < len(args):
+        if args[i] in ("--output", "--zoom", "--max-bars", "--max-per-section", "--region", "--title"):
+            options[args[i]] = args[i + 1]
+            i += 2
+        elif args[i] == "--markdown":
+            options["--markdown"] = True
+            i += 1
+        else:
+            inputs.append(args[i])
+            i += 1
+
+    started = time.perf_counter()
+    portfolio = Portfolio(load_projects(inputs), region=options.get("--region"))
+    output_path = options.get("--output", "-")
+    out = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        lines = write_roadmap(
+            out, portfolio,
+            markdown=options.get("--markdown", output_path.endswith(".md")),
+            zoom=options.get("--zoom", os.getenv("ROADMAP_ZOOM", "auto")),
+            max_bars=int(options.get("--max-bars", os.getenv("ROADMAP_MAX_BARS", DEFAULT_MAX_BARS))),
+            max_bars_per_section=int(options.get("--max-per-section", DEFAULT_MAX_BARS_PER_SECTION)),
+            title=options.get("--title", "Portfolio Roadmap")
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"🗺️  Roadmap: {portfolio.project_count:,} projects, {portfolio.phase_count:,} phases -> "
+          f"{lines:,} lines in {elapsed * 1000:.0f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
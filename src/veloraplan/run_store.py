@@ -0,0 +1,299 @@
+"""
+Content-addressed run history and structured diffs between runs.
+
+Each run's output documents are split into heading sections. Every section is
+stored once as a zlib-compressed blob named by its SHA-256, and a small JSON
+manifest per run lists the blob ids in document order. Volatile lines such as
+the "*Generated on: ...*" footer are kept in the manifest instead of the blob,
+so successive runs share every unchanged section and storage grows with what
+actually changed rather than with the number of runs.
+
+Diffing two runs compares blob ids first, so only changed sections are read.
+Sections holding a markdown table (risks, resources, financials, ...) are
+diffed row by row, keyed on the first column; other sections get a unified
+line diff. Volatile lines such as "*Generated on: ...*" are ignored.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from veloraplan.artifacts import atomic_write
+
+DEFAULT_STORE_PATH = os.path.join("outputs", ".runs")
+HEADING_RE = re.compile(r"^(#{1,3}) +(.+?)\s*$", re.MULTILINE)
+TIMESTAMP_SUFFIX_RE = re.compile(r"_\d{8}_\d{6}(?=\.\w+$)")
+VOLATILE_RE = re.compile(r"^\*?Generated on:.*$|^---$", re.IGNORECASE)
+
+# Sections a reviewer usually cares about, matched against document names and headings
+REVIEW_SECTIONS = {
+    "charter": r"charter|executive summary|objectives|scope|governance",
+    "risk": r"risk",
+    "resource": r"resource",
+    "financial": r"financ|budget|cost"
+}
+
+def document_name(filename: str) -> str:
+    """Document key for an output file: the file name without its run timestamp and extension"""
+    return os.path.splitext(TIMESTAMP_SUFFIX_RE.sub("", os.path.basename(filename)))[0]
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split markdown into (heading, text) sections at #, ## and ### headings; text keeps the heading line"""
+    starts = [match.start() for match in HEADING_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = []
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        chunk = text[start:end]
+        match = HEADING_RE.match(chunk)
+        sections.append((match.group(2) if match else "", chunk))
+    return sections
+
+def _stable_lines(text: str) -> List[str]:
+    return [line for line in text.splitlines() if not VOLATILE_RE.match(line.strip())]
+
+def split_volatile(text: str) -> Tuple[str, List[List[Any]]]:
+    """(text without volatile lines, [[line index, line], ...]) so the stable part can be hashed"""
+    stable, volatile = [], []
+    for index, line in enumerate(text.splitlines(keepends=True)):
+        if VOLATILE_RE.match(line.strip()):
+            volatile.append([index, line])
+        else:
+            stable.append(line)
+    return "".join(stable), volatile
+
+def restore_volatile(stable: str, volatile: List[List[Any]]) -> str:
+    """Inverse of split_volatile"""
+    lines = stable.splitlines(keepends=True)
+    for index, line in volatile:
+        lines.insert(index, line)
+    return "".join(lines)
+
+def parse_table(text: str) -> Optional[Tuple[List[str], Dict[str, List[str]]]]:
+    """(headers, rows keyed by first cell) of the first markdown table in text, or None"""
+    lines = [line.strip() for line in text.splitlines() if line.strip().startswith("|")]
+    if len(lines) < 2 or not re.match(r"^\|[\s:|-]+\|$", lines[1]):
+        return None
+
+    def cells(line: str) -> List[str]:
+        return [cell.strip() for cell in re.split(r"(?<!\\)\|", line.strip("|"))]
+
+    headers = cells(lines[0])
+    rows: Dict[str, List[str]] = {}
+    for line in lines[2:]:
+        row = cells(line)
+        key = row[0] if row else ""
+        while key in rows:
+            key += "'"
+        rows[key] = row
+    return headers, rows
+
+def _keyed(sections: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Heading -> blob id, numbering repeated headings so none are lost"""
+    keyed, seen = {}, {}
+    for section in sections:
+        heading = section["heading"]
+        seen[heading] = seen.get(heading, 0) + 1
+        keyed[heading if seen[heading] == 1 else f"{heading} ({seen[heading]})"] = section["blob"]
+    return keyed
+
+class RunStore:
+    """Stores runs as manifests of deduplicated section blobs"""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.getenv("RUN_STORE_PATH", DEFAULT_STORE_PATH)
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.run_dir = os.path.join(self.root, "runs")
+
+    # --- Blobs ---
+    def _blob_path(self, blob_id: str) -> str:
+        return os.path.join(self.blob_dir, blob_id[:2], blob_id)
+
+    def put_blob(self, text: str) -> Tuple[str, bool]:
+        """Store text once; returns (blob id, whether it was new)"""
+        data = text.encode("utf-8")
+        blob_id = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(blob_id)
+        if os.path.exists(path):
+            return blob_id, False
+        atomic_write(path, zlib.compress(data, 6))
+        return blob_id, True
+
+    def get_blob(self, blob_id: str) -> str:
+        with open(self._blob_path(blob_id), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    # --- Runs ---
+    def save_run(self, documents: Dict[str, str], run_id: str = None) -> Dict[str, Any]:
+        """Store a run's documents (file name or key -> text); returns its manifest"""
+        run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        base, suffix = run_id, 1
+        while os.path.exists(self._manifest_path(run_id)):
+            suffix += 1
+            run_id = f"{base}_{suffix}"
+
+        manifest = {"run_id": run_id, "created": datetime.now().isoformat(timespec="seconds"), "documents": {}}
+        new_blobs = new_bytes = total_bytes = 0
+        for filename, text in sorted(documents.items()):
+            sections = []
+            for heading, chunk in split_sections(text):
+                stable, volatile = split_volatile(chunk)
+                blob_id, is_new = self.put_blob(stable)
+                size = len(stable.encode("utf-8"))
+                total_bytes += size
+                if is_new:
+                    new_blobs += 1
+                    new_bytes += size
+                section = {"heading": heading, "blob": blob_id, "size": size}
+                if volatile:
+                    section["volatile"] = volatile
+                sections.append(section)
+            manifest["documents"][document_name(filename)] = sections
+        manifest["stats"] = {"new_blobs": new_blobs, "new_bytes": new_bytes, "total_bytes": total_bytes}
+        atomic_write(self._manifest_path(run_id), json.dumps(manifest, indent=2))
+        return manifest
+
+    def _manifest_path(self, run_id: str) -> str:
+        return os.path.join(self.run_dir, f"{run_id}.json")
+
+    def list_runs(self) -> List[str]:
+        if not os.path.isdir(self.run_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.run_dir) if name.endswith(".json"))
+
+    def load_run(self, run_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path(run_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown run '{run_id}'. Available: {', '.join(self.list_runs()) or 'none'}")
+
+    def document(self, run_id: str, name: str) -> str:
+        """Reassemble a stored document"""
+        sections = self.load_run(run_id)["documents"][name]
+        return "".join(restore_volatile(self.get_blob(section["blob"]), section.get("volatile", []))
+                       for section in sections)
+
+    # --- Diffs ---
+    def diff_runs(self, old_id: str, new_id: str, only: List[str] = None) -> Dict[str, Any]:
+        """Structured diff between two runs.
+
+        only limits the diff to REVIEW_SECTIONS kinds (charter, risk, resource,
+        financial) matched against document names and section headings.
+        """
+        old, new = self.load_run(old_id), self.load_run(new_id)
+        patterns = [REVIEW_SECTIONS[kind] for kind in only or []]
+        result = {"old": old_id, "new": new_id, "documents": {}}
+
+        for name in sorted(set(old["documents"]) | set(new["documents"])):
+            old_sections = _keyed(old["documents"].get(name, []))
+            new_sections = _keyed(new["documents"].get(name, []))
+            changes = []
+            for heading in list(old_sections) + [h for h in new_sections if h not in old_sections]:
+                if patterns and not any(re.search(pattern, f"{name} {heading}", re.IGNORECASE) for pattern in patterns):
+                    continue
+                old_blob, new_blob = old_sections.get(heading), new_sections.get(heading)
+                if old_blob == new_blob:
+                    continue
+                change = self._diff_section(heading, old_blob, new_blob)
+                if change:
+                    changes.append(change)
+            if changes:
+                result["documents"][name] = changes
+        return result
+
+    def _diff_section(self, heading: str, old_blob: Optional[str], new_blob: Optional[str]) -> Optional[Dict[str, Any]]:
+        if old_blob is None:
+            return {"heading": heading, "status": "added"}
+        if new_blob is None:
+            return {"heading": heading, "status": "removed"}
+
+        old_text, new_text = self.get_blob(old_blob), self.get_blob(new_blob)
+        old_table, new_table = parse_table(old_text), parse_table(new_text)
+        if old_table and new_table:
+            headers = new_table[0]
+            rows = {"added": [], "removed": [], "changed": []}
+            for key, row in new_table[1].items():
+                if key not in old_table[1]:
+                    rows["added"].append(row)
+                elif row != old_table[1][key]:
+                    old_row = old_table[1][key]
+                    cells = {
+                        (headers[i] if i < len(headers) else str(i)): [old_row[i] if i < len(old_row) else "", cell]
+                        for i, cell in enumerate(row) if i >= len(old_row) or old_row[i] != cell
+                    }
+                    rows["changed"].append({"key": key, "cells": cells})
+            rows["removed"] = [row for key, row in old_table[1].items() if key not in new_table[1]]
+            if any(rows.values()):
+                return {"heading": heading, "status": "changed", "table": rows}
+
+        lines = list(difflib.unified_diff(_stable_lines(old_text), _stable_lines(new_text), lineterm="", n=1))[2:]
+        if not lines:
+            return None
+        return {"heading": heading, "status": "changed", "lines": lines}
+
+def format_diff(diff: Dict[str, Any]) -> str:
+    """Render a diff_runs result as markdown"""
+    out = [f"# Changes from run {diff['old']} to {diff['new']}", ""]
+    if not diff["documents"]:
+        out.append("No changes.")
+    for name, changes in diff["documents"].items():
+        out.append(f"## {name}")
+        for change in changes:
+            out.append(f"### {change['heading'] or '(preamble)'}: {change['status']}")
+            table = change.get("table")
+            if table:
+                out += [f"- ➕ {' | '.join(row)}" for row in table["added"]]
+                out += [f"- ➖ {' | '.join(row)}" for row in table["removed"]]
+                for row in table["changed"]:
+                    cells = "; ".join(f"{column}: {old!r} → {new!r}" for column, (old, new) in row["cells"].items())
+                    out.append(f"- ✏️  {row['key']}: {cells}")
+            elif change.get("lines"):
+                out += ["```diff", *change["lines"], "```"]
+            out.append("")
+    return "\n".join(out) + "\n"
+
+def store_enabled() -> bool:
+    return os.getenv("RUN_STORE", "true").lower() == "true"
+
+def main():
+    """Diff two stored runs (default: the last two)
+
+    Usage: diff_runs [old_run new_run] [--only charter,risk,resource,financial] [--json] [--list]
+    """
+    args = sys.argv[1:]
+    store = RunStore()
+    if "--list" in args:
+        for run_id in store.list_runs():
+            stats = store.load_run(run_id).get("stats", {})
+            print(f"{run_id}  {stats.get('new_bytes', 0):>9,} new / {stats.get('total_bytes', 0):>9,} bytes")
+        return
+
+    only = None
+    if "--only" in args:
+        index = args.index("--only")
+        only = [kind.strip() for kind in args[index + 1].split(",") if kind.strip()]
+        unknown = [kind for kind in only if kind not in REVIEW_SECTIONS]
+        if unknown:
+            raise SystemExit(f"❌ Unknown section kind(s): {', '.join(unknown)}. Use: {', '.join(REVIEW_SECTIONS)}")
+        del args[index:index + 2]
+    as_json = "--json" in args
+    run_ids = [arg for arg in args if not arg.startswith("--")]
+
+    if not run_ids:
+        run_ids = store.list_runs()[-2:]
+        if len(run_ids) < 2:
+            raise SystemExit("❌ Need at least two stored runs to diff")
+    if len(run_ids) != 2:
+        raise SystemExit("Usage: diff_runs [old_run new_run] [--only charter,risk,resource,financial] [--json]")
+
+    diff = store.diff_runs(run_ids[0], run_ids[1], only)
+    print(json.dumps(diff, indent=2) if as_json else format_diff(diff))
+
+if __name__ == "__main__":
+    main()
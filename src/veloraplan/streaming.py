@@ -0,0 +1,180 @@
+"""
+Streaming crew output.
+
+Writes LLM tokens to each task's artifact file and to the console as they
+arrive, and splits the Gantt chart and project charter into their own files
+as soon as each section ends, written atomically so a crash never leaves a
+half-written section file. One splitter serves the whole run, so
+each section file is written once even when several tasks stream it.
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, TextIO
+
+from crewai.events.types.llm_events import LLMStreamChunkEvent
+from crewai.events.types.task_events import TaskCompletedEvent, TaskStartedEvent
+
+from veloraplan.artifacts import atomic_write
+from veloraplan.events import register_handlers, unregister_handlers
+
+class SectionSplitter:
+    """Routes streamed text into section files as their headings arrive"""
+
+    CHARTER_START = "# Project Charter:"
+    CHARTER_END = ("## Project Timeline", "## Resource Allocation Plan")
+
+    def __init__(self, output_dir: str, timestamp: str):
+        self.output_dir = output_dir
+        self.timestamp = timestamp
+        self._buffer = ""
+        self._gantt: Optional[List[str]] = None  # Lines of the open section
+        self._charter: Optional[List[str]] = None
+        self.saved = set()
+
+    def feed(self, text: str):
+        """Feed streamed text; complete lines are routed immediately"""
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._handle_line(line + "\n")
+
+    def close(self):
+        """Flush the last partial line and close any open section file.
+
+        Called at the end of each task's stream; the splitter can then be fed
+        the next task, but a section that has been saved is never reopened.
+        """
+        if self._buffer:
+            self._handle_line(self._buffer)
+            self._buffer = ""
+        if self._gantt:
+            self._close_section("_gantt", "gantt_chart")
+        if self._charter:
+            self._close_section("_charter", "project_charter")
+
+    def _close_section(self, attribute: str, prefix: str):
+        path = os.path.join(self.output_dir, f"{prefix}_{self.timestamp}.md")
+        atomic_write(path, "".join(getattr(self, attribute)))
+        setattr(self, attribute, None)
+        self.saved.add(prefix)
+        label = "Gantt chart" if prefix == "gantt_chart" else "Project charter"
+        print(f"\n✅ {label} saved to: {self.output_dir}/{prefix}_{self.timestamp}.md")
+
+    def _handle_line(self, line: str):
+        stripped = line.strip()
+
+        # Gantt chart: first mermaid code block
+        if self._gantt:
+            if stripped.startswith("```"):
+                self._gantt.append("```")
+                self._close_section("_gantt", "gantt_chart")
+            else:
+                self._gantt.append(line)
+        elif stripped.startswith("```mermaid") and "gantt_chart" not in self.saved:
+            self._gantt = [line]
+
+        # Project charter: from its title up to the timeline or resource plan
+        if self._charter:
+            if stripped.startswith(self.CHARTER_END):
+                self._close_section("_charter", "project_charter")
+            else:
+                self._charter.append(line)
+        elif stripped.startswith(self.CHARTER_START) and "project_charter" not in self.saved:
+            self._charter = [line]
+
+class StreamingOutputWriter:
+    """Streams each task's tokens to its artifact file, the console and section files"""
+
+    def __init__(self, output_dir: str = "outputs", echo: bool = True):
+        self.output_dir = output_dir
+        self.echo = echo
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._lock = threading.Lock()
+        self._task_file: Optional[TextIO] = None
+        self._task_path: Optional[str] = None
+        self._splitter: Optional[SectionSplitter] = None
+        self._handlers = []
+        self.started_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+
+    def __enter__(self):
+        self.attach()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detach()
+        return False
+
+    def attach(self):
+        """Register event bus handlers for task and token events"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.started_at = time.time()
+        self._splitter = SectionSplitter(self.output_dir, self.timestamp)
+        self._handlers = [
+            (TaskStartedEvent, self._on_task_started),
+            (LLMStreamChunkEvent, self._on_chunk),
+            (TaskCompletedEvent, self._on_task_completed)
+        ]
+        register_handlers(self._handlers)
+
+    def detach(self):
+        """Unregister handlers and close any open files"""
+        unregister_handlers(self._handlers)
+        self._handlers = []
+        with self._lock:
+            self._close_task()
+            self._splitter = None
+
+    def _task_name(self, event) -> str:
+        task = getattr(event, "task", None) or getattr(event, "from_task", None)
+        name = getattr(task, "name", None) or getattr(event, "task_name", None)
+        return (name or "task").replace(" ", "_")
+
+    def _close_task(self):
+        if self._splitter:
+            self._splitter.close()
+        if self._task_file:
+            self._task_file.close()
+            self._task_file = None
+
+    def _on_task_started(self, source, event: TaskStartedEvent):
+        with self._lock:
+            self._close_task()
+            task_name = self._task_name(event)
+            self._task_path = os.path.join(self.output_dir, f"{task_name}_{self.timestamp}.md")
+            self._task_file = open(self._task_path, "w", encoding="utf-8")
+            if self.echo:
+                print(f"\n📝 Streaming {task_name} to: {self._task_path}")
+
+    def _on_chunk(self, source, event: LLMStreamChunkEvent):
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.time()
+            if self._task_file:
+                self._task_file.write(event.chunk)
+                self._task_file.flush()
+            if self._splitter:
+                self._splitter.feed(event.chunk)
+            if self.echo:
+                sys.stdout.write(event.chunk)
+                sys.stdout.flush()
+
+    def _on_task_completed(self, source, event: TaskCompletedEvent):
+        with self._lock:
+            self._close_task()
+            # Replace the streamed transcript with the task's final answer
+            if self._task_path and event.output is not None:
+                atomic_write(self._task_path, event.output.raw or "")
+                print(f"\n✅ Task output saved to: {self._task_path}")
+
+    def save_final_output(self, output) -> str:
+        """Write the final crew output next to the streamed artifacts"""
+        path = os.path.join(self.output_dir, f"crew_output_{self.timestamp}.md")
+        atomic_write(path, str(output))
+        print(f"✅ Full output saved to: {path}")
+        if self.first_token_at is not None:
+            print(f"⏱️  Time to first output: {self.first_token_at - self.started_at:.1f}s")
+        return path
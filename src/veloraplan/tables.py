@@ -0,0 +1,42 @@
+"""
+Markdown table rendering shared by the formatter tools and ProjectLoader summaries.
+
+Rows are streamed straight into a writer (a file handle or io.StringIO), so
+rendering is linear in the number of rows and never builds intermediate
+copies of the table.
+"""
+import io
+from typing import Any, Iterable, Sequence, TextIO
+
+def escape_cell(value: Any) -> str:
+    """Format a cell value so it cannot break the table layout"""
+    text = "" if value is None else str(value)
+    if "|" in text:
+        text = text.replace("|", "\\|")
+    if "\n" in text:
+        text = text.replace("\r\n", "\n").replace("\n", "<br>")
+    return text
+
+def separator_row(headers: Sequence[str]) -> str:
+    """Build the header separator row sized to each header"""
+    return "|" + "|".join("-" * (len(header) + 2) for header in headers) + "|"
+
+def write_table(out: TextIO, headers: Sequence[str], rows: Iterable[Sequence[Any]], title: str = None) -> int:
+    """Write a markdown table row by row to out; returns the number of rows written"""
+    write = out.write
+    if title:
+        write(f"{title}\n\n")
+    write("| " + " | ".join(escape_cell(header) for header in headers) + " |\n")
+    write(separator_row(headers) + "\n")
+
+    count = 0
+    for row in rows:
+        write("| " + " | ".join(map(escape_cell, row)) + " |\n")
+        count += 1
+    return count
+
+def render_table(headers: Sequence[str], rows: Iterable[Sequence[Any]], title: str = None) -> str:
+    """Render a markdown table to a string"""
+    buffer = io.StringIO()
+    write_table(buffer, headers, rows, title)
+    return buffer.getvalue()
@@ -0,0 +1,255 @@
+"""
+Memoized, async-capable crewAI tools.
+
+Tools that derive from CachedTool have their _run wrapped at class creation.
+Results are memoized by tool name and canonical arguments: defaults are
+applied and the values are serialized as sorted JSON, so an agent re-asking
+with reordered or omitted default arguments is still a hit. Concurrent
+identical calls run once. Results live in a bounded in-memory LRU for the
+process. Tools marked persistent_cache are also kept in a local SQLite table
+across runs when TOOL_CACHE_PERSIST=true. A tool's cache_version() (for
+example a config file's mtime) and a hash of its _run source are part of the
+key, so cached results outlive neither their inputs nor a change to the tool.
+Bump CACHE_VERSION when a tool's output changes through code outside _run.
+
+Every CachedTool also has an async _arun that runs the memoized _run in a
+worker thread, so several calls can be awaited together (see
+run_tool_calls). Batched calls are validated against each tool's args_schema
+and emit the same tool usage events as calls made by an agent, so metrics and
+traces see them.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+
+from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent
+from crewai.tools import BaseTool
+from pydantic import ValidationError
+
+from veloraplan.events import emit_event
+from veloraplan.metrics import CACHE_REQUESTS
+
+DEFAULT_DB_PATH = os.path.join(".cache", "tool_cache.db")
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_HOURS = 24
+ERROR_PREFIX = "Error"
+PARALLEL_TOOL_NAME = "Parallel Tool Runner"
+
+_last_call = threading.local()  # Whether the calling thread's last get_or_compute was a hit
+
+def canonical_arguments(arguments: Dict[str, Any]) -> str:
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+class ToolResultCache:
+    """In-memory LRU of tool results, optionally backed by SQLite across runs"""
+
+    def __init__(self, max_entries: int = None, db_path: str = None, persist: bool = None, ttl_hours: float = None):
+        self.max_entries = max_entries or int(os.getenv("TOOL_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.persist = persist if persist is not None else os.getenv("TOOL_CACHE_PERSIST", "false").lower() == "true"
+        self.db_path = db_path or os.getenv("TOOL_CACHE_PATH", DEFAULT_DB_PATH)
+        self.ttl_seconds = 3600 * (ttl_hours if ttl_hours is not None else
+                                   float(os.getenv("TOOL_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS)))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS tool_results "
+                             "(key TEXT PRIMARY KEY, tool TEXT, result TEXT, created REAL)")
+            self._db.execute("DELETE FROM tool_results WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self._db.commit()
+        return self._db
+
+    def _lookup(self, key: str, persistent: bool) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if not (persistent and self.persist):
+                return None
+            row = self._connect().execute("SELECT result FROM tool_results WHERE key = ? AND created >= ?",
+                                          (key, time.time() - self.ttl_seconds)).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def _remember(self, key: str, result: str):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, key: str, tool: str, result: str, persistent: bool):
+        with self._lock:
+            self._remember(key, result)
+            if persistent and self.persist:
+                db = self._connect()
+                db.execute("INSERT OR REPLACE INTO tool_results (key, tool, result, created) VALUES (?, ?, ?, ?)",
+                           (key, tool, result, time.time()))
+                db.commit()
+
+    def get_or_compute(self, tool: str, arguments: Dict[str, Any], compute: Callable[[], Any],
+                       version: str = "", persistent: bool = False) -> Any:
+        """Cached result for a tool call, computing it once if missing.
+
+        Only string results are cached, and error messages are not.
+        """
+        key = hashlib.sha256(f"{tool}\0{version}\0{canonical_arguments(arguments)}".encode("utf-8")).hexdigest()
+        _last_call.hit = False
+        result = self._lookup(key, persistent)
+        if result is None:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                # Another thread may have computed it while we waited
+                result = self._lookup(key, persistent)
+                if result is None:
+                    with self._lock:
+                        self.misses += 1
+                    CACHE_REQUESTS.inc(cache="tool_result", result="miss")
+                    try:
+                        result = compute()
+                        if isinstance(result, str) and not result.startswith(ERROR_PREFIX):
+                            self._store(key, tool, result, persistent)
+                    finally:
+                        with self._lock:
+                            self._key_locks.pop(key, None)
+                    return result
+        with self._lock:
+            self.hits += 1
+        _last_call.hit = True
+        CACHE_REQUESTS.inc(cache="tool_result", result="hit")
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.persist and os.path.exists(self.db_path):
+                self._connect().execute("DELETE FROM tool_results")
+                self._connect().commit()
+
+_tool_cache: Optional[ToolResultCache] = None
+_tool_cache_lock = threading.Lock()
+
+def get_tool_cache() -> ToolResultCache:
+    """Get the process-wide tool result cache configured from the environment"""
+    global _tool_cache
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            _tool_cache = ToolResultCache()
+        return _tool_cache
+
+def set_tool_cache(cache: ToolResultCache):
+    """Replace the process-wide tool result cache, e.g. with an empty one for a timed replay"""
+    global _tool_cache
+    with _tool_cache_lock:
+        _tool_cache = cache
+
+def _code_version(run: Callable) -> str:
+    """Short hash of a _run implementation, so edited tools do not serve stale cached results"""
+    try:
+        code = inspect.getsource(run).encode("utf-8")
+    except (OSError, TypeError):
+        code = run.__code__.co_code
+    return hashlib.sha1(code).hexdigest()[:12]
+
+def _memoized(run: Callable) -> Callable:
+    signature = inspect.signature(run)
+    code_version = _code_version(run)
+
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.pop("self")
+        return get_tool_cache().get_or_compute(self.name, arguments, lambda: run(self, *args, **kwargs),
+                                               version=f"{code_version}:{self.CACHE_VERSION}:"
+                                                       f"{self.cache_version(arguments)}",
+                                               persistent=self.persistent_cache)
+
+    return wrapper
+
+class CachedTool(BaseTool):
+    """BaseTool whose _run results are memoized and which can be awaited via _arun"""
+
+    persistent_cache: ClassVar[bool] = False
+    CACHE_VERSION: ClassVar[str] = "1"  # Bump when output changes through code outside _run
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "_run" in cls.__dict__:
+            cls._run = _memoized(cls.__dict__["_run"])
+
+    def cache_version(self, arguments: Dict[str, Any]) -> str:
+        """Extra cache key component for inputs that are not arguments (files, settings)"""
+        return ""
+
+    async def _arun(self, *args, **kwargs) -> Any:
+        return await asyncio.to_thread(self._run, *args, **kwargs)
+
+def validate_arguments(tool: BaseTool, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments checked and coerced by the tool's args_schema; raises pydantic ValidationError"""
+    schema = getattr(tool, "args_schema", None)
+    if schema is None:
+        return arguments
+    validated = schema.model_validate(arguments)
+    return {name: getattr(validated, name) for name in validated.model_fields_set}
+
+def call_tool(tool: BaseTool, arguments: Dict[str, Any]) -> Any:
+    """Run one tool call the way an agent's call runs: validated, with tool usage events"""
+    event_fields = {"tool_name": tool.name, "tool_args": arguments, "tool_class": type(tool).__name__}
+    emit_event(tool, ToolUsageStartedEvent(**event_fields))
+    started_at = datetime.now()
+    try:
+        validated = validate_arguments(tool, arguments)
+    except ValidationError as e:
+        emit_event(tool, ToolUsageErrorEvent(**event_fields, error=e))
+        return f"{ERROR_PREFIX}: invalid arguments for {tool.name}: {e}"
+    _last_call.hit = False  # Tools without a cache never set it
+    try:
+        result = tool._run(**validated)
+    except Exception as e:
+        emit_event(tool, ToolUsageErrorEvent(**event_fields, error=e))
+        return f"{ERROR_PREFIX} running {tool.name}: {e}"
+    emit_event(tool, ToolUsageFinishedEvent(**event_fields, started_at=started_at, finished_at=datetime.now(),
+                                            from_cache=getattr(_last_call, "hit", False), output=result))
+    return result
+
+async def _gather_tool_calls(tools: Dict[str, BaseTool], calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+    async def one(name: str, arguments: Dict[str, Any]):
+        tool = tools.get(name)
+        if tool is None:
+            return f"{ERROR_PREFIX}: unknown tool '{name}'"
+        # In a worker thread, so the cache hit flag set by the memoized _run is this call's
+        return await asyncio.to_thread(call_tool, tool, arguments)
+
+    return await asyncio.gather(*(one(name, arguments) for name, arguments in calls))
+
+def run_tool_calls(tools: Dict[str, BaseTool], calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+    """Run several (tool name, arguments) calls concurrently; results keep the call order"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_gather_tool_calls(tools, calls))
+    # Already inside an event loop (async kickoff): run the batch on its own loop in a thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _gather_tool_calls(tools, calls)).result()
@@ -3,6 +3,7 @@ from crewai.tools import BaseTool
 from typing import Type, List
 from pydantic import BaseModel, Field
 import json
+from veloraplan.intake_scoring import score_intake
 
 # --- Tool 1: Scoring Calculator Tool ---
 class ScoringInput(BaseModel):
@@ -12,24 +13,12 @@ class ScoringInput(BaseModel):
 class ScoringCalculatorTool(BaseTool):
     name: str = "Scoring Calculator Tool"
     description: str = (
-        "Calculates weighted score and assigns a priority tier (P1–P4) based on business rules."
+        "Calculates weighted score and assigns a priority tier (P1–P4) and T-shirt size (XS–2XL) based on business rules."
     )
     args_schema: Type[BaseModel] = ScoringInput
 
     def _run(self, score: int, criticality_multiplier: float) -> str:
-        weighted_score = score * criticality_multiplier
-        if weighted_score >= 18:
-            priority = "P1"
-        elif weighted_score >= 12:
-            priority = "P2"
-        elif weighted_score >= 6:
-            priority = "P3"
-        else:
-            priority = "P4"
-        return json.dumps({
-            "weighted_score": weighted_score,
-            "priority": priority
-        })
+        return json.dumps(score_intake(score, criticality_multiplier))
 
 # --- Tool 2: Mermaid Gantt Generator Tool ---
 class GanttInput(BaseModel):
@@ -0,0 +1,329 @@
+"""
+Working-day calendars with per-region holiday tables.
+
+A WorkCalendar precomputes, over a span of years, a working-day flag per day,
+its cumulative count and the ordinals of all working days as NumPy arrays.
+Adding N working days and counting working days between two dates are then
+single array lookups, and the vectorized variants schedule thousands of
+tasks at once. The span grows automatically when a date falls outside it.
+
+Phase duration_days are treated as working days.
+"""
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+DateLike = Union[str, date, datetime]
+
+DEFAULT_REGION = "US"
+WEEKEND = (5, 6)  # Saturday, Sunday
+YEAR_MARGIN = 2
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+# --- Holiday rules ---
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday of a month; n=-1 for the last"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1))
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+def _observed_nearest(day: date) -> date:
+    """US rule: Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+def _with_substitutes(days: List[date]) -> List[date]:
+    """UK/Canada rule: weekend holidays move to the next free weekday"""
+    taken = set()
+    observed = []
+    for day in sorted(days):
+        while day.weekday() in WEEKEND or day in taken:
+            day += timedelta(days=1)
+        taken.add(day)
+        observed.append(day)
+    return observed
+
+def _us_holidays(year: int) -> List[date]:
+    days = [
+        _observed_nearest(date(year, 1, 1)),
+        _nth_weekday(year, 1, 0, 3),           # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),           # Presidents' Day
+        _nth_weekday(year, 5, 0, -1),          # Memorial Day
+        _observed_nearest(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),           # Labor Day
+        _nth_weekday(year, 10, 0, 2),          # Columbus Day
+        _observed_nearest(date(year, 11, 11)),
+        _nth_weekday(year, 11, 3, 4),          # Thanksgiving
+        _observed_nearest(date(year, 12, 25))
+    ]
+    if year >= 2021:
+        days.append(_observed_nearest(date(year, 6, 19)))  # Juneteenth
+    return days
+
+def _uk_holidays(year: int) -> List[date]:
+    easter = _easter(year)
+    return [
+        easter - timedelta(days=2),            # Good Friday
+        easter + timedelta(days=1),            # Easter Monday
+        _nth_weekday(year, 5, 0, 1),           # Early May bank holiday
+        _nth_weekday(year, 5, 0, -1),          # Spring bank holiday
+        _nth_weekday(year, 8, 0, -1),          # Summer bank holiday
+    ] + _with_substitutes([date(year, 1, 1), date(year, 12, 25), date(year, 12, 26)])
+
+def _ca_holidays(year: int) -> List[date]:
+    return [
+        _easter(year) - timedelta(days=2),     # Good Friday
+        date(year, 5, 24) - timedelta(days=date(year, 5, 24).weekday()),  # Victoria Day
+        _nth_weekday(year, 9, 0, 1),           # Labour Day
+        _nth_weekday(year, 10, 0, 2),          # Thanksgiving
+    ] + _with_substitutes([date(year, 1, 1), date(year, 7, 1), date(year, 12, 25), date(year, 12, 26)])
+
+HOLIDAY_RULES: Dict[str, Callable[[int], List[date]]] = {
+    "US": _us_holidays,
+    "UK": _uk_holidays,
+    "CA": _ca_holidays,
+    "NONE": lambda year: []
+}
+
+def holiday_table(region: str, years: Iterable[int]) -> List[date]:
+    """Observed public holidays for a region over the given years"""
+    if region not in HOLIDAY_RULES:
+        raise ValueError(f"Unknown calendar region '{region}'. Available: {', '.join(HOLIDAY_RULES)}")
+    return sorted(day for year in years for day in HOLIDAY_RULES[region](year))
+
+class CalendarSpan(NamedTuple):
+    """Immutable precomputed working-day arrays for a span of years"""
+    start_year: int
+    end_year: int
+    first_ordinal: int
+    is_working: np.ndarray
+    cumulative: np.ndarray  # cumulative[i] = working days strictly before day i
+    working_ordinals: np.ndarray
+    holidays: Tuple[date, ...]
+
+    def covers(self, low: int, high: int) -> bool:
+        return low >= self.first_ordinal and high - self.first_ordinal < len(self.is_working)
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+class WorkCalendar:
+    """Working-day arithmetic backed by precomputed ordinal arrays
+
+    The arrays live in one immutable CalendarSpan. Growing the span builds a
+    new one and swaps it in with a single assignment, so every call takes the
+    snapshot once and never sees arrays from two different spans.
+    """
+
+    def __init__(self, region: str = DEFAULT_REGION, start_year: int = None, end_year: int = None,
+                 extra_holidays: Iterable[DateLike] = ()):
+        self.region = region.upper()
+        self.extra_holidays = {_to_date(day) for day in extra_holidays}
+        this_year = date.today().year
+        self._lock = threading.Lock()
+        self._span = self._build(start_year or this_year - YEAR_MARGIN, end_year or this_year + YEAR_MARGIN)
+
+    def _build(self, start_year: int, end_year: int) -> CalendarSpan:
+        """Precompute the working-day flags, running counts and working-day ordinals"""
+        first_ordinal = date(start_year, 1, 1).toordinal()
+        last_ordinal = date(end_year, 12, 31).toordinal()
+        ordinals = np.arange(first_ordinal, last_ordinal + 1, dtype=np.int64)
+
+        # date.weekday() is (ordinal - 1) % 7 with Monday == 0
+        working = ~np.isin((ordinals - 1) % 7, WEEKEND)
+        holidays = set(holiday_table(self.region, range(start_year, end_year + 1))) | self.extra_holidays
+        holiday_ordinals = np.array([day.toordinal() for day in holidays], dtype=np.int64) - first_ordinal
+        holiday_ordinals = holiday_ordinals[(holiday_ordinals >= 0) & (holiday_ordinals < len(ordinals))]
+        working[holiday_ordinals] = False
+
+        return CalendarSpan(
+            start_year=start_year,
+            end_year=end_year,
+            first_ordinal=first_ordinal,
+            is_working=_frozen(working),
+            cumulative=_frozen(np.concatenate(([0], np.cumsum(working, dtype=np.int64)))),
+            working_ordinals=_frozen(ordinals[working]),
+            holidays=tuple(sorted(day for day in holidays if start_year <= day.year <= end_year))
+        )
+
+    def _grow(self, start_year: int, end_year: int) -> CalendarSpan:
+        """Swap in a span that includes the given years (and the current span)"""
+        with self._lock:
+            span = self._span
+            if span.start_year > start_year or span.end_year < end_year:
+                span = self._span = self._build(min(span.start_year, start_year), max(span.end_year, end_year))
+            return span
+
+    def _cover(self, *ordinals: int) -> CalendarSpan:
+        """A span that includes every given ordinal, extending the current one if needed"""
+        span = self._span
+        low, high = min(ordinals), max(ordinals)
+        if not span.covers(low, high):
+            span = self._grow(date.fromordinal(low).year - YEAR_MARGIN, date.fromordinal(high).year + YEAR_MARGIN)
+        return span
+
+    def _working_ordinals(self, span: CalendarSpan, position: int) -> np.ndarray:
+        """Working-day ordinals indexed by positions in span, long enough to include position"""
+        working_ordinals, end_year = span.working_ordinals, span.end_year
+        while position >= len(working_ordinals):
+            missing_years = (position - len(working_ordinals)) // 250 + 1
+            grown = self._grow(span.start_year, end_year + max(YEAR_MARGIN, missing_years))
+            # Another thread may have grown the span backwards too: skip the working days before ours
+            working_ordinals = grown.working_ordinals[int(grown.cumulative[span.first_ordinal - grown.first_ordinal]):]
+            end_year = grown.end_year
+        return working_ordinals
+
+    # --- Span snapshot, for inspection ---
+    @property
+    def start_year(self) -> int:
+        return self._span.start_year
+
+    @property
+    def end_year(self) -> int:
+        return self._span.end_year
+
+    @property
+    def holidays(self) -> List[date]:
+        return list(self._span.holidays)
+
+    # --- Scalar API ---
+    def is_working_day(self, day: DateLike) -> bool:
+        ordinal = _to_date(day).toordinal()
+        span = self._cover(ordinal)
+        return bool(span.is_working[ordinal - span.first_ordinal])
+
+    def working_days_between(self, start: DateLike, end: DateLike) -> int:
+        """Working days in [start, end); negative if end is before start"""
+        start_ordinal, end_ordinal = _to_date(start).toordinal(), _to_date(end).toordinal()
+        span = self._cover(start_ordinal, end_ordinal)
+        return int(span.cumulative[end_ordinal - span.first_ordinal] - span.cumulative[start_ordinal - span.first_ordinal])
+
+    def add_working_days(self, start: DateLike, days: int) -> date:
+        """The date `days` working days after start (before it if negative).
+
+        With days=0, start itself if it is a working day, otherwise the next one.
+        """
+        ordinal = _to_date(start).toordinal()
+        span = self._cover(ordinal)
+        index = ordinal - span.first_ordinal
+        before = int(span.cumulative[index])  # working days before start
+        if days > 0:
+            position = before + int(span.is_working[index]) + days - 1
+        elif days == 0:
+            position = before
+        else:
+            position = before + days
+            if position < 0:
+                # Extend the span backwards; positions shift, so start over
+                self._grow(span.start_year - (-position // 250 + YEAR_MARGIN), span.end_year)
+                return self.add_working_days(start, days)
+        return date.fromordinal(int(self._working_ordinals(span, position)[position]))
+
+    def next_working_day(self, day: DateLike) -> date:
+        """day itself if it is a working day, otherwise the next working day"""
+        return self.add_working_days(day, 0)
+
+    def end_date(self, start: DateLike, duration_days: int) -> date:
+        """Last working day of a task that starts on start and lasts duration_days working days"""
+        return self.add_working_days(self.next_working_day(start), max(duration_days, 1) - 1)
+
+    def schedule(self, start: DateLike, durations: Iterable[int]) -> List[Tuple[date, date]]:
+        """Back-to-back (start, end) dates for consecutive phases of the given working-day durations"""
+        durations = np.asarray(list(durations), dtype=np.int64)
+        if not len(durations):
+            return []
+        first = self.next_working_day(start).toordinal()
+        span = self._cover(first)
+        offset = int(span.cumulative[first - span.first_ordinal])
+        lengths = np.maximum(durations, 1)
+        ends = offset + np.cumsum(lengths) - 1
+        starts = ends - lengths + 1
+        working_ordinals = self._working_ordinals(span, int(ends[-1]))
+        return [
+            (date.fromordinal(int(working_ordinals[s])), date.fromordinal(int(working_ordinals[e])))
+            for s, e in zip(starts, ends)
+        ]
+
+    # --- Vectorized API ---
+    def add_working_days_many(self, starts: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """add_working_days over arrays of start ordinals and non-negative day counts; returns ordinals"""
+        starts = np.asarray(starts, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        span = self._cover(int(starts.min()), int(starts.max()))
+        indexes = starts - span.first_ordinal
+        before = span.cumulative[indexes]
+        positions = np.where(days > 0, before + span.is_working[indexes] + days - 1, before)
+        return self._working_ordinals(span, int(positions.max()))[positions]
+
+    def schedule_many(self, starts: np.ndarray, groups: np.ndarray, durations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """schedule() for many projects at once.
+
+        durations holds every phase's working days, with groups giving the
+        index of its project into starts (start ordinals); each project's
+        phases must be contiguous and in order. Returns (start, end) ordinals
+        per phase.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        groups = np.asarray(groups, dtype=np.int64)
+        lengths = np.maximum(np.asarray(durations, dtype=np.int64), 1)
+        if not len(lengths):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        # Position of each project's first working day, then running phase lengths within each project
+        first = self.add_working_days_many(starts, np.zeros(len(starts), dtype=np.int64))
+        span = self._cover(int(first.min()), int(first.max()))
+        offsets = span.cumulative[first - span.first_ordinal]
+        totals = np.cumsum(lengths)
+        group_start = np.r_[True, groups[1:] != groups[:-1]]
+        before_group = np.maximum.accumulate(np.where(group_start, totals - lengths, 0))
+        ends = offsets[groups] + (totals - before_group) - 1
+        phase_starts = ends - lengths + 1
+        working_ordinals = self._working_ordinals(span, int(ends.max()))
+        return working_ordinals[phase_starts], working_ordinals[ends]
+
+    def working_days_between_many(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """working_days_between over arrays of start and end ordinals"""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        span = self._cover(int(starts.min()), int(starts.max()), int(ends.min()), int(ends.max()))
+        return span.cumulative[ends - span.first_ordinal] - span.cumulative[starts - span.first_ordinal]
+
+_calendars: Dict[str, WorkCalendar] = {}
+_calendars_lock = threading.Lock()
+
+def get_calendar(region: str = None) -> WorkCalendar:
+    """Get the shared calendar for a region (WORK_CALENDAR_REGION, default US)"""
+    region = (region or os.getenv("WORK_CALENDAR_REGION", DEFAULT_REGION)).upper()
+    with _calendars_lock:
+        if region not in _calendars:
+            _calendars[region] = WorkCalendar(region)
+        return _calendars[region]
@@ -0,0 +1,332 @@
+"""
+Workload traces: record a run once, replay it against the current code.
+
+A TraceRecorder is handed to the agents' RateLimitedLLM (the trace option of
+CrewFactory.build). It records every LLM request and response, and it listens
+on the crewAI event bus for task and tool timings. The trace file also stores
+the run's crew inputs and a snapshot of the project config, so a replay does
+not depend on the config file as it is now.
+
+A TraceReplayer rebuilds the crew from the trace with the current code and
+answers each LLM call with the recorded response. Responses are matched on
+the same key the prompt cache uses. If a prompt changed, the next unused
+response in recorded order is returned instead. Tools, context budgeting,
+output extraction and everything else run for real. Replayed stages contain
+no LLM latency, so they are compared with the recorded time minus LLM time
+(the "local" time).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from crewai.events.types.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+from crewai.events.types.tool_usage_events import ToolUsageErrorEvent, ToolUsageFinishedEvent
+
+from veloraplan.artifacts import atomic_write
+from veloraplan.events import register_handlers, unregister_handlers
+from veloraplan.tables import render_table
+from veloraplan.tool_cache import PARALLEL_TOOL_NAME
+
+TRACE_VERSION = 1
+DEFAULT_TRACE_DIR = os.path.join("outputs", "traces")
+TASK_PREFIX = "task: "
+
+def _new_stage(name: str) -> Dict[str, Any]:
+    return {"name": name, "seconds": 0.0, "llm_seconds": 0.0, "llm_calls": 0, "tool_seconds": 0.0, "tool_calls": 0}
+
+class TraceRecorder:
+    """Records LLM calls, tool calls and per-stage timings of one run"""
+
+    def __init__(self, inputs: Dict[str, Any] = None, config=None, model: str = None):
+        self.inputs = inputs or {}
+        self.config = config
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.stages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._stage: Optional[Dict[str, Any]] = None
+        self._task: Optional[Dict[str, Any]] = None
+        self._task_started = 0.0
+        self._handlers = []
+        self.total_seconds = 0.0
+
+    # --- LLM hook (called by RateLimitedLLM) ---
+    def llm_call(self, key: str, messages, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        self._record_llm(key, messages, result, time.perf_counter() - started)
+        return result
+
+    def _record_llm(self, key: str, messages, response, seconds: float, **extra):
+        with self._lock:
+            self.llm_calls.append({"key": key, "task": self._task["name"][len(TASK_PREFIX):] if self._task else None,
+                                   "messages": messages, "response": response, "seconds": round(seconds, 4), **extra})
+            for stage in (self._stage, self._task):
+                if stage is not None:
+                    stage["llm_seconds"] += seconds
+                    stage["llm_calls"] += 1
+
+    # --- Stages and events ---
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Time a top-level stage (build, kickoff, extract)"""
+        stage = _new_stage(name)
+        with self._lock:
+            self.stages.append(stage)
+            self._stage = stage
+        started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage["seconds"] = time.perf_counter() - started
+            self.total_seconds += stage["seconds"]
+            with self._lock:
+                self._stage = None
+
+    def attach(self):
+        self._handlers = [
+            (TaskStartedEvent, self._on_task_started),
+            (TaskCompletedEvent, self._on_task_finished),
+            (TaskFailedEvent, self._on_task_finished),
+            (ToolUsageFinishedEvent, self._on_tool_finished),
+            (ToolUsageErrorEvent, self._on_tool_error)
+        ]
+        register_handlers(self._handlers)
+
+    def detach(self):
+        unregister_handlers(self._handlers)
+        self._handlers = []
+
+    @staticmethod
+    def _task_name(event) -> str:
+        task = getattr(event, "task", None)
+        return getattr(task, "name", None) or getattr(event, "task_name", None) or "unknown"
+
+    def _on_task_started(self, source, event):
+        with self._lock:
+            self._task = _new_stage(TASK_PREFIX + self._task_name(event))
+            self.stages.append(self._task)
+            self._task_started = time.perf_counter()
+
+    def _on_task_finished(self, source, event):
+        with self._lock:
+            if self._task is not None:
+                self._task["seconds"] = time.perf_counter() - self._task_started
+                self._task = None
+
+    def _add_tool(self, event, seconds: float, error: str = None):
+        with self._lock:
+            self.tool_calls.append({
+                "tool": event.tool_name, "task": self._task["name"][len(TASK_PREFIX):] if self._task else None,
+                "arguments": event.tool_args, "seconds": round(seconds, 4),
+                "from_cache": getattr(event, "from_cache", False), "error": error
+            })
+            if event.tool_name == PARALLEL_TOOL_NAME:
+                return  # Its batched calls are recorded one by one; don't count their time twice
+            for stage in (self._stage, self._task):
+                if stage is not None:
+                    stage["tool_seconds"] += seconds
+                    stage["tool_calls"] += 1
+
+    def _on_tool_finished(self, source, event):
+        self._add_tool(event, (event.finished_at - event.started_at).total_seconds())
+
+    def _on_tool_error(self, source, event):
+        self._add_tool(event, 0.0, error=str(event.error))
+
+    # --- Trace file ---
+    def to_dict(self) -> Dict[str, Any]:
+        config = self.config
+        return {
+            "version": TRACE_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "model": self.model,
+            "inputs": self.inputs,
+            "config": config.model_dump(mode="json") if hasattr(config, "model_dump") else config,
+            "total_seconds": round(self.total_seconds, 4),
+            "stages": [dict(stage, seconds=round(stage["seconds"], 4), llm_seconds=round(stage["llm_seconds"], 4),
+                            tool_seconds=round(stage["tool_seconds"], 4)) for stage in self.stages],
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls
+        }
+
+    def save(self, path: str = None) -> str:
+        path = path or os.path.join(DEFAULT_TRACE_DIR, f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        return atomic_write(path, json.dumps(self.to_dict(), indent=1, default=str))
+
+@contextmanager
+def recording(path: Optional[str], inputs: Dict[str, Any], config) -> Iterator[Optional[TraceRecorder]]:
+    """Record the enclosed run into a trace file; path "" uses the default location, None disables recording"""
+    if path is None:
+        yield None
+        return
+    recorder = TraceRecorder(inputs, config)
+    recorder.attach()
+    try:
+        yield recorder
+    finally:
+        recorder.detach()
+    saved = recorder.save(path or None)
+    print(f"🎞️  Recorded {len(recorder.llm_calls)} LLM calls and {len(recorder.tool_calls)} tool calls to {saved} "
+          f"(replay with: replay --trace {saved})")
+
+def trace_stage(recorder: Optional[TraceRecorder], name: str):
+    """recorder.stage(name), or a no-op when not recording"""
+    return recorder.stage(name) if recorder is not None else nullcontext()
+
+def record_path_from_argv(argv: List[str] = None) -> Optional[str]:
+    """Trace path from --record [PATH] ("" for the default path), or None"""
+    argv = sys.argv if argv is None else argv
+    if "--record" not in argv:
+        return None
+    index = argv.index("--record") + 1
+    return argv[index] if index < len(argv) and not argv[index].startswith("--") else ""
+
+def load_trace(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        trace = json.load(f)
+    if trace.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {trace.get('version')} in {path} (expected {TRACE_VERSION})")
+    return trace
+
+class TraceReplayer(TraceRecorder):
+    """Answers LLM calls from a recorded trace while timing the current code"""
+
+    def __init__(self, trace: Dict[str, Any]):
+        super().__init__(trace["inputs"], trace["config"], trace.get("model"))
+        self.recorded = trace
+        self._by_key: Dict[str, deque] = defaultdict(deque)
+        for index, call in enumerate(trace["llm_calls"]):
+            self._by_key[call["key"]].append(index)
+        self._used = [False] * len(trace["llm_calls"])
+        self._next = 0
+        self.matched = 0
+        self.fallbacks = 0
+
+    def _take(self, key: str) -> Optional[int]:
+        with self._lock:
+            candidates = self._by_key.get(key)
+            while candidates:
+                index = candidates.popleft()
+                if not self._used[index]:
+                    self.matched += 1
+                    self._used[index] = True
+                    return index
+            # Prompt changed: fall back to the next unused response in recorded order
+            while self._next < len(self._used) and self._used[self._next]:
+                self._next += 1
+            if self._next == len(self._used):
+                return None
+            self.fallbacks += 1
+            self._used[self._next] = True
+            return self._next
+
+    def llm_call(self, key: str, messages, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        index = self._take(key)
+        if index is None:
+            raise RuntimeError(f"Trace has no recorded LLM response left for call {len(self.llm_calls) + 1}; "
+                               f"the workload changed too much to replay")
+        response = self.recorded["llm_calls"][index]["response"]
+        self._record_llm(key, None, response, time.perf_counter() - started, replayed_from=index)
+        return response
+
+def replay_trace(path: str, factory=None, output_dir: str = None) -> TraceReplayer:
+    """Re-execute a recorded run with the current code and the recorded LLM responses"""
+    from veloraplan import extract_outputs
+    from veloraplan.artifacts import ArtifactWriter
+    from veloraplan.crew import crew_factory
+    from veloraplan.models import ProjectConfig
+    from veloraplan.tool_cache import ToolResultCache, set_tool_cache
+
+    trace = load_trace(path)
+    replayer = TraceReplayer(trace)
+    config = ProjectConfig(**trace["config"]) if trace.get("config") else None
+    factory = factory or crew_factory
+    # Tools must do their work again, not answer from results cached by earlier runs
+    set_tool_cache(ToolResultCache(persist=False))
+
+    replayer.attach()
+    try:
+        with replayer.stage("build"):
+            crew = factory.build(replayer.inputs, config, trace=replayer)
+        with replayer.stage("kickoff"):
+            result = crew.kickoff()
+        with replayer.stage("extract"):
+            with ArtifactWriter(output_dir or os.path.join(DEFAULT_TRACE_DIR, "replay")) as artifacts:
+                extract_outputs.main(content=str(result), writer=artifacts)
+    finally:
+        replayer.detach()
+    return replayer
+
+def _local(stage: Dict[str, Any]) -> float:
+    return max(0.0, stage["seconds"] - stage["llm_seconds"])
+
+def compare(recorded: Dict[str, Any], replayed: Dict[str, Any]) -> List[List[Any]]:
+    """Rows of stage, recorded, recorded local and replayed seconds, and the local change"""
+    rows = []
+    replayed_stages = {stage["name"]: stage for stage in replayed["stages"]}
+
+    def row(name, recorded_total, recorded_local, replayed_local):
+        change = "" if replayed_local is None or not recorded_local else \
+            f"{(replayed_local - recorded_local) / recorded_local:+.0%}"
+        rows.append([name, f"{recorded_total:.3f}", f"{recorded_local:.3f}",
+                     "" if replayed_local is None else f"{replayed_local:.3f}", change])
+
+    for stage in recorded["stages"]:
+        other = replayed_stages.get(stage["name"])
+        row(stage["name"], stage["seconds"], _local(stage), _local(other) if other else None)
+
+    def tool_totals(calls):
+        totals = defaultdict(float)
+        for call in calls:
+            totals[call["tool"]] += call["seconds"]
+        return totals
+
+    recorded_tools, replayed_tools = tool_totals(recorded["tool_calls"]), tool_totals(replayed["tool_calls"])
+    for tool in sorted(set(recorded_tools) | set(replayed_tools)):
+        seconds = recorded_tools.get(tool, 0.0)
+        row(f"tool: {tool}", seconds, seconds, replayed_tools.get(tool, 0.0))
+
+    recorded_local = sum(_local(stage) for stage in recorded["stages"] if not stage["name"].startswith(TASK_PREFIX))
+    replayed_local = sum(_local(stage) for stage in replayed["stages"] if not stage["name"].startswith(TASK_PREFIX))
+    row("total", recorded["total_seconds"], recorded_local, replayed_local)
+    return rows
+
+def write_report(replayer: TraceReplayer, trace_path: str, output_dir: str = "outputs") -> str:
+    """Write the replay comparison as markdown plus the replayed timings as JSON; returns the markdown path"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    recorded, replayed = replayer.recorded, replayer.to_dict()
+    report = "\n".join([
+        f"# Replay of {trace_path}",
+        "",
+        f"Recorded {recorded['created']} with {recorded['model']}: {len(recorded['llm_calls'])} LLM calls, "
+        f"{len(recorded['tool_calls'])} tool calls. Replayed {replayer.matched} responses by prompt and "
+        f"{replayer.fallbacks} by order.",
+        "",
+        render_table(["Stage", "Recorded (s)", "Recorded local (s)", "Replayed (s)", "Change"],
+                     compare(recorded, replayed), title="## Timings"),
+        f"---\n*Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
+        ""
+    ])
+    path = atomic_write(os.path.join(output_dir, f"replay_{timestamp}.md"), report)
+    replayed.pop("llm_calls")
+    atomic_write(os.path.join(output_dir, f"replay_{timestamp}.json"), json.dumps(replayed, indent=1, default=str))
+    return path
+
+def print_report(replayer: TraceReplayer, path: str = None):
+    rows = compare(replayer.recorded, replayer.to_dict())
+    print("\n⏱️  REPLAY TIMINGS (local time, LLM latency excluded):")
+    for name, _, recorded_local, replayed_local, change in rows:
+        print(f"   {name:<40} {recorded_local:>9}s -> {replayed_local or '-':>9}s {change}")
+    if replayer.fallbacks:
+        print(f"⚠️  {replayer.fallbacks} prompt(s) changed since recording; their responses were replayed by order")
+    if path:
+        print(f"   Report: {path}")
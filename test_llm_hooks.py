@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Guard test for the private crewAI LLM methods CandidateLLM overrides and calls.
+
+crewAI does not treat these as public API, so their signatures can change in
+any release. Run this after upgrading crewai.
+"""
+import inspect
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from crewai import LLM
+
+from veloraplan.crew import CandidateLLM
+
+# Parameters CandidateLLM relies on, in call order
+EXPECTED_PARAMETERS = {
+    "_handle_non_streaming_response": ["params", "callbacks", "available_functions", "from_task", "from_agent"],
+    "_handle_emit_call_events": ["response", "call_type", "from_task", "from_agent", "messages"]
+}
+
+def test_private_llm_signatures():
+    """The installed crewAI LLM still has the private method signatures CandidateLLM uses"""
+    for method_name, expected in EXPECTED_PARAMETERS.items():
+        method = getattr(LLM, method_name, None)
+        assert method is not None, f"crewai.LLM.{method_name} no longer exists"
+        parameters = [name for name in inspect.signature(method).parameters if name != "self"]
+        assert parameters[:len(expected)] == expected, (
+            f"crewai.LLM.{method_name}{inspect.signature(method)} changed; CandidateLLM expects {expected}")
+
+def test_candidate_override_matches():
+    """CandidateLLM's override accepts the same parameters as the method it replaces"""
+    override = [name for name in inspect.signature(CandidateLLM._handle_non_streaming_response).parameters]
+    original = [name for name in inspect.signature(LLM._handle_non_streaming_response).parameters]
+    assert override == original, f"CandidateLLM override {override} != crewai.LLM {original}"
+
+if __name__ == "__main__":
+    test_private_llm_signatures()
+    test_candidate_override_matches()
+    print("✅ crewAI private LLM signatures match CandidateLLM")